@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+   benchmark_monowiki_matrices.py
+
+   Descp: Regression benchmark for the structures shared by the monowiki
+      metrics: the EditsMatrix (edits, cumulative edits, tenure, gaps and
+      current streak of every contributor and month) and the factoid
+      changes (tokenize_factoids and FactoidChanges).
+
+      For every wiki of the data dir, it checks that they hold the same
+      values as the pandas groupby implementations kept below as reference,
+      and it prints the time taken by both implementations.
+
+      Exits with a non-zero status if any check fails.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+if 'WIKICHRON_DATA_DIR' not in os.environ:
+    os.environ['WIKICHRON_DATA_DIR'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../wikichron'))
+from utils.data_manager import get_available_wikis
+from utils import revision_store, columnar_cache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../wikichron/dash/apps/monowiki'))
+from metrics import edits_matrix, factoids
+
+REPETITIONS = 5
+
+PAIR_COLUMNS = ['contributor_id', 'timestamp', 'edits', 'cumulative', 'tenure', 'gaps', 'streak']
+
+
+### Reference implementations ###
+
+def reference_edits_pairs(data, page_ns = None):
+    """ Edits of every registered contributor and month, by groupby """
+    registered = data[data['contributor_name'] != edits_matrix.ANONYMOUS_NAME]
+    if page_ns is not None:
+        registered = registered[registered['page_ns'] == page_ns]
+    pairs = registered.groupby(['contributor_id', pd.Grouper(key='timestamp', freq='MS')])\
+                    .size().to_frame('edits').reset_index()
+    pairs['month'] = (pairs['timestamp'].dt.year - 1970) * 12 + pairs['timestamp'].dt.month - 1
+    contributors = pairs.groupby('contributor_id')
+    pairs['cumulative'] = contributors['edits'].cumsum()
+    pairs['tenure'] = pairs['month'] - contributors['month'].transform('min')
+    pairs['gaps'] = contributors['month'].diff().fillna(0)
+    streaks = (pairs['gaps'] != 1).cumsum()
+    pairs['streak'] = pairs.groupby(streaks).cumcount() + 1
+    return pairs
+
+
+def reference_factoids(data):
+    """ Set of factoids of every article revision made by a registered user """
+    selected = data[(data['contributor_name'] != factoids.ANONYMOUS_NAME)
+                    & (data['page_ns'] == factoids.ARTICLE_NS)]
+    return selected['factoids'].apply(lambda value:
+        set(value.split(',')) - {''} if isinstance(value, str) else set())
+
+
+def reference_factoid_changes(data):
+    """ Number of factoids added and deleted by every row of data """
+    sets = reference_factoids(data)
+    previous = sets.groupby(data.loc[sets.index, 'page_id']).shift()
+    previous = previous.apply(lambda value: value if isinstance(value, set) else None)
+
+    added = pd.Series(0, index=data.index)
+    deleted = pd.Series(0, index=data.index)
+    added[sets.index] = [len(current - (before or set()))
+                            for (current, before) in zip(sets, previous)]
+    deleted[sets.index] = [len(before - current) if before is not None else 0
+                            for (current, before) in zip(sets, previous)]
+    return (added.values, deleted.values)
+
+
+### Current implementations, in the format of the references ###
+
+def current_edits_pairs(data, page_ns = None):
+    matrix = edits_matrix.EditsMatrix(data, page_ns)
+    return pd.DataFrame({
+        'contributor_id': np.asarray(matrix.contributors, dtype=object)[matrix.rows],
+        'timestamp': matrix.months.astype(np.int64).astype('datetime64[M]').astype('datetime64[ns]'),
+        'edits': matrix.edits,
+        'cumulative': matrix.cumulative,
+        'tenure': matrix.tenure,
+        'gaps': matrix.gaps,
+        'streak': matrix.streak
+    })
+
+
+def current_factoids(data):
+    selected = np.flatnonzero(((data['contributor_name'] != factoids.ANONYMOUS_NAME)
+                                & (data['page_ns'] == factoids.ARTICLE_NS)).values)
+    (offsets, ids, vocabulary) = factoids.tokenize_factoids(data['factoids'].values[selected])
+    return [set(vocabulary[ids[start:end]]) for (start, end) in zip(offsets[:-1], offsets[1:])]
+
+
+def current_factoid_changes(data):
+    changes = factoids.FactoidChanges(data)
+    return (changes.added, changes.deleted)
+
+
+def normalize_pairs(pairs):
+    pairs = pairs[PAIR_COLUMNS].astype({column: np.int64 for column in PAIR_COLUMNS[2:]})
+    pairs = pairs.astype({'contributor_id': str})
+    return pairs.sort_values(['contributor_id', 'timestamp']).reset_index(drop=True)
+
+
+def load_wiki(wiki):
+    """ Same as data_controller.read_data() of the dash apps """
+    bots = [bot['id'] for bot in wiki.get('bots', [])]
+    df = revision_store.load_dataframe(wiki['data'], bots)
+    df.index.name = wiki['data']
+    return df
+
+
+def decode(df):
+    """
+    The dataframe with its text columns as plain object columns, as read
+    from the csv, which is what the reference implementations expect
+    """
+    return df.astype({column: object for column in df.columns
+                        if df[column].dtype.name == 'category'})
+
+
+def best_time(func, df):
+    times = []
+    for _ in range(REPETITIONS):
+        time_start = time.perf_counter()
+        result = func(df)
+        times.append(time.perf_counter() - time_start)
+    return (result, min(times))
+
+
+def check_edits_matrix(df, decoded, page_ns):
+    (expected, reference_time) = best_time(lambda data: reference_edits_pairs(data, page_ns), decoded)
+    (result, current_time) = best_time(lambda data: current_edits_pairs(data, page_ns), df)
+    print(f'   edits matrix (page_ns={page_ns}): {reference_time:.4f}s -> {current_time:.4f}s')
+    try:
+        pd.testing.assert_frame_equal(normalize_pairs(result), normalize_pairs(expected))
+    except AssertionError as e:
+        print(f'   [FAIL] the edits matrix holds different values: {e}')
+        return 1
+    return 0
+
+
+def check_factoids(df, decoded):
+    failures = 0
+    (expected, reference_time) = best_time(reference_factoids, decoded)
+    (result, current_time) = best_time(current_factoids, df)
+    print(f'   tokenize_factoids: {reference_time:.4f}s -> {current_time:.4f}s')
+    if list(expected) != result:
+        print('   [FAIL] tokenize_factoids returns different factoids')
+        failures += 1
+
+    (expected, reference_time) = best_time(reference_factoid_changes, decoded)
+    (result, current_time) = best_time(current_factoid_changes, df)
+    print(f'   FactoidChanges: {reference_time:.4f}s -> {current_time:.4f}s')
+    for (name, values, expected_values) in zip(['added', 'deleted'], result, expected):
+        if not np.array_equal(values, expected_values):
+            print(f'   [FAIL] FactoidChanges counts different {name} factoids '
+                    f'for {np.count_nonzero(values != expected_values)} revisions')
+            failures += 1
+    return failures
+
+
+def main():
+    failures = 0
+    for wiki in get_available_wikis():
+        if not os.path.exists(os.path.join(columnar_cache.data_dir, wiki['data'])):
+            continue
+
+        df = load_wiki(wiki)
+        decoded = decode(df)
+        print(f"{wiki['data']} ({len(df.index)} revisions):")
+
+        failures += check_edits_matrix(df, decoded, None)
+        failures += check_edits_matrix(df, decoded, factoids.ARTICLE_NS)
+        if 'factoids' in df.columns:
+            failures += check_factoids(df, decoded)
+
+    if failures:
+        print(f'{failures} check(s) failed.')
+    else:
+        print('All checks passed.')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
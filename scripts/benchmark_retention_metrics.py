@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+   benchmark_retention_metrics.py
+
+   Descp: Regression benchmark for the retention metrics of the classic
+      (compare) app: returning_new_editors and surviving_new_editors.
+
+      For every wiki of the data dir, it checks that the current
+      implementation returns the same series as the original pandas
+      implementation (kept below as reference), that the input dataframe is
+      left untouched, and it prints the time taken by both implementations.
+
+      Exits with a non-zero status if any check fails.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import datetime
+import os
+import sys
+import time
+
+import pandas as pd
+
+if 'WIKICHRON_DATA_DIR' not in os.environ:
+    os.environ['WIKICHRON_DATA_DIR'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../wikichron'))
+from utils.data_manager import get_available_wikis
+from utils import revision_store, columnar_cache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../wikichron/dash/apps/classic'))
+from metrics import stats
+
+REPETITIONS = 5
+
+
+### Reference implementations (WikiChron <= 2.3.1) ###
+
+def reference_returning_new_editors(data, index):
+    data = data.reset_index(drop=True)
+    registered_users = stats.filter_anonymous(data)
+    seven_days_after_registration = registered_users.groupby(['contributor_id']).agg({'timestamp':'first'}).apply(lambda x: x+datetime.timedelta(days=7)).reset_index()
+    seven_days_after_registration = seven_days_after_registration.rename(columns = {'timestamp':'seven_days_after'})
+    registered_users = pd.merge(registered_users, seven_days_after_registration, on ='contributor_id')
+    registered_users = registered_users[registered_users['timestamp'] <= registered_users['seven_days_after']]
+    registered_users = registered_users.sort_values(['timestamp'])
+    timestamp_and_contributor_id = registered_users[['timestamp', 'contributor_id']].groupby(['contributor_id'])
+    displace_timestamp = timestamp_and_contributor_id.apply(lambda x: x.shift())
+    registered_users['displace_timestamp'] = displace_timestamp['timestamp']
+    registered_users['comp'] = (registered_users.timestamp-registered_users.displace_timestamp)
+    registered_users['comp'] = registered_users['comp'].apply(lambda y: y.total_seconds()/60).fillna(61)
+    edits_sessions = registered_users[(registered_users['comp']>60) ]
+    num_edits_sessions = edits_sessions.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size()
+    returning_users = num_edits_sessions[num_edits_sessions >1].to_frame('returning_users').reset_index()
+    returning_new_users = returning_users.groupby(['contributor_id'])['timestamp'].min().reset_index()
+    returning_new_users = returning_new_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
+    if index is not None:
+        returning_new_users = returning_new_users.reindex(index, fill_value=0)
+    return returning_new_users
+
+
+def reference_surviving_new_editors(data, index):
+    data = data.reset_index(drop=True)
+    registered_users = stats.filter_anonymous(data)
+    thirty_days_after_registration = registered_users.groupby(['contributor_id']).agg({'timestamp':'first'}).apply(lambda x: x+datetime.timedelta(days=30)).reset_index()
+    thirty_days_after_registration=thirty_days_after_registration.rename(columns = {'timestamp':'thirty_days_after'})
+    registered_users = pd.merge(registered_users, thirty_days_after_registration, on ='contributor_id')
+    registered_users['survival period'] = registered_users['thirty_days_after'].apply(lambda x: x+datetime.timedelta(days=30))
+    survival_users = registered_users[(registered_users['timestamp'] >= registered_users['thirty_days_after']) & (registered_users['timestamp'] <= registered_users['survival period'])]
+    survival_users = survival_users.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size().to_frame('num_editions_in_survival_period').reset_index()
+    survival_new_users = survival_users.groupby(['contributor_id'])['timestamp'].max().reset_index()
+    survival_new_users = survival_new_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
+    if index is not None:
+        survival_new_users = survival_new_users.reindex(index, fill_value=0)
+    return survival_new_users
+
+
+METRICS = [
+    ('returning_new_editors', reference_returning_new_editors, stats.returning_new_editors),
+    ('surviving_new_editors', reference_surviving_new_editors, stats.surviving_new_editors)
+]
+
+
+def load_wiki(wiki):
+    """ Same as data_controller.read_data() of the dash apps """
+    bots = [bot['id'] for bot in wiki.get('bots', [])]
+    df = revision_store.load_dataframe(wiki['data'], bots)
+    df.index.name = wiki['data']
+    return df
+
+
+def decode(df):
+    """
+    The dataframe with its text columns as plain object columns, as read
+    from the csv, which is what the reference implementations expect
+    """
+    return df.astype({column: object for column in df.columns
+                        if df[column].dtype.name == 'category'})
+
+
+def best_time(func, df, index):
+    times = []
+    for _ in range(REPETITIONS):
+        data = df.copy()
+        time_start = time.perf_counter()
+        result = func(data, index)
+        times.append(time.perf_counter() - time_start)
+    return (result, min(times))
+
+
+def main():
+    failures = 0
+    for wiki in get_available_wikis():
+        if not os.path.exists(os.path.join(columnar_cache.data_dir, wiki['data'])):
+            continue
+
+        df = load_wiki(wiki)
+        index = stats.calculate_index_all_months(df)
+        print(f"{wiki['data']} ({len(df.index)} revisions):")
+
+        for (name, reference, current) in METRICS:
+            (expected, reference_time) = best_time(reference, decode(df), index)
+            (result, current_time) = best_time(current, df, index)
+            print(f'   {name}: {reference_time:.4f}s -> {current_time:.4f}s')
+
+            try:
+                pd.testing.assert_series_equal(result, expected)
+            except AssertionError as e:
+                print(f'   [FAIL] {name} returns a different series: {e}')
+                failures += 1
+
+            original = df.copy()
+            current(df, index)
+            try:
+                pd.testing.assert_frame_equal(df, original)
+                assert df.index.name == original.index.name
+            except AssertionError:
+                print(f'   [FAIL] {name} modifies its input dataframe')
+                failures += 1
+
+    if failures:
+        print(f'{failures} check(s) failed.')
+    else:
+        print('All checks passed.')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
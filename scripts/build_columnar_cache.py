@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+   build_columnar_cache.py
+
+   Descp: Convert every wiki csv of the data dir into its binary columnar
+      cache, so the first request to WikiChron doesn't have to parse them.
+      Wikis whose cache is already up to date are skipped.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import os
+import sys
+import time
+
+if 'WIKICHRON_DATA_DIR' not in os.environ:
+    os.environ['WIKICHRON_DATA_DIR'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../wikichron'))
+from utils.data_manager import get_available_wikis
+from utils import columnar_cache
+
+
+def main():
+    for wiki in get_available_wikis():
+        csv = wiki['data']
+        if not os.path.exists(os.path.join(columnar_cache.data_dir, csv)):
+            print(f'Skipping {csv}: file not found.')
+            continue
+        if columnar_cache.is_fresh(csv):
+            print(f'Skipping {csv}: cache is up to date.')
+            continue
+
+        print(f'Converting {csv}...')
+        time_start = time.perf_counter()
+        columnar_cache.convert_csv(csv)
+        print(' * [Timing] Converting {} : {} seconds'
+                .format(csv, time.perf_counter() - time_start))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
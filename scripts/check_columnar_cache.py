@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+   check_columnar_cache.py
+
+   Descp: Regression check for the columnar cache of the wiki csv files.
+
+      It writes a tiny csv in a temporary data dir, whose text columns
+      have no values in their first chunks, converts it with a chunk size
+      of a few rows and checks that the revision store reads back the same
+      values as pandas.
+
+      Exits with a non-zero status if any check fails.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import os
+import sys
+import tempfile
+
+tmp_dir = tempfile.TemporaryDirectory()
+os.environ['WIKICHRON_DATA_DIR'] = tmp_dir.name
+os.environ.pop('WIKICHRON_COLUMNAR_DIR', None)
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../wikichron'))
+from utils import revision_store, columnar_cache
+
+CSV = 'check.csv'
+CHUNKSIZE = 3
+
+ROWS = [
+    # page_id, page_title, timestamp, contributor_id, factoids, comment
+    (1, 'A', '2018-01-01T00:00:00Z', '10', '', ''),
+    (1, 'A', '2018-01-02T00:00:00Z', '11', '', ''),
+    (2, 'B', '2018-01-03T00:00:00Z', '10', '', ''),
+    (2, 'B', '2018-02-01T00:00:00Z', '12', '', ''),
+    (1, 'A', '2018-02-02T00:00:00Z', '11', 'x y', 'first comment'),
+    (3, 'C', '2018-02-03T00:00:00Z', '10', '', ''),
+    (3, 'C', '2018-03-01T00:00:00Z', '13', 'y', 'second comment'),
+]
+
+
+def write_csv(csv_path: str):
+    with open(csv_path, 'w') as csv_file:
+        csv_file.write('page_id,page_title,timestamp,contributor_id,factoids,comment\n')
+        for (page_id, title, timestamp, contributor, factoids, comment) in ROWS:
+            csv_file.write(f'{page_id},|{title}|,{timestamp},{contributor},'
+                            f'|{factoids}|,|{comment}|\n'
+                            .replace('||', ''))
+
+
+def main():
+    write_csv(os.path.join(columnar_cache.data_dir, CSV))
+    expected = pd.concat(columnar_cache.iter_csv_chunks(
+                    os.path.join(columnar_cache.data_dir, CSV)), ignore_index=True)
+
+    meta = columnar_cache.convert_csv(CSV, chunksize=CHUNKSIZE)
+    data = revision_store.load_dataframe(CSV)
+
+    failures = 0
+    encodings = {column['name']: column['encoding'] for column in meta['columns']}
+    for column in ('factoids', 'comment'):
+        if encodings[column] != 'dictionary':
+            print(f'FAIL: {column} is not dictionary-encoded')
+            failures += 1
+    for column in expected.columns:
+        actual = data[column].astype(object).where(data[column].notna(), np.nan)
+        if not actual.equals(expected[column].astype(object)):
+            print(f'FAIL: {column} differs from the csv')
+            failures += 1
+
+    if failures:
+        print(f'{failures} checks failed.')
+        return 1
+    print('All checks passed.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
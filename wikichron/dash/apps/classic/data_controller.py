@@ -12,9 +12,7 @@ WikiChron code.
 """
 
 # Built-in imports
-import pandas as pd
 import os
-import numpy as np
 import time
 from datetime import datetime
 from warnings import warn
@@ -26,9 +24,14 @@ global data_dir;
 global precooked_net_dir;
 data_dir = os.getenv('WIKICHRON_DATA_DIR', 'data')
 TIME_DIV = 60 * 60 * 24 * 30
+# prefix of the keys of the cached metric results of this app
+METRIC_CACHE_PREFIX = 'classic_metric'
 
 # Local imports:
 from .metrics.interface import compute_data
+from wikichron.utils import revision_store
+from wikichron.utils import memory_cache
+from wikichron.utils import cache_keys
 
 ### CACHED FUNCTIONS ###
 
@@ -36,38 +39,61 @@ def set_cache(cache):
 
     # we need to declare as *global* all the cached functions we want to be
     #  available to be used from outside of this file.
-    global read_data
     global load_and_compute_data
     global generate_longest_time_axis
     global calculate_index_all_months
 
-    @cache.memoize()
-    def read_data(wiki):
-        df = get_dataframe_from_csv(wiki['data'])
-        prepare_data(df)
-        df = clean_up_bot_activity(df, wiki)
-        return df
-
-
     # returns data[metric][wiki]
-    @cache.memoize(timeout=3600)
     def load_and_compute_data(wikis, metrics):
+        """
+           Every (wiki, metric) cell is cached separately, keyed by the
+           fingerprint of the wiki data and the metric code. This way, only
+           the cells missing from the cache are computed, no matter the order
+           of the wikis or metrics or the rest of the selection.
+        """
+        fingerprints = [cache_keys.get_data_fingerprint(wiki) for wiki in wikis]
+        keys = [[cache_keys.get_metric_cache_key(METRIC_CACHE_PREFIX, fingerprint, metric)
+                    for fingerprint in fingerprints]
+                    for metric in metrics]
+        cached = cache.get_many(*[key for keys_row in keys for key in keys_row])
+        data = [cached[i*len(wikis):(i+1)*len(wikis)] for i in range(len(metrics))]
+
+        # group wikis by their missing metrics, so that the common case (all
+        #  cells missing) is computed in a single call to compute_data()
+        missing_by_wiki = {}
+        for j in range(len(wikis)):
+            missing = tuple(i for i in range(len(metrics)) if data[i][j] is None)
+            if missing:
+                missing_by_wiki.setdefault(missing, []).append(j)
+
+        if not missing_by_wiki:
+            print(' * [Info] All metrics were cached')
+            return data
+
+        for (missing_metrics, missing_wikis) in missing_by_wiki.items():
+            # load data from csvs:
+            time_start_loading_csvs = time.perf_counter()
+            wikis_df = []
+            for j in missing_wikis:
+                df = read_data(wikis[j])
+                wikis_df.append(df)
+            time_end_loading_csvs = time.perf_counter() - time_start_loading_csvs
+            print(' * [Timing] Loading csvs : {} seconds'.format(time_end_loading_csvs) )
+
+            # compute metric data:
+            print(' * [Info] Starting calculations....')
+            time_start_calculations = time.perf_counter()
+            computed = compute_data(wikis_df, [metrics[i] for i in missing_metrics])
+            time_end_calculations = time.perf_counter() - time_start_calculations
+            print(' * [Timing] Calculations : {} seconds'.format(time_end_calculations) )
+
+            new_cells = {}
+            for (computed_row, i) in enumerate(missing_metrics):
+                for (computed_col, j) in enumerate(missing_wikis):
+                    data[i][j] = computed[computed_row][computed_col]
+                    new_cells[keys[i][j]] = data[i][j]
+            cache.set_many(new_cells, timeout=3600)
 
-        # load data from csvs:
-        time_start_loading_csvs = time.perf_counter()
-        wikis_df = []
-        for wiki in wikis:
-            df = read_data(wiki)
-            wikis_df.append(df)
-        time_end_loading_csvs = time.perf_counter() - time_start_loading_csvs
-        print(' * [Timing] Loading csvs : {} seconds'.format(time_end_loading_csvs) )
-
-        # compute metric data:
-        print(' * [Info] Starting calculations....')
-        time_start_calculations = time.perf_counter()
-        data = compute_data(wikis_df, metrics)
-        time_end_calculations = time.perf_counter() - time_start_calculations
-        print(' * [Timing] Calculations : {} seconds'.format(time_end_calculations) )
         return data
 
 
@@ -92,46 +118,40 @@ def set_cache(cache):
 
 ### OTHER DATA-RELATED FUNCTIONS ###
 
+def read_data(wiki):
+    """
+       Return the revisions of a wiki ready for further calculations.
+
+       Dataframes are kept in an in-process LRU cache bounded by size instead
+       of in the flask cache, which would pickle them into redis on every
+       call. Every caller gets the same read-only dataframe, so the month
+       cube of each wiki (see metrics/month_cube.py) is only built once.
+    """
+    key = cache_keys.get_dataframe_cache_key(wiki)
+    df = memory_cache.dataframes_cache.get(key)
+    if df is None:
+        df = get_dataframe_from_csv(wiki['data'], get_bots_ids(wiki))
+        memory_cache.dataframes_cache.set(key, df)
+    return df
+
+
 def get_available_wikis():
     wikis_json_file = open(os.path.join(data_dir, 'wikis.json'))
     wikis = json.load(wikis_json_file)
     return wikis
 
 
-def remove_bots_activity(df, bots_ids):
+def get_dataframe_from_csv(csv, bots_ids = ()):
     """
-       Filter out bots activity from pandas dataframe.
-
-       df -- data to be filtered. It'll be modified in place
-       bots_ids -- numpy array with the userid for every bot
-       Return a dataframe derived from the original but with all the
-          editions made by bot users removed
+       Return the pandas dataframe corresponding to a csv of the data dir,
+       sorted by timestamp and without the editions made by bots_ids.
+       The csv is only parsed the first time (or when it changes), then it's
+       read from the memory-mapped revision store shared by all workers.
     """
-    bots = np.array(bots_ids)
-    return df[~df['contributor_id'].isin(bots)]
-
-
-def prepare_data(df):
-    """
-       Prepare data in the correct input format for the metric
-       calculation functions.
-
-       df -- data to be prepared.
-       Modifies inplace the input data as well as returns that data
-       in the appropiate format for further calling of metric functions.
-    """
-    return df.sort_values(by='timestamp', inplace=True)
-
-
-def get_dataframe_from_csv(csv):
-    """ Read and parse a csv and return the corresponding pandas dataframe"""
 
     print('Loading csv for ' + csv)
     time_start_loading_one_csv = time.perf_counter()
-    df = pd.read_csv(os.path.join(data_dir, csv),
-                    delimiter=',', quotechar='|',
-                    index_col=False)
-    df['timestamp']=pd.to_datetime(df['timestamp'],format='%Y-%m-%dT%H:%M:%SZ')
+    df = revision_store.load_dataframe(csv, bots_ids)
     print('!!Loaded csv for ' + csv)
     time_end_loading_one_csv = time.perf_counter() - time_start_loading_one_csv
     print(' * [Timing] Loading {} : {} seconds'
@@ -140,13 +160,12 @@ def get_dataframe_from_csv(csv):
     return df
 
 
-def clean_up_bot_activity(df, wiki):
+def get_bots_ids(wiki):
     if 'bots' in wiki:
-        botsids = [bot['id'] for bot in wiki['bots']]
-        return remove_bots_activity(df, botsids)
+        return [bot['id'] for bot in wiki['bots']]
     else:
         warn("Warning: Missing information of bots ids. Note that graphs can be polluted of non-human activity.")
-    return df
+    return []
 
 
 def get_first_entry(wiki):
@@ -13,10 +13,19 @@
 import numpy as np
 import time
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from . import stats
 from . import metrics_generator
 
+# Max number of metrics computed at the same time by every process.
+# Set it to 1 to compute them sequentially in the request thread.
+COMPUTE_WORKERS = int(os.getenv('WIKICHRON_COMPUTE_WORKERS', min(4, os.cpu_count() or 1)))
+
+_executor = None
+_executor_lock = threading.Lock()
+
 print('Generating available metrics...')
 _available_metrics = metrics_generator.generate_metrics()
 _metrics_dict_by_code = metrics_generator.generate_dict_metrics(_available_metrics)
@@ -44,6 +53,46 @@ Return a dictionary where every key is a MetricCategory object and every value
     return _metrics_by_category
 
 
+def set_executor(executor):
+    """
+        Set the executor used by compute_data() to compute the metrics.
+
+        executor -- any concurrent.futures.Executor (e.g. a ProcessPoolExecutor
+        shared by the whole server) or None to compute the metrics
+        sequentially. Its number of workers is the concurrency limit.
+    """
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+def get_executor():
+    """
+        Return the executor for compute_data(). By default, a thread pool of
+        COMPUTE_WORKERS threads shared by all the requests of this process.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None and COMPUTE_WORKERS > 1:
+            _executor = ThreadPoolExecutor(max_workers=COMPUTE_WORKERS,
+                                        thread_name_prefix='compute_metrics')
+        return _executor
+
+
+def compute_metric_on_dataframe(metric, df, index):
+    """
+        Get a metric computed on a dataframe in relative dates.
+
+        metric -- metric object
+        df -- Dataframe to compute and calculate the metric on.
+        index -- index of all the months of df.
+        Return the panda series corresponding to the metric.
+    """
+    metric_series = metric.calculate(df, index)
+    metric_series.name = '{}<>{}'.format(df.index.name,metric.code)
+    return metric_series
+
+
 def compute_metrics_on_dataframe(metrics, df):
     """
         Get the requested metrics computed on a dataframe in relative dates.
@@ -55,26 +104,39 @@ def compute_metrics_on_dataframe(metrics, df):
     index = stats.calculate_index_all_months(df) #TOIMPROVE
     metrics_data = []
     for metric in metrics:
-        metric_series = metric.calculate(df, index)
-        metric_series.name = '{}<>{}'.format(df.index.name,metric.code)
-        metrics_data.append(metric_series)
+        metrics_data.append(compute_metric_on_dataframe(metric, df, index))
     return metrics_data
 
 
 def compute_data(dataframes, metrics):
-    """ Load analyzed data by every metric for every dataframe and return it in two dimensional array """
+    """
+        Load analyzed data by every metric for every dataframe and return it in
+        two dimensional array, where rows are metrics and columns are wikis.
 
-    metrics_by_wiki = []
-    for df in dataframes:
-        metrics_by_wiki.append(compute_metrics_on_dataframe(metrics, df))
+        Every (wiki, metric) pair is computed as a separate task in the
+        executor returned by get_executor(), if any.
+    """
+
+    executor = get_executor()
+    if executor is None or len(dataframes) * len(metrics) <= 1:
+        metrics_by_wiki = []
+        for df in dataframes:
+            metrics_by_wiki.append(compute_metrics_on_dataframe(metrics, df))
 
-    # transposing matrix row=>wikis, column=>metrics to row=>metrics, column=>wikis
-    wiki_by_metrics = []
-    for metric_idx in range(len(metrics)):
-        metric_row = [metrics_by_wiki[wiki_idx].pop(0) for wiki_idx in range(len(metrics_by_wiki))]
-        wiki_by_metrics.append(metric_row)
+        # transposing matrix row=>wikis, column=>metrics to row=>metrics, column=>wikis
+        return [ [metrics_by_wiki[wiki_idx][metric_idx] for wiki_idx in range(len(dataframes))]
+                    for metric_idx in range(len(metrics)) ]
+
+    # fan out every (wiki, metric) pair. The index is calculated beforehand
+    #  since it also builds the month cube shared by most of the metrics.
+    futures_by_wiki = []
+    for df in dataframes:
+        index = stats.calculate_index_all_months(df)
+        futures_by_wiki.append([executor.submit(compute_metric_on_dataframe, metric, df, index)
+                                    for metric in metrics])
 
-    return wiki_by_metrics
+    return [ [futures_by_wiki[wiki_idx][metric_idx].result() for wiki_idx in range(len(dataframes))]
+                for metric_idx in range(len(metrics)) ]
 
 
 # Too inefficient with the current implementation
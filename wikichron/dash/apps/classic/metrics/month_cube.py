@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   month_cube.py
+
+   Descp: Monthly aggregates of a wiki computed in a single pass over its
+   revisions, so that metrics don't have to group the whole dataframe by
+   month again and again.
+
+   Every revision gets a month bucket (an integer, 0 being the month of the
+   first revision) and then the following counts are computed:
+      - edits per (month, namespace, anonymous).
+      - new pages per (month, namespace) and new users per (month, anonymous).
+      - distinct pages edited per (month, namespace) and per month.
+      - edits per (month, contributor), with and without the anonymous flag.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import pandas as pd
+import numpy as np
+import weakref
+
+ANONYMOUS_NAME = 'Anonymous'
+
+# cubes computed so far, by id of the dataframe they were computed from.
+_cubes = {}
+
+
+def get_month_cube(data):
+    """
+        Return the MonthCube for data, computing it only the first time.
+        The cube is dropped as soon as its dataframe is garbage collected.
+    """
+    key = id(data)
+    entry = _cubes.get(key)
+    if entry is not None and entry[0]() is data:
+        return entry[1]
+
+    cube = MonthCube(data)
+    _cubes[key] = (weakref.ref(data), cube)
+    weakref.finalize(data, _cubes.pop, key, None)
+    return cube
+
+
+class MonthCube:
+
+    def __init__(self, data):
+        n_rows = len(data.index)
+
+        # month bucket of every revision
+        if n_rows:
+            months = data['timestamp'].values.astype('datetime64[M]')
+            first_month = months.min()
+            self.months = (months - first_month).astype(np.int64)
+            self.n_months = int(self.months.max()) + 1
+        else:
+            self.months = np.zeros(0, dtype=np.int64)
+            self.n_months = 0
+
+        if n_rows:
+            self.index = pd.date_range(start=first_month, periods=self.n_months,
+                                        freq='MS', name='timestamp')
+        else:
+            self.index = pd.DatetimeIndex([], freq='MS', name='timestamp')
+
+        # dense codes for namespaces, pages and contributors
+        self.namespaces, ns_codes = np.unique(data['page_ns'].values,
+                                                return_inverse=True)
+        self.n_namespaces = len(self.namespaces)
+        page_codes, pages = pd.factorize(data['page_id'])
+        contributor_codes, contributors = pd.factorize(data['contributor_id'])
+        self.contributor_codes = contributor_codes.astype(np.int64)
+        self.contributors = contributors
+        self.anonymous = (data['contributor_name'] == ANONYMOUS_NAME).values.astype(np.int64)
+        # (avoid dividing by zero below when data is empty)
+        n_pages = max(len(pages), 1)
+        n_contributors = max(len(contributors), 1)
+
+        # edits per (month, namespace, anonymous)
+        cell = (self.months * self.n_namespaces + ns_codes) * 2 + self.anonymous
+        self._edits = np.bincount(cell,
+                        minlength=self.n_months * self.n_namespaces * 2) \
+                        .reshape(self.n_months, self.n_namespaces, 2)
+
+        # new pages per (month, namespace), taking the first revision of every
+        #  page in data order, as drop_duplicates('page_id') does.
+        _, first_revisions = np.unique(page_codes, return_index=True)
+        self._new_pages = np.bincount(
+                        self.months[first_revisions] * self.n_namespaces + ns_codes[first_revisions],
+                        minlength=self.n_months * self.n_namespaces) \
+                        .reshape(self.n_months, self.n_namespaces)
+
+        # new users per (month, anonymous)
+        _, first_contributions = np.unique(self.contributor_codes, return_index=True)
+        self._new_users = np.bincount(
+                        self.months[first_contributions] * 2 + self.anonymous[first_contributions],
+                        minlength=self.n_months * 2) \
+                        .reshape(self.n_months, 2)
+
+        # distinct pages edited per (month, namespace) and per month
+        month_ns_page = np.unique((self.months * self.n_namespaces + ns_codes) * n_pages + page_codes)
+        self._edited_pages_by_ns = np.bincount(month_ns_page // n_pages,
+                        minlength=self.n_months * self.n_namespaces) \
+                        .reshape(self.n_months, self.n_namespaces)
+        month_page = np.unique(self.months * n_pages + page_codes)
+        self._edited_pages = np.bincount(month_page // n_pages,
+                                        minlength=self.n_months)
+
+        # edits per (month, contributor), as groupby() does, skipping contributions
+        #  with a missing contributor_id.
+        known = self.contributor_codes >= 0
+        month_user = self.months[known] * n_contributors + self.contributor_codes[known]
+        month_user, self._user_month_edits = np.unique(month_user, return_counts=True)
+        self._user_month = month_user // n_contributors
+        self._user_month_contributor = month_user % n_contributors
+
+        month_user_anon = (self.months[known] * n_contributors
+                            + self.contributor_codes[known]) * 2 + self.anonymous[known]
+        month_user_anon, self._user_month_anon_edits = np.unique(month_user_anon, return_counts=True)
+        self._user_month_anon = month_user_anon % 2
+        self._user_month_anon_month = month_user_anon // 2 // n_contributors
+
+
+    def _namespace_code(self, ns):
+        position = np.searchsorted(self.namespaces, ns)
+        if position < self.n_namespaces and self.namespaces[position] == ns:
+            return position
+        return None
+
+
+    def edits(self, ns = None, anonymous = None):
+        """ Edits per month, optionally of one namespace or kind of user """
+        edits = self._edits
+        if ns is not None:
+            code = self._namespace_code(ns)
+            if code is None:
+                return np.zeros(self.n_months, dtype=np.int64)
+            edits = edits[:, code, :]
+        else:
+            edits = edits.sum(axis=1)
+
+        if anonymous is None:
+            return edits.sum(axis=1)
+        return edits[:, int(anonymous)]
+
+
+    def new_pages(self, ns = None):
+        if ns is None:
+            return self._new_pages.sum(axis=1)
+        code = self._namespace_code(ns)
+        if code is None:
+            return np.zeros(self.n_months, dtype=np.int64)
+        return self._new_pages[:, code]
+
+
+    def new_users(self, anonymous = None):
+        if anonymous is None:
+            return self._new_users.sum(axis=1)
+        return self._new_users[:, int(anonymous)]
+
+
+    def edited_pages(self, ns = None):
+        if ns is None:
+            return self._edited_pages
+        code = self._namespace_code(ns)
+        if code is None:
+            return np.zeros(self.n_months, dtype=np.int64)
+        return self._edited_pages_by_ns[:, code]
+
+
+    def active_users(self, more_than = 0, anonymous = None):
+        """ Users per month with more than more_than edits that month """
+        if anonymous is None:
+            months = self._user_month[self._user_month_edits > more_than]
+        else:
+            selected = (self._user_month_anon == int(anonymous)) \
+                        & (self._user_month_anon_edits > more_than)
+            months = self._user_month_anon_month[selected]
+        return np.bincount(months, minlength=self.n_months)
+
+
+    def contributions_by_month(self):
+        """
+            Generator of the edits made by every contributor in every month.
+            For every month, yield a tuple with two arrays: the codes of the
+            contributors that edited that month and how many edits they made.
+        """
+        bounds = np.searchsorted(self._user_month, np.arange(self.n_months + 1))
+        for month in range(self.n_months):
+            selection = slice(bounds[month], bounds[month+1])
+            yield (self._user_month_contributor[selection],
+                    self._user_month_edits[selection])
+
+
+    def to_series(self, values, index = None):
+        """
+            Wrap monthly values in a pandas series.
+
+            If index is None, the series spans from the first to the last month
+            with a non-zero value, as when grouping the revisions by month.
+        """
+        series = pd.Series(values, index=self.index)
+        if index is not None:
+            return series.reindex(index, fill_value=0)
+
+        non_zero = np.flatnonzero(values)
+        if not len(non_zero):
+            return series.iloc[0:0]
+        return series.iloc[non_zero[0]:non_zero[-1] + 1]
+
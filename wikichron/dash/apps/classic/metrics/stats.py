@@ -13,8 +13,8 @@
 import pandas as pd
 import numpy as np
 import math
-import inequality_coefficients as ineq
-import datetime
+
+from .month_cube import get_month_cube
 
 # CONSTANTS
 MINIMAL_USERS_GINI = 20
@@ -27,22 +27,16 @@ MINIMAL_USERS_RATIO_10_90 = 10
 
 
 def calculate_index_all_months(data):
-    monthly_data = data.groupby(pd.Grouper(key='timestamp', freq='MS'))
-    index = monthly_data.size().index
-    return index
+    return get_month_cube(data).index
 
 # Pages
 
 
 def pages_new(data, index):
-    # We use the fact that data is sorted first by page_title and them by revision_id
-    # If we drop publicates we will get the first revision for each page_title, which
-    #  corresponds with the date it was created.
-    pages = data.drop_duplicates('page_id')
-    series = pages.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    # A page is created in the month of its first revision (data is sorted by
+    #  timestamp). See month_cube.py
+    cube = get_month_cube(data)
+    return cube.to_series(cube.new_pages(), index)
 
 
 def pages_accum(data, index):
@@ -50,12 +44,8 @@ def pages_accum(data, index):
 
 
 def pages_main_new(data, index):
-    pages = data.drop_duplicates('page_id')
-    main_pages = pages[pages['page_ns'] == 0]
-    series = main_pages.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    cube = get_month_cube(data)
+    return cube.to_series(cube.new_pages(ns=0), index)
 
 
 def pages_main_accum(data, index):
@@ -63,20 +53,13 @@ def pages_main_accum(data, index):
 
 
 def pages_edited(data, index):
-    monthly_data = data.groupby([pd.Grouper(key='timestamp', freq='MS')])
-    series = monthly_data.apply(lambda x: len(x.page_id.unique()))
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    cube = get_month_cube(data)
+    return cube.to_series(cube.edited_pages(), index)
 
 
 def main_edited(data, index):
-    main_pages = data[data['page_ns'] == 0]
-    monthly_data = main_pages.groupby([pd.Grouper(key='timestamp', freq='MS')])
-    series = monthly_data.apply(lambda x: len(x.page_id.unique()))
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    cube = get_month_cube(data)
+    return cube.to_series(cube.edited_pages(ns=0), index)
 
 ########################################################################
 
@@ -84,11 +67,8 @@ def main_edited(data, index):
 
 
 def edits(data, index):
-    monthly_data = data.groupby(pd.Grouper(key='timestamp', freq='MS'))
-    series = monthly_data.size()
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    cube = get_month_cube(data)
+    return cube.to_series(cube.edits(), index)
 
 
 def edits_accum(data, index):
@@ -96,8 +76,8 @@ def edits_accum(data, index):
 
 
 def edits_main_content(data, index):
-    edits_main_data = data[data['page_ns'] == 0]
-    return (edits(edits_main_data, index))
+    cube = get_month_cube(data)
+    return cube.to_series(cube.edits(ns=0), index)
 
 
 def edits_main_content_accum(data, index):
@@ -105,13 +85,13 @@ def edits_main_content_accum(data, index):
 
 
 def edits_article_talk(data, index):
-    edits_talk_data = data[data['page_ns'] == 1]
-    return (edits(edits_talk_data, index))
+    cube = get_month_cube(data)
+    return cube.to_series(cube.edits(ns=1), index)
 
 
 def edits_user_talk(data, index):
-    edits_talk_data = data[data['page_ns'] == 3]
-    return (edits(edits_talk_data, index))
+    cube = get_month_cube(data)
+    return cube.to_series(cube.edits(ns=3), index)
 
 ########################################################################
 
@@ -120,24 +100,17 @@ def edits_user_talk(data, index):
 ##### Helper functions #####
 
 
-def users_active_more_than_x_editions(data, index, x):
-    monthly_edits = data.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size()
-    monthly_edits_filtered = monthly_edits[monthly_edits > x].to_frame(name='pages_edited').reset_index()
-    series = monthly_edits_filtered.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+def users_active_more_than_x_editions(data, index, x, anonymous = None):
+    cube = get_month_cube(data)
+    return cube.to_series(cube.active_users(x, anonymous), index)
 
 
 ##### callable users metrics #####
 
 
 def users_new(data, index):
-    users = data.drop_duplicates('contributor_id')
-    series = users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    cube = get_month_cube(data)
+    return cube.to_series(cube.new_users(), index)
 
 
 def users_accum(data, index):
@@ -145,12 +118,8 @@ def users_accum(data, index):
 
 
 def users_new_anonymous(data, index):
-    users = data.drop_duplicates('contributor_id')
-    anonymous_users = users[users['contributor_name'] == 'Anonymous']
-    series = anonymous_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    cube = get_month_cube(data)
+    return cube.to_series(cube.new_users(anonymous=True), index)
 
 
 def users_anonymous_accum(data, index):
@@ -158,12 +127,8 @@ def users_anonymous_accum(data, index):
 
 
 def users_new_registered(data, index):
-    users = data.drop_duplicates('contributor_id')
-    non_anonymous_users = users[users['contributor_name'] != 'Anonymous']
-    series = non_anonymous_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    cube = get_month_cube(data)
+    return cube.to_series(cube.new_users(anonymous=False), index)
 
 
 def users_registered_accum(data, index):
@@ -176,15 +141,12 @@ def users_active(data, index):
 
 # this metric is the same as the users_active, but getting rid of anonymous users
 def users_registered_active(data, index):
-    # get rid of anonymous users and procceed as it was done in the previous metric.
-    user_registered = data[data['contributor_name'] != 'Anonymous']
-    return users_active(user_registered, index)
+    return users_active_more_than_x_editions(data, index, 0, anonymous=False)
 
 
 # this metric is the complementary to users_registered_active: now, we get rid of registered users and focus on anonymous users.
 def users_anonymous_active(data, index):
-    user_anonymous = data[data['contributor_name'] == 'Anonymous']
-    return users_active(user_anonymous, index)
+    return users_active_more_than_x_editions(data, index, 0, anonymous=True)
 
 
 # this metric gets, per month, those users who have contributed to the wiki in more than 4 editions.
@@ -210,11 +172,8 @@ def users_active_more_than_99_editions(data, index):
 
 
 def anonymous_edits(data, index):
-    series = data[data['contributor_name'] == 'Anonymous']
-    series = series.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    cube = get_month_cube(data)
+    return cube.to_series(cube.edits(anonymous=True), index)
 
 
 ##### callable ditribution metrics #####
@@ -270,59 +229,84 @@ def filter_anonymous(data):
     series = data[data['contributor_name'] != 'Anonymous']
     return series
 
+
+def registered_edits_since_first_edit(data):
+    """
+    Get the edits of registered users along with the time elapsed since the
+     first edit of their author.
+
+    Return a tuple of numpy arrays (months, contributors, timestamps, elapsed),
+     where months are the month buckets of the month cube, contributors are
+     contributor codes and timestamps and elapsed time are in nanoseconds.
+    """
+    cube = get_month_cube(data)
+    registered = (cube.anonymous == 0) & (cube.contributor_codes >= 0)
+    months = cube.months[registered]
+    contributors = cube.contributor_codes[registered]
+    timestamps = data['timestamp'].values.view(np.int64)[registered]
+
+    # first edit of every user in data order (i.e. the oldest one)
+    first_edit = np.zeros(len(cube.contributors), dtype=np.int64)
+    users, first_positions = np.unique(contributors, return_index=True)
+    first_edit[users] = timestamps[first_positions]
+
+    elapsed = timestamps - first_edit[contributors]
+    return (months, contributors, timestamps, elapsed)
+
 ##### callable users metrics #####
 
 def returning_new_editors(data, index):
-    data.reset_index(drop=True, inplace=True)
-    # remove anonymous users
-    registered_users = filter_anonymous(data)
-    # add up 7 days to the date on which each user registered
-    seven_days_after_registration = registered_users.groupby(['contributor_id']).agg({'timestamp':'first'}).apply(lambda x: x+datetime.timedelta(days=7)).reset_index()
-    # change the name to the timestamp column
-    seven_days_after_registration = seven_days_after_registration.rename(columns = {'timestamp':'seven_days_after'})
-    # merge two dataframes by contributor_id
-    registered_users = pd.merge(registered_users, seven_days_after_registration, on ='contributor_id')
-    # edits of each user within 7 days of being registered
-    registered_users = registered_users[registered_users['timestamp'] <= registered_users['seven_days_after']]
-    # to order by date
-    registered_users = registered_users.sort_values(['timestamp'])
-    # get the timestamp and contributor_id and group by contributor_id
-    timestamp_and_contributor_id = registered_users[['timestamp', 'contributor_id']].groupby(['contributor_id'])
-    # displace the timestamp a position
-    displace_timestamp = timestamp_and_contributor_id.apply(lambda x: x.shift())
-    registered_users['displace_timestamp'] = displace_timestamp['timestamp']
-    # compare the origin timestamp with the displace_timestamp
-    registered_users['comp'] = (registered_users.timestamp-registered_users.displace_timestamp)
-    # convert to seconds and replace the NAT for 61 because the NAT indicate the first edition
-    registered_users['comp'] = registered_users['comp'].apply(lambda y: y.total_seconds()/60).fillna(61)
-    # take the edit sessions
-    edits_sessions = registered_users[(registered_users['comp']>60) ]
-    num_edits_sessions = edits_sessions.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size()
-    # users with at least two editions
-    returning_users = num_edits_sessions[num_edits_sessions >1].to_frame('returning_users').reset_index()
-    # minimum month in which each user has made two editions
-    returning_new_users = returning_users.groupby(['contributor_id'])['timestamp'].min().reset_index()
-    returning_new_users = returning_new_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    if index is not None:
-        returning_new_users = returning_new_users.reindex(index, fill_value=0)
-    return returning_new_users
+    cube = get_month_cube(data)
+    (months, contributors, timestamps, elapsed) = registered_edits_since_first_edit(data)
+
+    # edits of each user within 7 days of their first edit
+    in_first_week = elapsed <= pd.Timedelta(days=7).value
+    months = months[in_first_week]
+    contributors = contributors[in_first_week]
+    timestamps = timestamps[in_first_week]
+
+    # sort by user and then by date, and take the edits which begin an edit
+    #  session, i.e. the first edit of each user or those made more than 60
+    #  minutes after the previous edit of the same user.
+    order = np.lexsort((timestamps, contributors))
+    months = months[order]
+    contributors = contributors[order]
+    timestamps = timestamps[order]
+    new_session = np.ones(len(order), dtype=bool)
+    new_session[1:] = (contributors[1:] != contributors[:-1]) \
+                    | (np.diff(timestamps) > pd.Timedelta(minutes=60).value)
+
+    # number of sessions per user and month
+    n_months = max(cube.n_months, 1)
+    user_month = contributors[new_session] * n_months + months[new_session]
+    user_month, n_sessions = np.unique(user_month, return_counts=True)
+
+    # users with at least two sessions in a month, taking the first of those
+    #  months (user_month is sorted, so the first one of each user is the min).
+    returning = user_month[n_sessions > 1]
+    _, first_of_user = np.unique(returning // n_months, return_index=True)
+    returning_months = returning[first_of_user] % n_months
+
+    returning_new_users = np.bincount(returning_months, minlength=cube.n_months)
+    return cube.to_series(returning_new_users, index)
 
 
 def surviving_new_editors(data, index):
-    data.reset_index(drop=True, inplace=True)
-    registered_users = filter_anonymous(data)
-    # add up 30 days to the date on which each user registered
-    thirty_days_after_registration = registered_users.groupby(['contributor_id']).agg({'timestamp':'first'}).apply(lambda x: x+datetime.timedelta(days=30)).reset_index()
-    thirty_days_after_registration=thirty_days_after_registration.rename(columns = {'timestamp':'thirty_days_after'})
-    registered_users = pd.merge(registered_users, thirty_days_after_registration, on ='contributor_id')
-    registered_users['survival period'] = registered_users['thirty_days_after'].apply(lambda x: x+datetime.timedelta(days=30))
-    survival_users = registered_users[(registered_users['timestamp'] >= registered_users['thirty_days_after']) & (registered_users['timestamp'] <= registered_users['survival period'])]
-    survival_users = survival_users.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size().to_frame('num_editions_in_survival_period').reset_index()
-    survival_new_users = survival_users.groupby(['contributor_id'])['timestamp'].max().reset_index()
-    survival_new_users = survival_new_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    if index is not None:
-        survival_new_users = survival_new_users.reindex(index, fill_value=0)
-    return survival_new_users
+    cube = get_month_cube(data)
+    (months, contributors, _, elapsed) = registered_edits_since_first_edit(data)
+
+    # edits made in the survival period: between 30 and 60 days after the
+    #  first edit of each user.
+    survival = (elapsed >= pd.Timedelta(days=30).value) \
+                & (elapsed <= pd.Timedelta(days=60).value)
+    months = months[survival]
+    contributors = contributors[survival]
+
+    # take the last month with edits in the survival period of each user
+    last_month = np.full(len(cube.contributors), -1, dtype=np.int64)
+    np.maximum.at(last_month, contributors, months)
+    survival_new_users = np.bincount(last_month[last_month >= 0], minlength=cube.n_months)
+    return cube.to_series(survival_new_users, index)
 
 
 ########################################################################
@@ -336,7 +320,85 @@ def contributions_per_author(data):
     """
     Takes data and outputs data grouped by its author
     """
-    return data.groupby('contributor_id').size()
+    return data.groupby('contributor_id', observed=True).size()
+
+
+def accum_contributions_histograms(data):
+    """
+    Generator of the distribution of contributions per author accumulated
+     until every month.
+
+    It keeps a running counter of edits per contributor, updated only with the
+     contributors active in each month, along with a histogram where
+     histogram[c] is the number of contributors with exactly c edits so far.
+     The same histogram array is yielded every month, updated in place.
+    """
+    cube = get_month_cube(data)
+    edits_per_user = np.zeros(len(cube.contributors), dtype=np.int64)
+    histogram = np.zeros(1, dtype=np.int64)
+    for (users, month_edits) in cube.contributions_by_month():
+        old_edits = edits_per_user[users]
+        new_edits = old_edits + month_edits
+        edits_per_user[users] = new_edits
+
+        if len(new_edits) and new_edits.max() >= len(histogram):
+            histogram = np.concatenate((histogram,
+                np.zeros(max(new_edits.max() + 1, 2 * len(histogram)) - len(histogram),
+                        dtype=np.int64)))
+        np.subtract.at(histogram, old_edits, 1)
+        np.add.at(histogram, new_edits, 1)
+        histogram[0] = 0 # users with no edits so far don't count
+
+        yield histogram
+
+
+def gini_corrected_from_histogram(histogram, n_users):
+    """
+    Same as ineq.gini_corrected() but taking the values as a histogram.
+
+    Values are sorted ascending, so the users with c edits take the ranks
+     from L+1 to L+m, where m = histogram[c] and L is the number of users with
+     less than c edits.
+    """
+    values = np.flatnonzero(histogram)
+    counts = histogram[values]
+    lower = np.cumsum(counts) - counts
+    sum_numerator = int(np.sum(values * (counts * (n_users + 1 - lower) - counts * (counts + 1) // 2)))
+    sum_denominator = int(np.sum(values * counts))
+    if sum_denominator == 0:
+        return np.NaN
+
+    g_coeff = n_users + 1 - 2*(sum_numerator/sum_denominator)
+    g_coeff *= (1.0 / (n_users - 1))
+    return g_coeff
+
+
+def nth_largest_from_histogram(histogram, n):
+    """ Value of the n-th (starting from 1) greatest value in histogram """
+    # users_with_at_least[c] = number of users with c or more edits
+    users_with_at_least = np.cumsum(histogram[::-1])[::-1]
+    return np.flatnonzero(users_with_at_least >= n)[-1]
+
+
+def ratio_top_rest_from_histogram(histogram, n_users, percentage):
+    """ Same as ineq.ratio_top_rest() but taking the values as a histogram """
+    percentage_top = percentage * 0.01
+    rest_users = math.floor(n_users * (1 - percentage_top))
+
+    values = np.flatnonzero(histogram)
+    counts = histogram[values]
+    users_so_far = np.cumsum(counts)
+    edits_so_far = np.cumsum(values * counts)
+
+    # sum of the rest_users smallest values
+    last = np.searchsorted(users_so_far, rest_users)
+    if last < len(values):
+        edits_rest = edits_so_far[last] - (users_so_far[last] - rest_users) * values[last]
+    else:
+        edits_rest = edits_so_far[-1]
+    edits_top = edits_so_far[-1] - edits_rest
+
+    return (edits_top / edits_rest)
 
 
 def calc_ratio_percentile_max(data, index, percentile, minimal_users):
@@ -345,77 +407,49 @@ def calc_ratio_percentile_max(data, index, percentile, minimal_users):
 
 def calc_ratio_percentile(data, index, top_percentile, percentile, minimal_users):
 
-    # Note that contributions is an *unsorted* list of contributions per author
-    def ratio_max_percentile_for_period(contributions, percentage):
+    def ratio_max_percentile_for_period(histogram, percentage):
 
         position = int(n_users * percentage)
 
-        # get top users until user who corresponds to percentil n
-        top_users = contributions.nlargest(position)
-
         # get top user and percentil n user
-        p_max = top_users[top_percentile-1]
-        percentile = top_users[-1]
+        p_max = nth_largest_from_histogram(histogram, top_percentile)
+        percentile = nth_largest_from_histogram(histogram, position)
 
         # calculate ratio between percentiles
         return p_max / percentile
 
     percentage = percentile * 0.01
+    cube = get_month_cube(data)
+    values = np.full(len(cube.index), np.NaN)
     i = 0
-    monthly_data = data.groupby(pd.Grouper(key='timestamp', freq='MS'))
-    result = pd.Series(index=monthly_data.size().index)
-    indices = result.index
-    accum_data = pd.DataFrame()
-    for name, group in monthly_data:
-        # Accumulate data so far
-        accum_data = accum_data.append(group)
-
-        # Get contributions per contributor
-        contributions = contributions_per_author(accum_data)
-
-        n_users = len(contributions)
+    for histogram in accum_contributions_histograms(data):
+        n_users = histogram.sum()
 
         # Skip when the wiki has too few users
-        if n_users < minimal_users:
-            result[indices[i]] = np.NaN
-        else:
-            result[indices[i]] = ratio_max_percentile_for_period(contributions, percentage)
+        if n_users >= minimal_users:
+            values[i] = ratio_max_percentile_for_period(histogram, percentage)
         i = i + 1
 
-    return result
+    return pd.Series(values, index=cube.index)
 
 ##### callable ditribution metrics #####
 
 
 def gini_accum(data, index):
 
-    #~ data = raw_data.set_index([raw_data['timestamp'].dt.to_period('M'), raw_data.index])
-    monthly_data = data.groupby(pd.Grouper(key='timestamp', freq='MS'))
-    if index is not None:
-        gini_accum_df = pd.Series(index=index)
-    else:
-        gini_accum_df = pd.Series(index=monthly_data.size().index)
-    indices = gini_accum_df.index
+    cube = get_month_cube(data)
+    if index is None:
+        index = cube.index
+    values = np.full(len(index), np.NaN)
     i = 0
-    accum_data = pd.DataFrame()
-    for name, group in monthly_data:
-        # Accumulate data so far
-        accum_data = accum_data.append(group)
-
-        # Get contributions per contributor, sort them
-        #   and make it a list to call to gini_coeff()
-        values = contributions_per_author(accum_data) \
-                .tolist()
-
-        n_users = len(values)
-
-        if (n_users) < MINIMAL_USERS_GINI:
-            gini_accum_df[indices[i]] = np.NaN
-        else:
-            gini_accum_df[indices[i]] = ineq.gini_corrected(values, n_users)
+    for histogram in accum_contributions_histograms(data):
+        n_users = histogram.sum()
+
+        if (n_users) >= MINIMAL_USERS_GINI:
+            values[i] = gini_corrected_from_histogram(histogram, n_users)
         i = i + 1
 
-    return gini_accum_df
+    return pd.Series(values, index=index)
 
 
 def ratio_percentiles_max_5(data, index):
@@ -444,25 +478,15 @@ def ratio_percentiles_10_20(data, index):
 
 
 def ratio_10_90(data, index):
+    cube = get_month_cube(data)
+    values = np.full(len(cube.index), np.NaN)
     i = 0
-    monthly_data = data.groupby(pd.Grouper(key='timestamp', freq='MS'))
-    result = pd.Series(index=monthly_data.size().index)
-    indices = result.index
-    accum_data = pd.DataFrame()
-    for name, group in monthly_data:
-        # Get contributions per contributor, sort them
-        #   and make it a Python list
-        accum_data = accum_data.append(group)
-        contributions = contributions_per_author(accum_data)
-
-        n_users = len(contributions)
+    for histogram in accum_contributions_histograms(data):
+        n_users = histogram.sum()
 
         # Skip when the wiki has too few users
-        if n_users < MINIMAL_USERS_RATIO_10_90:
-            result[indices[i]] = np.NaN
-        else:
-            result[indices[i]] = ineq.ratio_top10_rest(contributions)
+        if n_users >= MINIMAL_USERS_RATIO_10_90:
+            values[i] = ratio_top_rest_from_histogram(histogram, n_users, 10)
         i = i + 1
 
-    return result
-
+    return pd.Series(values, index=cube.index)
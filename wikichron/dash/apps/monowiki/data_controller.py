@@ -12,9 +12,7 @@ WikiChron code.
 """
 
 # Built-in imports
-import pandas as pd
 import os
-import numpy as np
 import time
 from datetime import datetime
 from warnings import warn
@@ -26,9 +24,14 @@ global data_dir;
 global precooked_net_dir;
 data_dir = os.getenv('WIKICHRON_DATA_DIR', 'data')
 TIME_DIV = 60 * 60 * 24 * 30
+# prefix of the keys of the cached metric results of this app
+METRIC_CACHE_PREFIX = 'monowiki_metric'
 
 # Local imports:
 from .metrics.interface import compute_data
+from wikichron.utils import revision_store
+from wikichron.utils import memory_cache
+from wikichron.utils import cache_keys
 
 ### CACHED FUNCTIONS ###
 
@@ -36,22 +39,27 @@ def set_cache(cache):
 
     # we need to declare as *global* all the cached functions we want to be
     #  available to be used from outside of this file.
-    global read_data
     global load_and_compute_data
     global generate_and_store_time_axis
     global calculate_index_all_months
 
-    @cache.memoize()
-    def read_data(wiki):
-        df = get_dataframe_from_csv(wiki['data'])
-        prepare_data(df)
-        df = clean_up_bot_activity(df, wiki)
-        return df
-
-
-    # returns data[metric][wiki]
-    @cache.memoize(timeout=3600)
+    # returns the list of metrics with their data computed on wikis[0]
     def load_and_compute_data(wikis, metrics):
+        """
+           Every (wiki, metric) pair is cached separately, keyed by the
+           fingerprint of the wiki data and the metric code, so only the
+           metrics missing from the cache are computed, no matter the rest
+           of the selection.
+        """
+        fingerprint = cache_keys.get_data_fingerprint(wikis[0])
+        keys = [cache_keys.get_metric_cache_key(METRIC_CACHE_PREFIX, fingerprint, metric)
+                    for metric in metrics]
+        metric_object_list = cache.get_many(*keys)
+        missing = [i for i in range(len(metrics)) if metric_object_list[i] is None]
+
+        if not missing:
+            print(' * [Info] All metrics were cached')
+            return metric_object_list
 
         # load data from csvs:
         time_start_loading_csvs = time.perf_counter()
@@ -62,9 +70,13 @@ def set_cache(cache):
         # compute metric data:
         print(' * [Info] Starting calculations....')
         time_start_calculations = time.perf_counter()
-        metric_object_list = compute_data(wikis_df, metrics)
+        computed = compute_data(wikis_df, [metrics[i] for i in missing])
         time_end_calculations = time.perf_counter() - time_start_calculations
         print(' * [Timing] Calculations : {} seconds'.format(time_end_calculations) )
+
+        for (metric, i) in zip(computed, missing):
+            metric_object_list[i] = metric
+        cache.set_many({keys[i]: metric_object_list[i] for i in missing}, timeout=3600)
         return metric_object_list
 
 
@@ -84,46 +96,40 @@ def set_cache(cache):
 
 ### OTHER DATA-RELATED FUNCTIONS ###
 
+def read_data(wiki):
+    """
+       Return the revisions of a wiki ready for further calculations.
+
+       Dataframes are kept in an in-process LRU cache bounded by size instead
+       of in the flask cache, which would pickle them into redis on every
+       call. Every caller gets the same read-only dataframe, so that its
+       edits matrix and factoid changes are computed only once.
+    """
+    key = cache_keys.get_dataframe_cache_key(wiki)
+    df = memory_cache.dataframes_cache.get(key)
+    if df is None:
+        df = get_dataframe_from_csv(wiki['data'], get_bots_ids(wiki))
+        memory_cache.dataframes_cache.set(key, df)
+    return df
+
+
 def get_available_wikis():
     wikis_json_file = open(os.path.join(data_dir, 'wikis.json'))
     wikis = json.load(wikis_json_file)
     return wikis
 
 
-def remove_bots_activity(df, bots_ids):
+def get_dataframe_from_csv(csv, bots_ids = ()):
     """
-       Filter out bots activity from pandas dataframe.
-
-       df -- data to be filtered. It'll be modified in place
-       bots_ids -- numpy array with the userid for every bot
-       Return a dataframe derived from the original but with all the
-          editions made by bot users removed
+       Return the pandas dataframe corresponding to a csv of the data dir,
+       sorted by timestamp and without the editions made by bots_ids.
+       The csv is only parsed the first time (or when it changes), then it's
+       read from the memory-mapped revision store shared by all workers.
     """
-    bots = np.array(bots_ids)
-    return df[~df['contributor_id'].isin(bots)]
-
-
-def prepare_data(df):
-    """
-       Prepare data in the correct input format for the metric
-       calculation functions.
-
-       df -- data to be prepared.
-       Modifies inplace the input data as well as returns that data
-       in the appropiate format for further calling of metric functions.
-    """
-    return df.sort_values(by='timestamp', inplace=True)
-
-
-def get_dataframe_from_csv(csv):
-    """ Read and parse a csv and return the corresponding pandas dataframe"""
 
     print('Loading csv for ' + csv)
     time_start_loading_one_csv = time.perf_counter()
-    df = pd.read_csv(os.path.join(data_dir, csv),
-                    delimiter=',', quotechar='|',
-                    index_col=False)
-    df['timestamp']=pd.to_datetime(df['timestamp'],format='%Y-%m-%dT%H:%M:%SZ')
+    df = revision_store.load_dataframe(csv, bots_ids)
     print('!!Loaded csv for ' + csv)
     time_end_loading_one_csv = time.perf_counter() - time_start_loading_one_csv
     print(' * [Timing] Loading {} : {} seconds'
@@ -132,13 +138,12 @@ def get_dataframe_from_csv(csv):
     return df
 
 
-def clean_up_bot_activity(df, wiki):
+def get_bots_ids(wiki):
     if 'bots' in wiki:
-        botsids = [bot['id'] for bot in wiki['bots']]
-        return remove_bots_activity(df, botsids)
+        return [bot['id'] for bot in wiki['bots']]
     else:
         warn("Warning: Missing information of bots ids. Note that graphs can be polluted of non-human activity.")
-    return df
+    return []
 
 
 def get_first_entry(wiki):
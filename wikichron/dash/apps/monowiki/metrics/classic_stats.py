@@ -16,6 +16,8 @@ import math
 import inequality_coefficients as ineq
 import datetime
 
+from .factoids import get_factoid_changes
+
 # CONSTANTS
 MINIMAL_USERS_GINI = 20
 MINIMAL_USERS_PERCENTIL_MAX_5 = 100
@@ -131,7 +133,7 @@ def dormantWiki(data, index):
 
 
 def users_active_more_than_x_editions(data, index, x):
-    monthly_edits = data.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size()
+    monthly_edits = data.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id'], observed=True).size()
     monthly_edits_filtered = monthly_edits[monthly_edits > x].to_frame(name='pages_edited').reset_index()
     series = monthly_edits_filtered.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
     if index is not None:
@@ -300,11 +302,10 @@ def filter_anonymous(data):
 ##### callable users metrics #####
 
 def returning_new_editors(data, index):
-    data.reset_index(drop=True, inplace=True)
     # remove anonymous users
     registered_users = filter_anonymous(data)
     # add up 7 days to the date on which each user registered
-    seven_days_after_registration = registered_users.groupby(['contributor_id']).agg({'timestamp':'first'}).apply(lambda x: x+datetime.timedelta(days=7)).reset_index()
+    seven_days_after_registration = registered_users.groupby(['contributor_id'], observed=True).agg({'timestamp':'first'}).apply(lambda x: x+datetime.timedelta(days=7)).reset_index()
     # change the name to the timestamp column
     seven_days_after_registration = seven_days_after_registration.rename(columns = {'timestamp':'seven_days_after'})
     # merge two dataframes by contributor_id
@@ -314,7 +315,7 @@ def returning_new_editors(data, index):
     # to order by date
     registered_users = registered_users.sort_values(['timestamp'])
     # get the timestamp and contributor_id and group by contributor_id
-    timestamp_and_contributor_id = registered_users[['timestamp', 'contributor_id']].groupby(['contributor_id'])
+    timestamp_and_contributor_id = registered_users[['timestamp', 'contributor_id']].groupby(['contributor_id'], observed=True)
     # displace the timestamp a position
     displace_timestamp = timestamp_and_contributor_id.apply(lambda x: x.shift())
     registered_users['displace_timestamp'] = displace_timestamp['timestamp']
@@ -324,11 +325,11 @@ def returning_new_editors(data, index):
     registered_users['comp'] = registered_users['comp'].apply(lambda y: y.total_seconds()/60).fillna(61)
     # take the edit sessions
     edits_sessions = registered_users[(registered_users['comp']>60) ]
-    num_edits_sessions = edits_sessions.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size()
+    num_edits_sessions = edits_sessions.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id'], observed=True).size()
     # users with at least two editions
     returning_users = num_edits_sessions[num_edits_sessions >1].to_frame('returning_users').reset_index()
     # minimum month in which each user has made two editions
-    returning_new_users = returning_users.groupby(['contributor_id'])['timestamp'].min().reset_index()
+    returning_new_users = returning_users.groupby(['contributor_id'], observed=True)['timestamp'].min().reset_index()
     returning_new_users = returning_new_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
     if index is not None:
         returning_new_users = returning_new_users.reindex(index, fill_value=0)
@@ -336,16 +337,15 @@ def returning_new_editors(data, index):
 
 
 def surviving_new_editors(data, index):
-    data.reset_index(drop=True, inplace=True)
     registered_users = filter_anonymous(data)
     # add up 30 days to the date on which each user registered
-    thirty_days_after_registration = registered_users.groupby(['contributor_id']).agg({'timestamp':'first'}).apply(lambda x: x+datetime.timedelta(days=30)).reset_index()
+    thirty_days_after_registration = registered_users.groupby(['contributor_id'], observed=True).agg({'timestamp':'first'}).apply(lambda x: x+datetime.timedelta(days=30)).reset_index()
     thirty_days_after_registration=thirty_days_after_registration.rename(columns = {'timestamp':'thirty_days_after'})
     registered_users = pd.merge(registered_users, thirty_days_after_registration, on ='contributor_id')
     registered_users['survival period'] = registered_users['thirty_days_after'].apply(lambda x: x+datetime.timedelta(days=30))
     survival_users = registered_users[(registered_users['timestamp'] >= registered_users['thirty_days_after']) & (registered_users['timestamp'] <= registered_users['survival period'])]
-    survival_users = survival_users.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size().to_frame('num_editions_in_survival_period').reset_index()
-    survival_new_users = survival_users.groupby(['contributor_id'])['timestamp'].max().reset_index()
+    survival_users = survival_users.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id'], observed=True).size().to_frame('num_editions_in_survival_period').reset_index()
+    survival_new_users = survival_users.groupby(['contributor_id'], observed=True)['timestamp'].max().reset_index()
     survival_new_users = survival_new_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
     if index is not None:
         survival_new_users = survival_new_users.reindex(index, fill_value=0)
@@ -356,32 +356,17 @@ def surviving_new_editors(data, index):
 
 # Factoid Metrics
     
-def monthly_deleted_factoids(data, index):
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    #order data from latter to sooner revision of a same page:
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, False])
-    #do the same operation as in the added factoids metric: on each row, we will have the erased factoids of the previous one
-    data['deleted_factoids'] = data.groupby('page_id').factoids.diff()
-    data['deleted_factoids'] = data.deleted_factoids.shift(-1).where(data.page_id.eq(data.page_id.shift(-1)))
-    data['deleted_factoids'] = data['deleted_factoids'].apply(lambda x: x if isinstance(x, set) else {})
-
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, True])
-    data['number_deleted_factoids'] = data['deleted_factoids'].apply(len)
+def monthly_factoids(data, index, counts):
+    series = pd.Series(counts, index=data['timestamp'].values).groupby(pd.Grouper(freq='MS')).sum()
+    if index is not None:
+        series = series.reindex(index, fill_value=0)
+    return series
 
-    return (data.groupby(pd.Grouper(key='timestamp', freq='MS'))['number_deleted_factoids'].sum())
+def monthly_deleted_factoids(data, index):
+    return monthly_factoids(data, index, get_factoid_changes(data).deleted)
 
 def monthly_added_factoids(data, index):
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    data['added_factoids'] = data.groupby('page_id').factoids.diff().fillna(data.factoids)
-    data['number_added_factoids'] = data['added_factoids'].apply(len)
-
-    return (data.groupby(pd.Grouper(key='timestamp', freq='MS'))['number_added_factoids'].sum())
+    return monthly_factoids(data, index, get_factoid_changes(data).added)
 	
 def monthly_added_factoids_acum(data, index):
     return (monthly_added_factoids(data, index).cumsum())
@@ -400,7 +385,7 @@ def contributions_per_author(data):
     """
     Takes data and outputs data grouped by its author
     """
-    return data.groupby('contributor_id').size()
+    return data.groupby('contributor_id', observed=True).size()
 
 
 def calc_ratio_percentile_max(data, index, percentile, minimal_users):
@@ -418,8 +403,8 @@ def calc_ratio_percentile(data, index, top_percentile, percentile, minimal_users
         top_users = contributions.nlargest(position)
 
         # get top user and percentil n user
-        p_max = top_users[top_percentile-1]
-        percentile = top_users[-1]
+        p_max = top_users.iloc[top_percentile-1]
+        percentile = top_users.iloc[-1]
 
         # calculate ratio between percentiles
         return p_max / percentile
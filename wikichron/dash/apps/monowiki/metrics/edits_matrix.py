@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   edits_matrix.py
+
+   Descp: Sparse matrix with the number of edits of every registered
+   contributor in every month, computed once per wiki so that the metrics
+   which classify the active editors of every month (by experience, tenure,
+   date of the last edit...) don't have to group the whole dataframe by
+   contributor and month again and again.
+
+   The matrix is kept in CSR format: one row per contributor with only the
+   months in which the contributor edited, sorted. Along with the edits of
+   every (contributor, month) pair, it keeps the cumulative number of edits
+   of the contributor until that month, so the memory used is proportional
+   to the number of active pairs and not to contributors x months.
+
+   Months are integers: the number of months since the epoch (1970-01),
+   kept as int16. Every pair also knows the length of the current edit
+   streak of its contributor, i.e. the number of consecutive months the
+   contributor has been editing until then.
+   A matrix can also be restricted to the edits in one namespace.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import pandas as pd
+import numpy as np
+import weakref
+
+ANONYMOUS_NAME = 'Anonymous'
+
+# matrices computed so far, by id of the dataframe they were computed from.
+_matrices = {}
+
+
+def get_edits_matrix(data, page_ns = None):
+    """
+        Return the EditsMatrix for data (only for the edits in the namespace
+        page_ns, if given), computing it only the first time.
+        The matrix is dropped as soon as its dataframe is garbage collected.
+    """
+    key = (id(data), page_ns)
+    entry = _matrices.get(key)
+    if entry is not None and entry[0]() is data:
+        return entry[1]
+
+    matrix = EditsMatrix(data, page_ns)
+    _matrices[key] = (weakref.ref(data), matrix)
+    weakref.finalize(data, _matrices.pop, key, None)
+    return matrix
+
+
+def get_month_numbers(timestamps) -> np.ndarray:
+    """ Return the number of months since the epoch of some datetime64 values """
+    return np.asarray(timestamps, dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+
+
+class EditsMatrix:
+
+    def __init__(self, data, page_ns = None):
+        # registered contributions with a known contributor, as groupby() does
+        registered = (data['contributor_name'] != ANONYMOUS_NAME).values
+        if page_ns is not None:
+            registered &= (data['page_ns'] == page_ns).values
+        contributor_codes, self.contributors = pd.factorize(data['contributor_id'].values[registered])
+        months = get_month_numbers(data['timestamp'].values[registered])
+        known = contributor_codes >= 0
+        contributor_codes = contributor_codes[known].astype(np.int64)
+        months = months[known]
+        n_contributors = len(self.contributors)
+
+        if len(months):
+            first_month = months.min()
+            n_months = int(months.max() - first_month) + 1
+        else:
+            first_month = 0
+            n_months = 0
+        self.index = pd.date_range(start=np.datetime64(int(first_month), 'M'),
+                                    periods=n_months, freq='MS', name='timestamp')
+
+        # (contributor, month) pairs sorted by contributor and month
+        cells = contributor_codes * max(n_months, 1) + (months - first_month)
+        cells, revision_cells, edits = np.unique(cells, return_inverse=True, return_counts=True)
+        self.rows = cells // max(n_months, 1)
+        self.months = (cells % max(n_months, 1) + first_month).astype(np.int16)
+        self.edits = edits.astype(np.int64)
+        # pair of every row of data (-1 if not counted)
+        self.revision_pairs = np.full(len(data.index), -1, dtype=np.int64)
+        self.revision_pairs[np.flatnonzero(registered)[known]] = revision_cells
+        row_sizes = np.bincount(self.rows, minlength=n_contributors)
+        self.indptr = np.concatenate([[0], np.cumsum(row_sizes)]).astype(np.int64)
+        row_starts = self.indptr[:-1]
+
+        self.is_first = np.zeros(len(self.rows), dtype=bool)
+        self.is_first[row_starts] = True
+
+        # cumulative variant: edits of the contributor until every month
+        total = np.cumsum(self.edits)
+        self.cumulative = total - np.repeat(total[row_starts] - self.edits[row_starts], row_sizes)
+        self.previous_edits = self.cumulative - self.edits
+
+        # months since the first edit and since the previous active month
+        self.tenure = self.months - np.repeat(self.months[row_starts], row_sizes)
+        self.gaps = np.zeros(len(self.rows), dtype=np.int16)
+        self.gaps[1:] = self.months[1:] - self.months[:-1]
+        self.gaps[self.is_first] = 0
+
+        # current streak: months in a row until every month (1 if the
+        #  contributor didn't edit the previous month)
+        pairs = np.arange(len(self.rows))
+        streak_starts = np.maximum.accumulate(np.where(self.gaps != 1, pairs, 0)) if len(pairs) else pairs
+        self.streak = (pairs - streak_starts + 1).astype(np.int16)
+
+
+    def get_positions(self, index):
+        """
+            Return the month numbers of index (the months of the matrix if
+            index is None) and the position in index of every pair
+        """
+        if index is None:
+            index = self.index
+        index_months = get_month_numbers(index.values)
+        if len(index_months):
+            positions = self.months.astype(np.int64) - index_months[0]
+        else:
+            positions = np.zeros(0, dtype=np.int64)
+        return (index, index_months, positions)
+
+
+    def sum_by_month(self, index, mask = None, values = None):
+        """
+            Return a pd Series with the sum of values (the number of edits
+            by default) of the pairs in mask per month of index.
+        """
+        if values is None:
+            values = self.edits
+        return self._aggregate_by_month(index, mask, values)
+
+
+    def count_by_month(self, index, mask = None):
+        """
+            Return a pd Series with the number of active contributors (pairs
+            in mask) per month of index.
+        """
+        return self._aggregate_by_month(index, mask, None)
+
+
+    def sum_by_pair(self, values) -> np.ndarray:
+        """
+            Return the sum of values (one per row of data) by pair, that is,
+            by contributor and month.
+        """
+        counted = self.revision_pairs >= 0
+        return np.bincount(self.revision_pairs[counted], weights=values[counted],
+                            minlength=len(self.rows))
+
+
+    def _aggregate_by_month(self, index, mask, values):
+        (index, index_months, positions) = self.get_positions(index)
+        selected = (positions >= 0) & (positions < len(index_months))
+        if mask is not None:
+            selected &= mask
+        if values is not None:
+            values = values[selected]
+        result = np.bincount(positions[selected], weights=values,
+                            minlength=len(index_months))
+        return pd.Series(result, index=index)
+
+
+    def iter_monthly_edits(self, index):
+        """
+            Yield, for every month of index, the number of edits of every
+            contributor active in that month.
+        """
+        for (month, pairs) in self._iter_pairs_by_month(index):
+            yield self.edits[pairs[self.months[pairs] == month]]
+
+
+    def iter_accum_edits(self, index):
+        """
+            Yield, for every month of index, the number of edits made until
+            that month by every contributor who had edited by then.
+        """
+        accum = np.zeros(len(self.contributors), dtype=np.int64)
+        for (_, pairs) in self._iter_pairs_by_month(index):
+            accum[self.rows[pairs]] = self.cumulative[pairs]
+            yield accum[accum > 0]
+
+
+    def _iter_pairs_by_month(self, index):
+        """
+            Yield, for every month of index, the month number and the pairs
+            until that month which were not yielded before, in month order.
+        """
+        (index, index_months, _) = self.get_positions(index)
+        order = np.argsort(self.months, kind='stable')
+        ends = np.searchsorted(self.months[order], index_months, side='right')
+        start = 0
+        for (month, end) in zip(index_months, ends):
+            yield (month, order[start:end])
+            start = end
@@ -12,10 +12,9 @@
 
 import pandas as pd
 import numpy as np
-import math
-import datetime as d
-from dateutil.relativedelta import relativedelta
-import time
+
+from .edits_matrix import get_edits_matrix, get_month_numbers
+from .factoids import get_factoid_changes
 
 
 ###### General helper functions ######
@@ -32,22 +31,6 @@ def set_category_name(list_of_series, list_of_names):
     for i in range(len(list_of_series)):
         list_of_series[i].name = list_of_names[i]
 
-def get_accum_number_of_edits_until_each_month(data, index):
-    '''
-    Returns a pd DataFrame with the suitable shape for calculating the metrics:
-    one row contains the contributor_id, timestamp and nEdits -- cumulative number of edits done until the given timestamp
-    '''
-    df = data.groupby(['contributor_id']).apply(lambda x: x.groupby(pd.Grouper(key='timestamp', freq='MS')).size().to_frame('nEdits').reindex(index, fill_value=0).cumsum()).reset_index()
-    return df
-
-def get_monthly_number_of_edits(data, index):
-    '''
-    Adds a new column to the pd DataFrame given in data:
-    one row contains the contributor_id, timestamp and monthly_nEdits -- monthly number of edits by the user
-    '''
-    cond = (data['contributor_id'] == data['contributor_id'].shift())
-    data['monthly_nEdits'] = np.where(cond, data['nEdits'] - data['nEdits'].shift(), data['nEdits'])
-
 def filter_df(data, condition, index):
     '''
     Filter the df in data, according to the given condition.
@@ -82,6 +65,20 @@ def calcultate_relative_proportion(list_of_category_series, list_of_column_names
     
     return df
 
+def calculate_percentage_of_total(list_of_series, total):
+    '''
+    Return a list with the percentage that each pd Series given in list_of_series represents regarding the pd Series in total.
+    The names of the series are kept.
+    '''
+    list_of_pctgs = []
+
+    for series in list_of_series:
+        pctg = (series / total) * 100
+        pctg.name = series.name
+        list_of_pctgs.append(pctg)
+
+    return list_of_pctgs
+
 def generate_list_of_dataframes(list_of_series, list_of_names):
     '''
     Return a list of pd DataFrames from the given list_of_series, using as column names the given list_of_names.
@@ -101,41 +98,95 @@ def merge_dataframes(data, df1):
     '''
     return (df1.reset_index()[["contributor_id", "timestamp"]].merge(data.reset_index(), on=["contributor_id", "timestamp"], how="inner"))
 
-def calculate_added_factoids_by_editor_category(frame):
+def calculate_factoids_by_editor_month(data, type):
     '''
-    Calculate the monthly number of added factoids by an editor category.
+    Get the number of factoids added or deleted in articles by every registered user each month.
+    Return the EditsMatrix of the article edits and a numpy array with the number of factoids of every pair of the matrix.
     Parameter:
-    -frame: filtered wiki csv that only contains rows for the edits done by a particular editor category.
+    -type: 'added' or 'deleted'.
     '''
-    frame['factoids'] = frame['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    frame['added_factoids'] = frame.groupby('page_id').factoids.diff().fillna(frame.factoids)
-    frame['number_added_factoids'] = frame['added_factoids'].apply(len)
-    frame = frame.groupby(pd.Grouper(key='timestamp', freq='MS'))['number_added_factoids'].sum()
+    matrix = get_edits_matrix(data, page_ns=0)
+    changes = get_factoid_changes(data)
+    if type == 'added':
+        factoids = matrix.sum_by_pair(changes.added)
+    elif type == 'deleted':
+        factoids = matrix.sum_by_pair(changes.deleted)
+    return (matrix, factoids)
+
+def factoids_by_active_editors_by_experience(data, index, type):
+    '''
+    Get the monthly number of factoids added or deleted by each user category in the Active editors by experience metric.
+    '''
+    (matrix, factoids) = calculate_factoids_by_editor_month(data, type)
+    previous_edits = matrix.previous_edits
+
+    new_users_factoids = matrix.sum_by_month(index, matrix.is_first, factoids)
+    one_four_factoids = matrix.sum_by_month(index, (previous_edits >= 1) & (previous_edits <= 4), factoids)
+    between_5_24_factoids = matrix.sum_by_month(index, (previous_edits >= 5) & (previous_edits <= 24), factoids)
+    between_25_99_factoids = matrix.sum_by_month(index, (previous_edits >= 25) & (previous_edits <= 99), factoids)
+    highEq_100_factoids = matrix.sum_by_month(index, previous_edits >= 100, factoids)
 
-    return frame
+    new_users_factoids.name = 'By new users'
+    one_four_factoids.name = 'By users that have done btw. 1 and 4 edits'
+    between_5_24_factoids.name = 'By users that have done btw. 5 and 24 edits'
+    between_25_99_factoids.name = 'By users that have done btw. 25 and 99 edits'
+    highEq_100_factoids.name = 'By users that have done more than 99 edits'
 
-def calculate_deleted_factoids_by_editor_category(frame):
+    return [new_users_factoids, one_four_factoids, between_5_24_factoids, between_25_99_factoids, highEq_100_factoids, 1]
+
+def factoids_by_edit_streak(data, index, type):
     '''
-    Calculate the monthly number of deleted factoids by an editor category.
-    Parameter:
-    -frame: filtered wiki csv that only contains rows for the edits done by a particular editor category.
+    Get the monthly number of factoids added or deleted by each user category in the Users by edit streak metric.
+    '''
+    (matrix, factoids) = calculate_factoids_by_editor_month(data, type)
+    return calculate_current_streak_by_month(matrix, index, 'factoids', factoids) + [1]
+
+def factoids_by_tenure(data, index, type):
+    '''
+    Get the monthly number of factoids added or deleted by each user category in the Users by tenure metric.
+    '''
+    (matrix, factoids) = calculate_factoids_by_editor_month(data, type)
+    tenure = matrix.tenure
+
+    new_users_factoids = matrix.sum_by_month(index, tenure == 0, factoids)
+    one_three_factoids = matrix.sum_by_month(index, (tenure >= 1) & (tenure <= 3), factoids)
+    four_six_factoids = matrix.sum_by_month(index, (tenure >= 4) & (tenure <= 6), factoids)
+    six_twelve_factoids = matrix.sum_by_month(index, (tenure >= 7) & (tenure <= 12), factoids)
+    more_twelve_factoids = matrix.sum_by_month(index, tenure >= 13, factoids)
+
+    new_users_factoids.name = 'By new users'
+    one_three_factoids.name = 'By users first edit between 1 and 3 months ago'
+    four_six_factoids.name = 'By users first edit between 4 and 6 months ago'
+    six_twelve_factoids.name = 'By users first edit between 6 and 12 months ago'
+    more_twelve_factoids.name = 'By users first edit more than 12 months ago'
+
+    return [new_users_factoids, one_three_factoids, four_six_factoids, six_twelve_factoids, more_twelve_factoids, 1]
+
+def factoids_by_date_of_last_edit(data, index, type):
     '''
-    frame['factoids'] = frame['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    frame['factoids_history'] = pd.concat([pd.Series([set()]), frame['factoids'][:-1]]).reset_index(drop=True)
-    frame['deleted_factoids'] = frame['factoids_history'] - frame['factoids']
-    idx = frame.groupby('contributor_id').head(1).index
-    frame.loc[idx, 'deleted_factoids'] = frame.loc[idx, 'deleted_factoids'].apply(lambda x: set())
-    frame.drop('factoids_history', axis=1, inplace=True)
-    frame['number_deleted_factoids'] = frame['deleted_factoids'].apply(len)
+    Get the monthly number of factoids added or deleted by each user category in the Users by the date of the last edit metric.
+    '''
+    (matrix, factoids) = calculate_factoids_by_editor_month(data, type)
+    gaps = matrix.gaps
 
-    frame = frame.groupby(pd.Grouper(key='timestamp', freq='MS'))['number_deleted_factoids'].sum()
+    new_users_factoids = matrix.sum_by_month(index, matrix.is_first, factoids)
+    one_month_factoids = matrix.sum_by_month(index, gaps == 1, factoids)
+    two_three_months_factoids = matrix.sum_by_month(index, (gaps == 2) | (gaps == 3), factoids)
+    four_six_months_factoids = matrix.sum_by_month(index, (gaps >= 4) & (gaps <= 6), factoids)
+    more_six_months_factoids = matrix.sum_by_month(index, gaps > 6, factoids)
 
-    return frame
+    new_users_factoids.name = 'By new users'
+    one_month_factoids.name = 'By users last edit 1 month ago'
+    two_three_months_factoids.name = 'By users last edit between 2 and 3 months ago'
+    four_six_months_factoids.name = 'By users last edit between 4 and 6 months ago'
+    more_six_months_factoids.name = 'By users last edit more than 6 months ago'
+
+    return [new_users_factoids, more_six_months_factoids, four_six_months_factoids, two_three_months_factoids, one_month_factoids, 1]
 
 #### Helper users active ####
 
 def users_active_more_than_x_editions(data, index, x):
-    monthly_edits = data.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_name']).size()
+    monthly_edits = data.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_name'], observed=True).size()
     monthly_edits_filtered = monthly_edits[monthly_edits > x].to_frame(name='pages_edited').reset_index()
     series = monthly_edits_filtered.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
     if index is not None:
@@ -144,41 +195,25 @@ def users_active_more_than_x_editions(data, index, x):
 
 #### Helper metric 2 ####
 
-def add_x_months(data, months):
-    return data['timestamp'].apply(lambda x: x + relativedelta(months = +months))
-
-'''def displace_x_months_per_user(data, months):
-    return data.shift(months)'''
-
-def current_streak_x_or_y_months_in_a_row(mothly, index, z, y, type):
-    mothly['add_months'] = add_x_months(mothly, z)
-    lista = ['contributor_id']
-    lista.append('add_months')
-    if y > 0:
-      mothly['add_y_months'] = add_x_months(mothly, y)
-      lista.append('add_y_months')
-    group_users = mothly[lista].groupby(['contributor_id'])
-    displace_z_month = group_users['add_months'].shift(z)
-    mothly['displace'] = displace_z_month
-    if y > 0:
-      displace_y_month = group_users['add_y_months'].shift(y)
-      mothly['displace_y_month']= displace_y_month
-      current_streak = mothly[(mothly['displace'] == mothly['timestamp']) & (mothly['displace_y_month'] != mothly['timestamp'])]
-    elif z == 1:
-      current_streak = mothly[mothly['displace'] != mothly['timestamp']]
-    elif z == 6:
-      current_streak = mothly[mothly['displace'] == mothly['timestamp']]
-	 
+def calculate_current_streak_by_month(matrix, index, type, factoids = None):
+    '''
+    Get the monthly number of users, edits or factoids (depending on type) of the users editing 1 month,
+    btw. 2 and 3, btw. 4 and 6 and more than 6 consecutive months in a row, using the streak of every pair of matrix.
+    Parameters:
+    -type: 'users', 'edits' or 'factoids'.
+    -factoids: number of factoids of every pair of matrix, only for the 'factoids' type.
+    '''
+    streak = matrix.streak
+    masks = [streak == 1, (streak >= 2) & (streak <= 3), (streak >= 4) & (streak <= 6), streak > 6]
     if type == 'users':
-      series = current_streak.groupby(pd.Grouper(key = 'timestamp', freq = 'MS')).size()
+        list_of_series = [matrix.count_by_month(index, mask) for mask in masks]
     elif type == 'edits':
-      series = current_streak.groupby(pd.Grouper(key = 'timestamp', freq = 'MS'))['size'].sum()
+        list_of_series = [matrix.sum_by_month(index, mask) for mask in masks]
     elif type == 'factoids':
-      series = current_streak.groupby(['timestamp'])['number_of_factoids'].sum()
+        list_of_series = [matrix.sum_by_month(index, mask, factoids) for mask in masks]
 
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    set_category_name(list_of_series, ['1 month editing', 'Btw. 2 and 3 consecutive months', 'Btw. 4 and 6 consecutive months', 'More than 6 consecutive months'])
+    return list_of_series
 
 def edition_concrete(data, index, pagType):
     filterData = data[data['page_ns'] == pagType]
@@ -195,49 +230,6 @@ def rest_edition(data, index, listP):
         series = series.reindex(index, fill_value=0)
     return series
 
-#### Helpers Users by Tenure ####
-
-def add_position_column_users_first_edit(data):
-    '''
-    Add a new column to data:
-    position: indicates the number of months since the the user's first contribution in the wiki
-    '''
-    cond = data['nEdits'] == 0
-    data['position'] = np.where(cond, 0, data.groupby([cond, 'contributor_id']).cumcount() + 1)
-
-def generate_condition_users_first_edit(data, x, y):
-    '''
-    Create a condition that the users must fulfill in order to be included in one of the categories of the users by tenure metric.
-    '''
-    if y > 0:
-        condition = ((data['position'] >= x) & (data['position'] <= y)) & (data['nEdits'] != data['nEdits'].shift())
-    else:
-        condition = (data['position'] > x) & (data['nEdits'] != data['nEdits'].shift())
-    
-    return condition
-
-#### Helpers Users by the date of the last edit ####
-
-def add_position_column_users_last_edit(data):
-    '''
-    Add a new column to data:
-    position: indicates the number of months since the user's last contribution in the wikis
-    '''
-    cond = data['nEdits'] == 0
-    data['position'] = np.where(cond, 0, data.groupby([cond, 'contributor_id', 'nEdits']).cumcount() + 1)
-    
-def generate_condition_users_last_edit(data, x):
-    '''
-    Create a condition that the users must fulfill in order to be included in one of the categories of the users by date of the last edit metric.
-    '''
-    if x != 6:
-        condition = ((data['position'] == 1) & (data['position'].shift() == x)) & (data['contributor_id'] == data['contributor_id'].shift())
-    
-    else:
-        condition = ((data['position'] == 1) & (data['position'].shift() > x)) & (data['contributor_id'] == data['contributor_id'].shift())
-
-    return condition
-
 #### Helper Active editors by Experience ####
 
 def generate_condition_users_by_number_of_edits(data, x, y):
@@ -267,17 +259,39 @@ def filter_users_pageNS(data, index, page_ns):
     return series
 
 
-#### Helper metrics Edits by editor experience ####
+#### Helper % Of edits by % of users ####
 
-def sum_monthly_edits_by_users(data, index):
+def calculate_contributor_pctg_per_contributions_pctg(monthly_edits_by_user, index):
     '''
-    Return a pd Series with the sum of the monthly number of edits, stored in the monthly_nEdits column in the pd DataFrame given in data
+    Calculate which % of contributors has contributed in a 50%, 80%, 90% and 99% of the edits each month.
+    Parameters:
+    -monthly_edits_by_user: iterable with a numpy array per month of index, with the number of edits of every contributor.
+    Months with less than 10 contributors are left to 0.
     '''
-    data = data.groupby(pd.Grouper(key='timestamp', freq='MS'))['monthly_nEdits'].sum()
+    edits_pctgs = [50, 80, 90, 99]
+    categories = np.zeros((len(edits_pctgs), len(index)))
 
-    if index is not None:
-        series = series.reindex(index, fill_value=0)
-    return series
+    for (month, edits) in enumerate(monthly_edits_by_user):
+        if len(edits) < 10:
+            continue
+        # number of top contributors needed to reach every percentage of the
+        #  edits (in integers, so that exact percentages are not missed by rounding)
+        edits_accum = np.cumsum(np.sort(edits)[::-1]) * 100
+        n_contributors = np.searchsorted(edits_accum, np.multiply(edits_pctgs, edits.sum())) + 1
+        reached = n_contributors <= len(edits)
+        categories[reached, month] = (n_contributors[reached] / len(edits)) * 100
+
+    category_50 = pd.Series(categories[0], index=index)
+    category_80 = pd.Series(categories[1], index=index)
+    category_90 = pd.Series(categories[2], index=index)
+    category_99 = pd.Series(categories[3], index=index)
+
+    category_50.name = "50% of edits"
+    category_80.name = "80% of edits"
+    category_90.name = "90% of edits"
+    category_99.name = "99% of edits"
+
+    return [category_50, category_80, category_90, category_99]
 
 ###### Callable Functions ######
 
@@ -291,11 +305,10 @@ def users_new(data, index):
     return series
 
 def users_reincident(data, index):
-    data['test_duplicated'] = data['contributor_id'].duplicated()
-    data = data[data['contributor_name'] != 'Anonymous']
-    users_reincident = data[data['test_duplicated'] == True]
-    users_reincident = users_reincident.groupby(['contributor_id', pd.Grouper(key='timestamp', freq='MS')]).size().to_frame('edits_count').reset_index()
-    users_reincident['accum_edit_count'] = users_reincident.groupby('contributor_id')['edits_count'].transform(lambda x: x.cumsum())
+    duplicated = data['contributor_id'].duplicated()
+    users_reincident = data[duplicated & (data['contributor_name'] != 'Anonymous')]
+    users_reincident = users_reincident.groupby(['contributor_id', pd.Grouper(key='timestamp', freq='MS')], observed=True).size().to_frame('edits_count').reset_index()
+    users_reincident['accum_edit_count'] = users_reincident.groupby('contributor_id', observed=True)['edits_count'].transform(lambda x: x.cumsum())
     users_reincident = users_reincident[users_reincident['accum_edit_count'] > 1]
     users_reincident = users_reincident.drop_duplicates('contributor_id')
 
@@ -308,40 +321,20 @@ def users_reincident(data, index):
 ############################ METRIC 2 #################################################################################################
 
 def current_streak(data, index):
-    data = filter_anonymous(data)
-    #data = data[data['page_ns'] == 0]
-    mothly = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('size').reset_index()
-
-    this_month = current_streak_x_or_y_months_in_a_row(mothly, index, 1, 0, 'users')
-    two_three_months = current_streak_x_or_y_months_in_a_row(mothly, index, 1, 3, 'users')
-    four_six_months = current_streak_x_or_y_months_in_a_row(mothly, index, 3, 6, 'users')
-    more_six = current_streak_x_or_y_months_in_a_row(mothly, index, 6, 0, 'users')
-	
-    set_category_name([this_month, two_three_months, four_six_months, more_six], ['1 month editing', 'Btw. 2 and 3 consecutive months', 'Btw. 4 and 6 consecutive months', 'More than 6 consecutive months'])
-    
-    return [this_month, two_three_months, four_six_months, more_six, 1]
+    matrix = get_edits_matrix(data)
+    return calculate_current_streak_by_month(matrix, index, 'users') + [1]
 
 def current_streak_only_mains(data, index):
-    data = data[data['page_ns']==0]
-    return current_streak(data, index)
+    matrix = get_edits_matrix(data, page_ns=0)
+    return calculate_current_streak_by_month(matrix, index, 'users') + [1]
 
 def edits_by_current_streak(data, index):
-    data = filter_anonymous(data)
-
-    mothly = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('size').reset_index()
-	
-    this_month = current_streak_x_or_y_months_in_a_row(mothly, index, 1, 0, 'edits')
-    two_three_months = current_streak_x_or_y_months_in_a_row(mothly, index, 1, 3, 'edits')
-    four_six_months = current_streak_x_or_y_months_in_a_row(mothly, index, 3, 6, 'edits')
-    more_six = current_streak_x_or_y_months_in_a_row(mothly, index, 6, 0, 'edits')
-	
-    set_category_name([this_month, two_three_months, four_six_months, more_six], ['1 month editing', 'Btw. 2 and 3 consecutive months', 'Btw. 4 and 6 consecutive months', 'More than 6 consecutive months'])
-    
-    return [this_month, two_three_months, four_six_months, more_six, 1]
+    matrix = get_edits_matrix(data)
+    return calculate_current_streak_by_month(matrix, index, 'edits') + [1]
 
 def edits_by_current_streak_only_mains(data, index):
-    data = data[data['page_ns']==0]
-    return edits_by_current_streak(data, index)
+    matrix = get_edits_matrix(data, page_ns=0)
+    return calculate_current_streak_by_month(matrix, index, 'edits') + [1]
 
 def edition_on_type_pages(data, index):
     data=filter_anonymous(data)
@@ -376,18 +369,14 @@ def edition_on_type_pages_extends_rest(data, index):
 def users_first_edit(data, index):
     '''Calculate the monthly number of users whose first edit was between 1 and 3, 4 and 6, 6 and 12, and more than 12 months ago
     '''
-    data = filter_anonymous(data)
-    #data = data[data['page_ns'] == 0]
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    
-    mins = format_data.groupby('contributor_id')['timestamp'].transform('min')
-    format_data['months'] = format_data['timestamp'].sub(mins).div(pd.Timedelta(1, 'M')).round().astype(int)
-    
-    this_month = users_new(data, index)
-    one_three = pd.Series(format_data[(format_data['months'] >= 1) & (format_data['months'] <= 3)].groupby(['timestamp']).size(), index).fillna(0)
-    four_six = pd.Series(format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)].groupby(['timestamp']).size(), index).fillna(0)
-    six_twelve = pd.Series(format_data[(format_data['months'] >= 7) & (format_data['months'] <= 12)].groupby(['timestamp']).size(), index).fillna(0)
-    more_twelve = pd.Series(format_data[format_data['months'] >= 13].groupby(['timestamp']).size(), index).fillna(0)
+    matrix = get_edits_matrix(data)
+    tenure = matrix.tenure
+
+    this_month = matrix.count_by_month(index, matrix.is_first)
+    one_three = matrix.count_by_month(index, (tenure >= 1) & (tenure <= 3))
+    four_six = matrix.count_by_month(index, (tenure >= 4) & (tenure <= 6))
+    six_twelve = matrix.count_by_month(index, (tenure >= 7) & (tenure <= 12))
+    more_twelve = matrix.count_by_month(index, tenure >= 13)
 
     this_month.name = 'New users'
     one_three.name = 'Btw. 1 and 3 months ago'
@@ -400,27 +389,10 @@ def users_first_edit(data, index):
 def users_first_edit_abs(data, index):
     '''Calculate the monthly percentage of users whose first edit was between 1 and 3, 4 and 6, 6 and 12, and more than 12 months ago
     '''
-    data = filter_anonymous(data)
-    monthly_total_users = data.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size().reset_index()
-    monthly_total_users = monthly_total_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    
-    mins = format_data.groupby('contributor_id')['timestamp'].transform('min')
-    format_data['months'] = format_data['timestamp'].sub(mins).div(pd.Timedelta(1, 'M')).round().astype(int)
-    
-    this_month = (users_new(data, index) / monthly_total_users) * 100
-    one_three = ((pd.Series(format_data[(format_data['months'] >= 1) & (format_data['months'] <= 3)].groupby(['timestamp']).size(), index).fillna(0)) / monthly_total_users) * 100
-    four_six = ((pd.Series(format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)].groupby(['timestamp']).size(), index).fillna(0)) / monthly_total_users) * 100
-    six_twelve = ((pd.Series(format_data[(format_data['months'] >= 7) & (format_data['months'] <= 12)].groupby(['timestamp']).size(), index).fillna(0)) / monthly_total_users) * 100
-    more_twelve = ((pd.Series(format_data[format_data['months'] >= 13].groupby(['timestamp']).size(), index).fillna(0)) / monthly_total_users) * 100
+    categories = users_first_edit(data, index)
+    monthly_total_users = get_edits_matrix(data).count_by_month(index)
 
-    this_month.name = 'New users'
-    one_three.name = 'Btw. 1 and 3 months ago'
-    four_six.name = 'Btw. 4 and 6 months ago'
-    six_twelve.name = 'Btw. 6 and 12 months ago'
-    more_twelve.name = 'More than 12 months ago'
-    
-    return [this_month, one_three, four_six, six_twelve, more_twelve, 1]
+    return calculate_percentage_of_total(categories[:-1], monthly_total_users) + [1]
 
 ############################ Users by the date of the last edit ###########################################################################
 
@@ -428,16 +400,14 @@ def users_last_edit(data, index):
     '''
     Get the monthly number of users whose last edit was less than 1, between 2 and 3, 4 and 6, and more than 6 months ago
     '''
-    data = filter_anonymous(data)
-    #data = data[data['page_ns'] == 0]
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['months'] = format_data.groupby('contributor_id')['timestamp'].diff().div(pd.Timedelta(days=30.44), fill_value=0).round().astype(int)
+    matrix = get_edits_matrix(data)
+    gaps = matrix.gaps
 
-    new_users = users_new(data, index)
-    one_month = pd.Series((format_data[format_data['months'] == 1]).groupby(['timestamp']).size(), index).fillna(0)
-    two_three_months = pd.Series((format_data[(format_data['months'] == 2) | (format_data['months'] == 3)]).groupby(['timestamp']).size(), index).fillna(0)
-    four_six_months = pd.Series((format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)]).groupby(['timestamp']).size(), index).fillna(0)
-    more_six_months = pd.Series((format_data[format_data['months'] > 6]).groupby(['timestamp']).size(), index).fillna(0)
+    new_users = matrix.count_by_month(index, matrix.is_first)
+    one_month = matrix.count_by_month(index, gaps == 1)
+    two_three_months = matrix.count_by_month(index, (gaps == 2) | (gaps == 3))
+    four_six_months = matrix.count_by_month(index, (gaps >= 4) & (gaps <= 6))
+    more_six_months = matrix.count_by_month(index, gaps > 6)
 
     new_users.name = 'New users'
     one_month.name = '1 month ago'
@@ -451,25 +421,10 @@ def users_last_edit_abs(data, index):
     '''
     Get the monthly percentage of users whose last edit was less than 1, between 2 and 3, 4 and 6, and more than 6 months ago
     '''
-    data = filter_anonymous(data)
-    monthly_total_users = data.groupby([pd.Grouper(key='timestamp', freq='MS'), 'contributor_id']).size().reset_index()
-    monthly_total_users = monthly_total_users.groupby(pd.Grouper(key='timestamp', freq='MS')).size()
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['months'] = format_data.groupby('contributor_id')['timestamp'].diff().div(pd.Timedelta(days=30.44), fill_value=0).round().astype(int)
+    categories = users_last_edit(data, index)
+    monthly_total_users = get_edits_matrix(data).count_by_month(index)
 
-    new_users = (users_new(data, index) / monthly_total_users) * 100
-    one_month = ((pd.Series((format_data[format_data['months'] == 1]).groupby(['timestamp']).size(), index).fillna(0)) / monthly_total_users)*100
-    two_three_months = ((pd.Series((format_data[(format_data['months'] == 2) | (format_data['months'] == 3)]).groupby(['timestamp']).size(), index).fillna(0)) / monthly_total_users)*100
-    four_six_months = ((pd.Series((format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)]).groupby(['timestamp']).size(), index).fillna(0)) / monthly_total_users)*100
-    more_six_months = ((pd.Series((format_data[format_data['months'] > 6]).groupby(['timestamp']).size(), index).fillna(0)) / monthly_total_users)*100
-
-    new_users.name = 'New users'
-    one_month.name = '1 month ago'
-    two_three_months.name = 'Btw. 2 and 3 months ago'
-    four_six_months.name = 'Btw. 4 and 6 months ago'
-    more_six_months.name = 'More than six months ago'
-
-    return [new_users, more_six_months, four_six_months, two_three_months, one_month, 1]
+    return calculate_percentage_of_total(categories[:-1], monthly_total_users) + [1]
 
 ############################ Active editors by experience #####################################################################
 
@@ -477,17 +432,14 @@ def users_number_of_edits(data, index):
     '''
     Get the monthly number of users that belong to each category, in the Active editors by experience metric.
     '''
-    data = filter_anonymous(data)
-    #data = data[data['page_ns'] == 0]
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['nEdits'] = (format_data[['medits', 'contributor_id']].groupby(['contributor_id']))['medits'].cumsum()
-    format_data['nEdits_until_previous_month'] = (format_data[['nEdits','contributor_id']].groupby(['contributor_id']))['nEdits'].shift().fillna(-1)
+    matrix = get_edits_matrix(data)
+    previous_edits = matrix.previous_edits
 
-    new_users = users_new(data, index)
-    one_four = pd.Series(format_data[generate_condition_users_by_number_of_edits(format_data, 1,4)].groupby(['timestamp']).size(), index).fillna(0)
-    between_5_24 = pd.Series(format_data[generate_condition_users_by_number_of_edits(format_data,5,24)].groupby(['timestamp']).size(), index).fillna(0)
-    between_25_99 = pd.Series(format_data[generate_condition_users_by_number_of_edits(format_data,25,99)].groupby(['timestamp']).size(), index).fillna(0)
-    highEq_100 = pd.Series(format_data[generate_condition_users_by_number_of_edits(format_data,100,0)].groupby(['timestamp']).size(), index).fillna(0)
+    new_users = matrix.count_by_month(index, matrix.is_first)
+    one_four = matrix.count_by_month(index, (previous_edits >= 1) & (previous_edits <= 4))
+    between_5_24 = matrix.count_by_month(index, (previous_edits >= 5) & (previous_edits <= 24))
+    between_25_99 = matrix.count_by_month(index, (previous_edits >= 25) & (previous_edits <= 99))
+    highEq_100 = matrix.count_by_month(index, previous_edits >= 100)
 
     new_users.name = 'New users'
     one_four.name = 'Btw. 1 and 4 edits'
@@ -618,22 +570,14 @@ def number_of_edits_by_experience(data, index):
     '''
     Get the monthly number of edits by each user category in the Active editors by experience metric
     '''
-    data = filter_anonymous(data)
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['nEdits'] = (format_data[['medits', 'contributor_id']].groupby(['contributor_id']))['medits'].cumsum()
-    format_data['nEdits_until_previous_month'] = (format_data[['nEdits','contributor_id']].groupby(['contributor_id']))['nEdits'].shift().fillna(-1)
-    
-    new_users = format_data[generate_condition_users_by_number_of_edits(format_data, 0,0)]
-    one_four = format_data[generate_condition_users_by_number_of_edits(format_data, 1,4)]
-    between_5_24 = format_data[generate_condition_users_by_number_of_edits(format_data, 5,24)]
-    between_25_99 = format_data[generate_condition_users_by_number_of_edits(format_data, 25,99)]
-    highEq_100 = format_data[generate_condition_users_by_number_of_edits(format_data, 100,0)]
-
-    new_users = new_users.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    one_four = one_four.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    between_5_24 = between_5_24.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    between_25_99 = between_25_99.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    highEq_100 = highEq_100.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
+    matrix = get_edits_matrix(data)
+    previous_edits = matrix.previous_edits
+
+    new_users = matrix.sum_by_month(index, matrix.is_first)
+    one_four = matrix.sum_by_month(index, (previous_edits >= 1) & (previous_edits <= 4))
+    between_5_24 = matrix.sum_by_month(index, (previous_edits >= 5) & (previous_edits <= 24))
+    between_25_99 = matrix.sum_by_month(index, (previous_edits >= 25) & (previous_edits <= 99))
+    highEq_100 = matrix.sum_by_month(index, previous_edits >= 100)
 
     new_users.name = "New users"
     one_four.name = "Btw. 1 and 4 edits"
@@ -648,26 +592,13 @@ def number_of_edits_by_experience_abs(data, index):
     Get the monthly proportion of edits done by each user category in the Active editors by experience metrics
     '''
     categories = number_of_edits_by_experience(data, index)
+    monthly_total_edits = get_edits_matrix(data).sum_by_month(index)
 
-    data = filter_anonymous(data)
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['nEdits'] = (format_data[['medits', 'contributor_id']].groupby(['contributor_id']))['medits'].cumsum()
-    format_data['nEdits_until_previous_month'] = (format_data[['nEdits','contributor_id']].groupby(['contributor_id']))['nEdits'].shift().fillna(-1)
-    monthly_total_edits = format_data.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-
-    edits_new_users = ((categories[0] / monthly_total_edits)*100).fillna(0)
-    edits_beginners = ((categories[1] / monthly_total_edits)*100).fillna(0)
-    edits_advanced = ((categories[2] / monthly_total_edits)*100).fillna(0)
-    edits_experimented = ((categories[3] / monthly_total_edits)*100).fillna(0)
-    edits_H_experimented = ((categories[4] / monthly_total_edits)*100).fillna(0)
-
-    edits_new_users.name = "New users"
-    edits_beginners.name = "Btw. 1 and 4 edits"
-    edits_advanced.name = "Btw. 5 and 24 edits"
-    edits_experimented.name = "Btw. 24 and 99 edits"
-    edits_H_experimented.name = "More than 99 edits"
+    categories = calculate_percentage_of_total(categories[:-1], monthly_total_edits)
+    for category in categories:
+        category.fillna(0, inplace=True)
 
-    return [edits_new_users, edits_beginners, edits_advanced, edits_experimented, edits_H_experimented, 1]
+    return categories + [1]
 
 ############################ Edits by editor's tenure #########################################
 
@@ -675,23 +606,14 @@ def number_of_edits_by_tenure(data, index):
     '''
     Get the monthly number of edits by each user category in the Users by tenure metric
     '''
-    data = filter_anonymous(data)
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    
-    mins = format_data.groupby('contributor_id')['timestamp'].transform('min')
-    format_data['months'] = format_data['timestamp'].sub(mins).div(pd.Timedelta(1, 'M')).round().astype(int)
-    
-    new_users = format_data[format_data['months'] == 0]
-    one_three = format_data[(format_data['months'] >= 1) & (format_data['months'] <= 3)]
-    four_six = format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)]
-    six_twelve = format_data[(format_data['months'] >= 7) & (format_data['months'] <= 12)]
-    more_twelve = format_data[format_data['months'] >= 13]
-
-    new_users = new_users.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    one_three = one_three.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    four_six = four_six.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    six_twelve = six_twelve.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    more_twelve = more_twelve.groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
+    matrix = get_edits_matrix(data)
+    tenure = matrix.tenure
+
+    new_users = matrix.sum_by_month(index, tenure == 0)
+    one_three = matrix.sum_by_month(index, (tenure >= 1) & (tenure <= 3))
+    four_six = matrix.sum_by_month(index, (tenure >= 4) & (tenure <= 6))
+    six_twelve = matrix.sum_by_month(index, (tenure >= 7) & (tenure <= 12))
+    more_twelve = matrix.sum_by_month(index, tenure >= 13)
 
     new_users.name = 'New users'
     one_three.name = 'Btw. 1 and 3 months ago'
@@ -706,24 +628,9 @@ def number_of_edits_by_tenure_abs(data, index):
     Get the monthly proportion of edits done by each user category in the Users by tenure metric
     '''
     categories = number_of_edits_by_tenure(data, index)
+    monthly_total_edits = get_edits_matrix(data).sum_by_month(index)
 
-    data = filter_anonymous(data)
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    monthly_total_edits = format_data.groupby(['timestamp'])['medits'].sum()
-
-    new_users = (categories[0]/monthly_total_edits)*100
-    one_three = (categories[1]/monthly_total_edits)*100
-    four_six = (categories[2]/monthly_total_edits)*100
-    six_twelve = (categories[3]/monthly_total_edits)*100
-    more_twelve = (categories[4]/monthly_total_edits)*100
-
-    new_users.name = 'New users'
-    one_three.name = 'Btw. 1 and 3 months ago'
-    four_six.name = 'Btw. 4 and 6 months ago'
-    six_twelve.name = 'Btw. 6 and 12 months ago'
-    more_twelve.name = 'More than 12 months ago'
-
-    return [new_users, one_three, four_six, six_twelve, more_twelve, 1]
+    return calculate_percentage_of_total(categories[:-1], monthly_total_edits) + [1]
 
 ############################ Edits by editor's last edit date #########################################
 
@@ -731,15 +638,14 @@ def number_of_edits_by_last_edit(data, index):
     '''
     Get the monthly number of edits by each user category in the Users by the date of the last edit metric
     '''
-    data = filter_anonymous(data)
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['months'] = format_data.groupby('contributor_id')['timestamp'].diff().div(pd.Timedelta(days=30.44), fill_value=0).round().astype(int)
+    matrix = get_edits_matrix(data)
+    gaps = matrix.gaps
 
-    new_users = (format_data[format_data['months'] == 0]).groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    one_month = (format_data[format_data['months'] == 1]).groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    two_three_months = (format_data[(format_data['months'] == 2) | (format_data['months'] == 3)]).groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    four_six_months = (format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)]).groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
-    more_six_months = (format_data[format_data['months'] > 6]).groupby(['timestamp'])['medits'].sum().reindex(index).fillna(0)
+    new_users = matrix.sum_by_month(index, matrix.is_first)
+    one_month = matrix.sum_by_month(index, gaps == 1)
+    two_three_months = matrix.sum_by_month(index, (gaps == 2) | (gaps == 3))
+    four_six_months = matrix.sum_by_month(index, (gaps >= 4) & (gaps <= 6))
+    more_six_months = matrix.sum_by_month(index, gaps > 6)
 
     new_users.name = 'New users'
     one_month.name = '1 month ago'
@@ -754,29 +660,15 @@ def number_of_edits_by_last_edit_abs(data, index):
     Get the monthly proportion of edits done by each user category in the Users by the date of the last edit metric
     '''
     categories = number_of_edits_by_last_edit(data, index)
-    data = filter_anonymous(data)
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    monthly_total_edits = format_data.groupby(['timestamp'])['medits'].sum()
+    monthly_total_edits = get_edits_matrix(data).sum_by_month(index)
 
-    new_users = (categories[0] / monthly_total_edits) * 100
-    one_month = (categories[1] / monthly_total_edits) * 100
-    two_three_months = (categories[2] / monthly_total_edits) * 100
-    four_six_months = (categories[3] / monthly_total_edits) * 100
-    more_six_months = (categories[4] / monthly_total_edits) * 100
-
-    new_users.name = 'New users'
-    one_month.name = '1 month ago'
-    two_three_months.name = 'Btw. 2 and 3 months ago'
-    four_six_months.name = 'Btw. 4 and 6 months ago'
-    more_six_months.name = 'More than six months ago'
-
-    return [new_users, more_six_months, four_six_months, two_three_months, one_month, 1]
+    return calculate_percentage_of_total(categories[:-1], monthly_total_edits) + [1]
 
 ############################ url and pictures #########################################
 
 def url_by_months(data,index):
         data = filter_anonymous(data)
-        data['edit_content']=data['edit_content'].apply(str)
+        data['edit_content']=data['edit_content'].astype(str)
         data['countI']=data['edit_content'].apply(lambda x:x.count('[['))
         data['countE']=data['edit_content'].apply(lambda x:x.count('[http'))
         data['countTotal']=data['countI'] + data['countE']
@@ -787,7 +679,7 @@ def url_by_months(data,index):
 
 def pic_by_months(data, index):
     data = filter_anonymous(data)
-    data['edit_content'] = data['edit_content'].apply(str)
+    data['edit_content'] = data['edit_content'].astype(str)
     data['countJPG'] = data['edit_content'].apply(lambda x:x.count('.jpg'))
     data['countPNG'] = data['edit_content'].apply(lambda x:x.count('.png'))
     data['count'] = data['countJPG'] + data['countPNG']
@@ -797,7 +689,7 @@ def pic_by_months(data, index):
     return series
 def difference_btw_external_and_internal_links(data,index):
         data = filter_anonymous(data)
-        data['edit_content']=data['edit_content'].apply(str)
+        data['edit_content']=data['edit_content'].astype(str)
         dataExternal=data
         data['countI']=data['edit_content'].apply(lambda x:x.count('[['))
         dataExternal['countE']=data['edit_content'].apply(lambda x:x.count('[http'))
@@ -813,134 +705,26 @@ def added_factoids_by_active_editors_by_experience(data, index):
     '''
     Get the number of factoids added by users that belong to each category, in the Active editors by experience metric.
     '''
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    data['added_factoids'] = data.groupby('page_id').factoids.diff().fillna(data.factoids)
-    data['number_added_factoids'] = data['added_factoids'].apply(len)
-
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['number_added_factoids'] = (data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')])['number_added_factoids'].sum().reset_index())['number_added_factoids']
-    format_data['nEdits'] = (format_data[['medits', 'contributor_id']].groupby(['contributor_id']))['medits'].cumsum()
-    format_data['nEdits_until_previous_month'] = (format_data[['nEdits','contributor_id']].groupby(['contributor_id']))['nEdits'].shift().fillna(-1)
-
-    new_users = format_data[generate_condition_users_by_number_of_edits(format_data, 0,0)]
-    one_four = format_data[generate_condition_users_by_number_of_edits(format_data, 1,4)]
-    between_5_24 = format_data[generate_condition_users_by_number_of_edits(format_data,5,24)]
-    between_25_99 = format_data[generate_condition_users_by_number_of_edits(format_data,25,99)]
-    highEq_100 = format_data[generate_condition_users_by_number_of_edits(format_data,100,0)]
-
-    new_users_factoids = new_users.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    one_four_factoids = one_four.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    between_5_24_factoids = between_5_24.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    between_25_99_factoids = between_25_99.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    highEq_100_factoids = highEq_100.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-
-    new_users_factoids.name = 'By new users'
-    one_four_factoids.name = 'By users that have done btw. 1 and 4 edits'
-    between_5_24_factoids.name = 'By users that have done btw. 5 and 24 edits'
-    between_25_99_factoids.name = 'By users that have done btw. 25 and 99 edits'
-    highEq_100_factoids.name = 'By users that have done more than 99 edits'
-
-    return [new_users_factoids, one_four_factoids, between_5_24_factoids, between_25_99_factoids, highEq_100_factoids, 1]
+    return factoids_by_active_editors_by_experience(data, index, 'added')
 
 def deleted_factoids_by_active_editors_by_experience(data, index):
     '''
     Get the average number of factoids deleted by users that belong to each category, in the Active editors by experience metric.
     '''
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    #order data from latter to sooner revision of a same page:
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, False])
-    #do the same operation as in the added factoids metric: on each row, we will have the erased factoids of the previous one
-    data['deleted_factoids'] = data.groupby('page_id').factoids.diff()
-    data['deleted_factoids'] = data.deleted_factoids.shift(-1).where(data.page_id.eq(data.page_id.shift(-1)))
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, True])
-    data['deleted_factoids'] = data['deleted_factoids'].apply(lambda x: x if isinstance(x, set) else {})
-
-    data['number_deleted_factoids'] = data['deleted_factoids'].apply(len)
-
-
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['number_deleted_factoids'] = (data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')])['number_deleted_factoids'].sum().reset_index())['number_deleted_factoids']
-    format_data['nEdits'] = (format_data[['medits', 'contributor_id']].groupby(['contributor_id']))['medits'].cumsum()
-    format_data['nEdits_until_previous_month'] = (format_data[['nEdits','contributor_id']].groupby(['contributor_id']))['nEdits'].shift().fillna(-1)
-
-    new_users = format_data[generate_condition_users_by_number_of_edits(format_data, 0,0)]
-    one_four = format_data[generate_condition_users_by_number_of_edits(format_data, 1,4)]
-    between_5_24 = format_data[generate_condition_users_by_number_of_edits(format_data,5,24)]
-    between_25_99 = format_data[generate_condition_users_by_number_of_edits(format_data,25,99)]
-    highEq_100 = format_data[generate_condition_users_by_number_of_edits(format_data,100,0)]
-
-    new_users_factoids = new_users.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    one_four_factoids = one_four.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    between_5_24_factoids = between_5_24.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    between_25_99_factoids = between_25_99.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    highEq_100_factoids = highEq_100.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-
-    new_users_factoids.name = 'By new users'
-    one_four_factoids.name = 'By users that have done btw. 1 and 4 edits'
-    between_5_24_factoids.name = 'By users that have done btw. 5 and 24 edits'
-    between_25_99_factoids.name = 'By users that have done btw. 25 and 99 edits'
-    highEq_100_factoids.name = 'By users that have done more than 99 edits'
-
-    return [new_users_factoids, one_four_factoids, between_5_24_factoids, between_25_99_factoids, highEq_100_factoids, 1]
+    return factoids_by_active_editors_by_experience(data, index, 'deleted')
 
 ############################ Factoids by Users by edit streak #########################################
 def added_factoids_by_edit_streak(data, index):
     '''
     Get the number of factoids added by users that belong to each category, in the Users by edit streak.
     '''
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-    data['timestamp'] = pd.to_datetime(data['timestamp']).dt.to_period('M').dt.to_timestamp()
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    data['added_factoids'] = data.groupby('page_id').factoids.diff().fillna(data.factoids)
-    data['number_added_factoids'] = data['added_factoids'].apply(len)
-	
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['number_of_factoids'] = (data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')])['number_added_factoids'].sum().reset_index())['number_added_factoids']
-
-    this_month = current_streak_x_or_y_months_in_a_row(format_data, index, 1, 0, 'factoids')
-    two_three_months = current_streak_x_or_y_months_in_a_row(format_data, index, 1, 3, 'factoids')
-    four_six_months = current_streak_x_or_y_months_in_a_row(format_data, index, 3, 6, 'factoids')
-    more_six = current_streak_x_or_y_months_in_a_row(format_data, index, 6, 0, 'factoids')
-	
-    set_category_name([this_month, two_three_months, four_six_months, more_six], ['1 month editing', 'Btw. 2 and 3 consecutive months', 'Btw. 4 and 6 consecutive months', 'More than 6 consecutive months'])
-    
-    return [this_month, two_three_months, four_six_months, more_six, 1]
+    return factoids_by_edit_streak(data, index, 'added')
 	
 def deleted_factoids_by_edit_streak(data, index):
     '''
     Get the number of factoids deleted by users that belong to each category, in the Users by edit streak metric.
     '''
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    #order data from latter to sooner revision of a same page:
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, False])
-    #do the same operation as in the added factoids metric: on each row, we will have the erased factoids of the previous one
-    data['deleted_factoids'] = data.groupby('page_id').factoids.diff()
-    data['deleted_factoids'] = data.deleted_factoids.shift(-1).where(data.page_id.eq(data.page_id.shift(-1)))
-    data['deleted_factoids'] = data['deleted_factoids'].apply(lambda x: x if isinstance(x, set) else {})
-
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, True])
-    data['number_deleted_factoids'] = data['deleted_factoids'].apply(len)
-	
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['number_of_factoids'] = (data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')])['number_deleted_factoids'].sum().reset_index())['number_deleted_factoids']
-
-    this_month = current_streak_x_or_y_months_in_a_row(format_data, index, 1, 0, 'factoids')
-    two_three_months = current_streak_x_or_y_months_in_a_row(format_data, index, 1, 3, 'factoids')
-    four_six_months = current_streak_x_or_y_months_in_a_row(format_data, index, 3, 6, 'factoids')
-    more_six = current_streak_x_or_y_months_in_a_row(format_data, index, 6, 0, 'factoids')
-	
-    set_category_name([this_month, two_three_months, four_six_months, more_six], ['1 month editing', 'Btw. 2 and 3 consecutive months', 'Btw. 4 and 6 consecutive months', 'More than 6 consecutive months'])
-    
-    return [this_month, two_three_months, four_six_months, more_six, 1]
+    return factoids_by_edit_streak(data, index, 'deleted')
 
 ############################ Factoids by Users by tenure #########################################
 
@@ -948,82 +732,13 @@ def added_factoids_by_tenure(data, index):
     '''
     Get the number of factoids added by users that belong to each category, in the Users by tenure metric.
     '''
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-    data['timestamp'] = pd.to_datetime(data['timestamp']).dt.to_period('M').dt.to_timestamp()
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    data['added_factoids'] = data.groupby('page_id').factoids.diff().fillna(data.factoids)
-    data['number_added_factoids'] = data['added_factoids'].apply(len)
-
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['number_added_factoids'] = (data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')])['number_added_factoids'].sum().reset_index())['number_added_factoids']
-
-    mins = format_data.groupby('contributor_id')['timestamp'].transform('min')
-    format_data['months'] = format_data['timestamp'].sub(mins).div(pd.Timedelta(1, 'M')).round().astype(int)
-    
-    new_users = format_data[format_data['months'] == 0]
-    one_three = format_data[(format_data['months'] >= 1) & (format_data['months'] <= 3)]
-    four_six = format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)]
-    six_twelve = format_data[(format_data['months'] >= 7) & (format_data['months'] <= 12)]
-    more_twelve = format_data[format_data['months'] >= 13]
-
-    new_users_factoids = new_users.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    one_three_factoids = one_three.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    four_six_factoids = four_six.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    six_twelve_factoids = six_twelve.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    more_twelve_factoids = more_twelve.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-
-    new_users_factoids.name = 'By new users'
-    one_three_factoids.name = 'By users first edit between 1 and 3 months ago'
-    four_six_factoids.name = 'By users first edit between 4 and 6 months ago'
-    six_twelve_factoids.name = 'By users first edit between 6 and 12 months ago'
-    more_twelve_factoids.name = 'By users first edit more than 12 months ago'
-
-    return [new_users_factoids, one_three_factoids, four_six_factoids, six_twelve_factoids, more_twelve_factoids, 1]
+    return factoids_by_tenure(data, index, 'added')
 
 def deleted_factoids_by_tenure(data, index):
     '''
     Get the number of factoids deleted by users that belong to each category, in the Users by tenure metric.
     '''
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    #order data from latter to sooner revision of a same page:
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, False])
-    #do the same operation as in the added factoids metric: on each row, we will have the erased factoids of the previous one
-    data['deleted_factoids'] = data.groupby('page_id').factoids.diff()
-    data['deleted_factoids'] = data.deleted_factoids.shift(-1).where(data.page_id.eq(data.page_id.shift(-1)))
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, True])
-    data['deleted_factoids'] = data['deleted_factoids'].apply(lambda x: x if isinstance(x, set) else {})
-
-    data['number_deleted_factoids'] = data['deleted_factoids'].apply(len)
-
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['number_deleted_factoids'] = (data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')])['number_deleted_factoids'].sum().reset_index())['number_deleted_factoids']
-
-    mins = format_data.groupby('contributor_id')['timestamp'].transform('min')
-    format_data['months'] = format_data['timestamp'].sub(mins).div(pd.Timedelta(1, 'M')).round().astype(int)
-    
-    new_users = format_data[format_data['months'] == 0]
-    one_three = format_data[(format_data['months'] >= 1) & (format_data['months'] <= 3)]
-    four_six = format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)]
-    six_twelve = format_data[(format_data['months'] >= 7) & (format_data['months'] <= 12)]
-    more_twelve = format_data[format_data['months'] >= 13]
-
-    new_users_factoids = new_users.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    one_three_factoids = one_three.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    four_six_factoids = four_six.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    six_twelve_factoids = six_twelve.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    more_twelve_factoids = more_twelve.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-
-    new_users_factoids.name = 'By new users'
-    one_three_factoids.name = 'By users first edit between 1 and 3 months ago'
-    four_six_factoids.name = 'By users first edit between 4 and 6 months ago'
-    six_twelve_factoids.name = 'By users first edit between 6 and 12 months ago'
-    more_twelve_factoids.name = 'By users first edit more than 12 months ago'
-
-    return [new_users_factoids, one_three_factoids, four_six_factoids, six_twelve_factoids, more_twelve_factoids, 1]
+    return factoids_by_tenure(data, index, 'deleted')
 
 ############################ Factoids by Users by date of the last edit #########################################
 
@@ -1031,126 +746,79 @@ def added_factoids_by_date_of_last_edit(data, index):
     '''
     Get the number of factoids added by users that belong to each category, in the Users by the date of the last edit metric.
     '''
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-    data['timestamp'] = pd.to_datetime(data['timestamp']).dt.to_period('M').dt.to_timestamp()
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    data['added_factoids'] = data.groupby('page_id').factoids.diff().fillna(data.factoids)
-    data['number_added_factoids'] = data['added_factoids'].apply(len)
-
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['number_added_factoids'] = (data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')])['number_added_factoids'].sum().reset_index())['number_added_factoids']
-    format_data['months'] = format_data.groupby('contributor_id')['timestamp'].diff().div(pd.Timedelta(days=30.44), fill_value=0).round().astype(int)
-    
-    new_users = format_data[format_data['months'] == 0]
-    one_month = format_data[format_data['months'] == 1]
-    two_three_months = format_data[(format_data['months'] == 2) | (format_data['months'] == 3)]
-    four_six_months = format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)]
-    more_six_months = format_data[format_data['months'] > 6]
-
-    new_users_factoids = new_users.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    one_month_factoids = one_month.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    two_three_months_factoids = two_three_months.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    four_six_months_factoids = four_six_months.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-    more_six_months_factoids = more_six_months.groupby(['timestamp'])['number_added_factoids'].sum().reindex(index).fillna(0)
-
-    new_users_factoids.name = 'By new users'
-    one_month_factoids.name = 'By users last edit 1 month ago'
-    two_three_months_factoids.name = 'By users last edit between 2 and 3 months ago'
-    four_six_months_factoids.name = 'By users last edit between 4 and 6 months ago'
-    more_six_months_factoids.name = 'By users last edit more than 6 months ago'
-
-    return [new_users_factoids, more_six_months_factoids, four_six_months_factoids, two_three_months_factoids, one_month_factoids, 1]
+    return factoids_by_date_of_last_edit(data, index, 'added')
 
 def deleted_factoids_by_date_of_last_edit(data, index):
     '''
     Get the number of factoids deleted by users that belong to each category, in the Users by the date of the last edit metric.
     '''
-    data = filter_anonymous(data)
-    data = data[data['page_ns'] == 0]
-
-    data['factoids'] = data['factoids'].apply(str).apply(lambda x: x.split(',')).apply(set)
-    #order data from latter to sooner revision of a same page:
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, False])
-    #do the same operation as in the added factoids metric: on each row, we will have the erased factoids of the previous one
-    data['deleted_factoids'] = data.groupby('page_id').factoids.diff()
-    data['deleted_factoids'] = data.deleted_factoids.shift(-1).where(data.page_id.eq(data.page_id.shift(-1)))
-    data['deleted_factoids'] = data['deleted_factoids'].apply(lambda x: x if isinstance(x, set) else {})
-
-    data = data.sort_values(['page_id', 'timestamp'], ascending=[True, True])
-    data['number_deleted_factoids'] = data['deleted_factoids'].apply(len)
-
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['number_deleted_factoids'] = (data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')])['number_deleted_factoids'].sum().reset_index())['number_deleted_factoids']
-    format_data['months'] = format_data.groupby('contributor_id')['timestamp'].diff().div(pd.Timedelta(days=30.44), fill_value=0).round().astype(int)
-    
-    new_users = format_data[format_data['months'] == 0]
-    one_month = format_data[format_data['months'] == 1]
-    two_three_months = format_data[(format_data['months'] == 2) | (format_data['months'] == 3)]
-    four_six_months = format_data[(format_data['months'] >= 4) & (format_data['months'] <= 6)]
-    more_six_months = format_data[format_data['months'] > 6]
-
-    new_users_factoids = new_users.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    one_month_factoids = one_month.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    two_three_months_factoids = two_three_months.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    four_six_months_factoids = four_six_months.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
-    more_six_months_factoids = more_six_months.groupby(['timestamp'])['number_deleted_factoids'].sum().reindex(index).fillna(0)
+    return factoids_by_date_of_last_edit(data, index, 'deleted')
 
-    new_users_factoids.name = 'By new users'
-    one_month_factoids.name = 'By users last edit 1 month ago'
-    two_three_months_factoids.name = 'By users last edit between 2 and 3 months ago'
-    four_six_months_factoids.name = 'By users last edit between 4 and 6 months ago'
-    more_six_months_factoids.name = 'By users last edit more than 6 months ago'
 
-    return [new_users_factoids, more_six_months_factoids, four_six_months_factoids, two_three_months_factoids, one_month_factoids, 1]
+############################# HEATMAP METRICS ##############################################
+def generate_zaxis(max_range, index, months, values, edges):
+    '''
+    Return the z axis of a heatmap: a numpy matrix with max_range+1 rows (one per value) and a column per month of index.
+    Every item is counted in the bin of edges its value falls in, and every row of a bin gets the count of the bin.
+    Parameters:
+    -months: month numbers (months since the epoch) of the items.
+    -values: values of the items.
+    -edges: increasing edges of the bins, each one is [edges[i], edges[i+1]).
+    '''
+    edges = np.asarray(edges)
+    index_months = get_month_numbers(index.values)
+    n_months = len(index_months)
+    n_bins = len(edges) - 1
+    if n_months:
+        positions = np.asarray(months, dtype=np.int64) - index_months[0]
+    else:
+        positions = np.zeros(0, dtype=np.int64)
 
+    bins = np.searchsorted(edges, values, side='right') - 1
+    valid = (positions >= 0) & (positions < n_months) & (bins >= 0) & (bins < n_bins)
+    counts = np.bincount(bins[valid] * n_months + positions[valid],
+                        minlength=n_bins * n_months).reshape(n_bins, n_months)
 
-############################# HEATMAP METRICS ##############################################
-def generate_zaxis(max_range, index, months_range, bins):
-    graphs_list = [[0 for j in range(max_range+1)] for i in range(len(index))]
-    before = pd.to_datetime(0)
-    j = -1
-    for i, v in months_range.iteritems(): 
-        i = list(i)#lista con timestamp y bins
-        current = i[0]#fecha
-        if bins == True:
-            p = i[1]# intervalo
-            p = p.split(')')[0]
-            p = p.split('[')[1]
-            p = p.split(',')
-            num_min = int(float(p[0]))
-            num_max = int(float(p[1]))
-        else:
-            num = i[1]
-        resta = current - before
-        resta = int(resta / np.timedelta64(1, 'D'))
-        if (resta > 31 and before != pd.to_datetime(0)):
-            if resta == 62:
-                aux= math.floor(resta / 31) - 1
-            else:
-                aux= math.floor(resta / 31)
-            j = j + aux
-            resta = resta- (31 * aux)
-        if (before != current):
-            j = j +1
-            before = current
-        if bins == True:
-            graphs_list[j][num_min:num_max] = [v for i in range(num_min,num_max)]
-        else:
-            graphs_list[j][num] = v
-    z_param = np.transpose(graphs_list)
+    z_param = np.zeros((max_range+1, n_months), dtype=np.int64)
+    rows = np.repeat(np.arange(n_bins), np.diff(edges))
+    z_param[:len(rows)] = counts[rows]
     return z_param
 
+def count_by_month_and_key(months, keys):
+    '''
+    Count the items of every (month, key) pair.
+    Return two numpy arrays: the month number of every pair and its number of items.
+    '''
+    codes, uniques = pd.factorize(keys)
+    n_keys = max(len(uniques), 1)
+    pairs, counts = np.unique(months * n_keys + codes, return_counts=True)
+    return (pairs // n_keys, counts)
+
+def get_bytes_edges(max_dif_bytes):
+    '''
+    Return the edges of the bins of 100 bytes of the bytes heatmaps, up to 1000 bytes or more (the last bin).
+    '''
+    if max_dif_bytes > 1000:
+        return list(range(0, 1101, 100))
+    return list(range(0, int(max_dif_bytes) // 100 * 100 + 101, 100))
+
 def bytes_diference(data):
-    data.set_index(data['timestamp'], inplace=True)
+    '''
+    Return the article edits of registered users with a dif column: the bytes added by the edit (negative if deleted),
+    that is, the size of the page minus its size in the previous edit.
+    '''
     users_registered = filter_anonymous(data)
     mains = users_registered[users_registered['page_ns'] == 0]
-    order = mains.sort_index()
-    group_by_page_id = order[['page_id', 'bytes']].groupby(['page_id'])
-    group = group_by_page_id['bytes'].shift()
-    order['bytes1'] = group
-    order['dif'] = order['bytes'] - order['bytes1']
-    order['dif'] = order['dif'].fillna(order['bytes']).astype(int)
+    order = mains.iloc[np.argsort(mains['timestamp'].values, kind='mergesort')]
+    by_page = np.argsort(order['page_id'].values, kind='mergesort')
+    page_ids = order['page_id'].values[by_page]
+    sizes = order['bytes'].values[by_page]
+    first = np.ones(len(by_page), dtype=bool)
+    first[1:] = page_ids[1:] != page_ids[:-1]
+    dif = np.empty(len(by_page), dtype=np.int64)
+    dif[by_page] = np.where(first, sizes, sizes - np.roll(sizes, 1))
+    order = order[['timestamp', 'page_id', 'bytes']].copy()
+    order['dif'] = dif
     return order
 
 def edit_distributions_across_editors(data, index):
@@ -1160,90 +828,75 @@ def edit_distributions_across_editors(data, index):
     and at last, a matrix with the number of contributors doing the same number of contributions on each month.
 
     """
-    users_registered = filter_anonymous(data)
-    mothly = users_registered.groupby([pd.Grouper(key ='timestamp', freq='MS'),'contributor_id']).size()
-    mothly = mothly.to_frame('num_contributions').reset_index()
-    mothly.loc[mothly['num_contributions'] > 100, 'num_contributions'] = 100
-    mothly = mothly.groupby([pd.Grouper(key ='timestamp', freq='MS'),'num_contributions']).size().to_frame('num_editors').reset_index()
+    matrix = get_edits_matrix(data)
+    num_contributions = np.minimum(matrix.edits, 100)
     list_range = list(range(0, 111, 10))
     max_range = max(list_range)
-    mothly['range'] = pd.cut(mothly['num_contributions'], bins = list_range, right = False).astype(str)
-    months_range = mothly.groupby([pd.Grouper(key ='timestamp', freq='MS'), 'range'])['num_editors'].sum()
-    z_param = generate_zaxis(max_range, index, months_range, True)
+    z_param = generate_zaxis(max_range, index, matrix.months, num_contributions, list_range)
     return [index,list(range(0, 109)), z_param, 'Number of editors']
 
+def bytes_across_articles(dif_bytes, index):
+    '''
+    Heatmap of the number of articles by the bytes in dif_bytes (see bytes_diference()).
+    '''
+    dif = dif_bytes['dif'].values
+    list_range = get_bytes_edges(dif.max() if len(dif) else 0)
+    max_range = max(list_range)
+    dif = np.minimum(dif, max_range - 100)
+    months = get_month_numbers(dif_bytes['timestamp'].values)
+    z_param = generate_zaxis(max_range, index, months, dif, list_range)
+    return [index, list(range(0, max_range-2)), z_param, 'Number of articles']
+
 def bytes_added_across_articles(data, index):
     order = bytes_diference(data)
     order = order[order['dif'] >= 0]
-    max_dif_bytes = max(order['dif'])
-    if max_dif_bytes > 1000:
-        order.loc[order['dif'] > 1000, 'dif'] = 1000
-        list_range = list(range(0, 1101, 100))
-    else:
-        list_range = list(range(0, max_dif_bytes+100, 100))
-    
-    max_range = max(list_range)
-    order['range'] = pd.cut(order['dif'], bins = list_range, right = False).astype(str)
-    months_range = order.groupby([pd.Grouper(key ='timestamp', freq='MS'), 'range']).size()
-    z_param = generate_zaxis(max_range, index, months_range, True)
-    return [index, list(range(0, max_range-2)), z_param, 'Number of articles']
+    return bytes_across_articles(order, index)
 	
 def bytes_deleted_across_articles(data, index):
     order = bytes_diference(data)
     order = order[order['dif'] < 0]
-    order['dif'] = order['dif'].apply(lambda x: abs(x))
-    max_dif_bytes = max(order['dif'])
-    if max_dif_bytes > 1000:
-        order.loc[order['dif'] > 1000, 'dif'] = 1000
-        list_range = list(range(0, 1101, 100))
-    else:
-        list_range = list(range(0, max_dif_bytes+100, 100))
-    
-    max_range = max(list_range)
-    order['range'] = pd.cut(order['dif'], bins = list_range, right = False).astype(str)
-    months_range = order.groupby([pd.Grouper(key ='timestamp', freq='MS'), 'range']).size()
-    z_param = generate_zaxis(max_range, index, months_range, True)
-    return [index, list(range(0, max_range-2)), z_param, 'Number of articles']
+    order['dif'] = -order['dif']
+    return bytes_across_articles(order, index)
 
 def edition_on_pages(data, index):
     users_registered = filter_anonymous(data)
-    groupTP=users_registered.groupby([pd.Grouper(key ='timestamp', freq='MS'),'page_id']).size().to_frame('ediciones').reset_index()
-    groupTP.loc[groupTP['ediciones'] > 100, 'ediciones'] = 100
+    months = get_month_numbers(users_registered['timestamp'].values)
+    (months, ediciones) = count_by_month_and_key(months, users_registered['page_id'].values)
+    ediciones = np.minimum(ediciones, 100)
     list_range = list(range(0, 111, 10))
     max_range = max(list_range)
-    groupTP['range'] = pd.cut(groupTP['ediciones'], bins = list_range, right = False).astype(str)
-    z = groupTP.groupby([pd.Grouper(key ='timestamp', freq='MS'), 'range']).size()
-    z_param = generate_zaxis(max_range, index, z, True)
+    z_param = generate_zaxis(max_range, index, months, ediciones, list_range)
     return [index, list(range(0, 109)), z_param, 'Number of pages']
 
-def mask_first(x):
-    result = np.ones_like(x)
-    result[0] = 0
-    return result
-
 def revision_on_pages(data, index):
     users_registered = filter_anonymous(data)
-    groupTP = users_registered.groupby(['page_id'])['page_id'].transform(mask_first).astype(bool)
-    without_first_edition = users_registered.loc[groupTP]
-    z=without_first_edition.groupby([pd.Grouper(key ='timestamp', freq='MS'),'page_id']).size().to_frame('revisiones').reset_index()
-    z.loc[z['revisiones'] > 100, 'revisiones'] = 100
+    without_first_edition = users_registered[users_registered['page_id'].duplicated().values]
+    months = get_month_numbers(without_first_edition['timestamp'].values)
+    (months, revisiones) = count_by_month_and_key(months, without_first_edition['page_id'].values)
+    revisiones = np.minimum(revisiones, 100)
     list_range = list(range(0, 111, 10))
     max_range = max(list_range)
-    z['range'] = pd.cut(z['revisiones'], bins = list_range, right = False).astype(str)
-    z = z.groupby([pd.Grouper(key ='timestamp', freq='MS'), 'range']).size()
-    z_param = generate_zaxis(max_range, index, z, True)
+    z_param = generate_zaxis(max_range, index, months, revisiones, list_range)
     return [index, list(range(0, 109)), z_param, 'Number of pages']
 
 def distribution_editors_between_articles_edited_each_month(data, index):
     users_registered = filter_anonymous(data)
     #main namespace
     users_registered = users_registered[users_registered['page_ns']==0]
-    users_per_article = users_registered.groupby([pd.Grouper(key ='timestamp', freq='MS'),'page_id'])['contributor_id'].nunique().reset_index(name='editor_count')
-    max_editors = max(users_per_article['editor_count'])
-    z_articles_by_y_editors = users_per_article.groupby([pd.Grouper(key ='timestamp', freq='MS'),'editor_count']).size()
+    users_registered = users_registered[users_registered['contributor_id'].notnull()]
+    months = get_month_numbers(users_registered['timestamp'].values)
+    page_codes, pages = pd.factorize(users_registered['page_id'].values)
+    editor_codes, editors = pd.factorize(users_registered['contributor_id'].values)
+    n_pages = max(len(pages), 1)
+    n_editors = max(len(editors), 1)
+    # distinct editors of every (month, page)
+    month_page = np.unique((months * n_pages + page_codes) * n_editors + editor_codes) // n_editors
+    month_page, editor_count = np.unique(month_page, return_counts=True)
+    months = month_page // n_pages
+    max_editors = int(editor_count.max(initial=0))
     #y parameter
     y_param = list(range(max_editors))
-    z_param = generate_zaxis(max_editors, index, z_articles_by_y_editors, False)
+    z_param = generate_zaxis(max_editors, index, months, editor_count, np.arange(max_editors + 2))
     return [index,y_param,z_param, 'Number of articles']
     
 
@@ -1255,82 +908,13 @@ def contributor_pctg_per_contributions_pctg(data, index):
     Calculate which % of contributors has contributed
     in a 50%, 80%, 90% and 99% of the total wiki edits until each month.
     """
-    data = filter_anonymous(data)
-    format_data =data.groupby(['contributor_id']).apply(lambda x: x.groupby(pd.Grouper(key='timestamp', freq='MS')).size().to_frame('nEdits_cumulative').reindex(index, fill_value=0).cumsum()).reset_index()
-    format_data['monthly_total_edits'] = format_data.groupby('timestamp')['nEdits_cumulative'].transform('sum')
-
-    format_data['edits%'] = (format_data['nEdits_cumulative'] / format_data['monthly_total_edits']) * 100
-    format_data = format_data.sort_values(['timestamp', 'edits%'], ascending=[True, False])
-    format_data['edits%accum'] = format_data.groupby('timestamp')['edits%'].cumsum()
-    format_data = format_data[format_data['edits%'] > 0]
-    monthly_total_users = format_data.groupby('timestamp').size().reindex(index).fillna(0)
-    monthly_total_users = monthly_total_users[monthly_total_users >= 10].reindex(index)
-
-    p = [1 for j in range(1, len(format_data.index)+1)]
-    format_data['count'] = p
-    format_data['count_acum'] = format_data.groupby('timestamp')['count'].cumsum()
-
-    category_50 = (format_data[format_data['edits%accum'] >= 50]).groupby('timestamp').head(1)
-    category_50 = category_50.set_index(category_50['timestamp']).reindex(index).fillna(0)['count_acum']
-    category_50= (((category_50 / monthly_total_users)*100)).fillna(0)
-
-    category_80 = (format_data[(format_data['edits%accum'] >=80)]).groupby('timestamp').head(1)
-    category_80 = category_80.set_index(category_80['timestamp']).reindex(index).fillna(0)['count_acum']
-    category_80 = (((category_80 / monthly_total_users)*100)).fillna(0)
-
-    category_90 = (format_data[(format_data['edits%accum'] >=90)]).groupby('timestamp').head(1)
-    category_90 = category_90.set_index(category_90['timestamp']).reindex(index).fillna(0)['count_acum']
-    category_90 = (((category_90 / monthly_total_users)*100)).fillna(0)
-
-    category_99 = (format_data[(format_data['edits%accum'] >=99)]).groupby('timestamp').head(1)
-    category_99 = category_99.set_index(category_99['timestamp']).reindex(index).fillna(0)['count_acum']
-    category_99 = (((category_99 / monthly_total_users)*100)).fillna(0)
-	
-
-    category_50.name = "50% of edits"
-    category_80.name = "80% of edits"
-    category_90.name = "90% of edits"
-    category_99.name = "99% of edits"
-
-    return[category_50, category_80, category_90, category_99]
+    matrix = get_edits_matrix(data)
+    return calculate_contributor_pctg_per_contributions_pctg(matrix.iter_accum_edits(index), index)
 	
 def contributor_pctg_per_contributions_pctg_per_month(data, index):
     """
     Calculate which % of contributors has contributed
     in a 50%, 80%, 90% and 99% of the wiki edits.
     """
-    data = filter_anonymous(data)
-    format_data = data.groupby(['contributor_id',pd.Grouper(key = 'timestamp', freq = 'MS')]).size().to_frame('medits').reset_index()
-    format_data['monthly_total_edits'] = format_data.groupby('timestamp')['medits'].transform('sum')
-    format_data['edits%'] = (format_data['medits'] / format_data['monthly_total_edits']) * 100
-    format_data = format_data.sort_values(['timestamp', 'edits%'], ascending=[True, False])
-    format_data['edits%accum'] = format_data.groupby('timestamp')['edits%'].cumsum()
-    monthly_total_users = format_data.groupby('timestamp').size().reindex(index).fillna(0)
-    monthly_total_users = monthly_total_users[monthly_total_users >= 10].reindex(index)
-    p = [1 for j in range(1, len(format_data.index)+1)]
-    format_data['count'] = p
-    format_data['count_acum'] = format_data.groupby('timestamp')['count'].cumsum()
-
-    category_50 = (format_data[format_data['edits%accum'] >= 50]).groupby('timestamp').head(1)
-    category_50 = category_50.set_index(category_50['timestamp']).reindex(index).fillna(0)['count_acum']
-    category_50= (((category_50 / monthly_total_users)*100)).fillna(0)
-
-    category_80 = (format_data[(format_data['edits%accum'] >=80)]).groupby('timestamp').head(1)
-    category_80 = category_80.set_index(category_80['timestamp']).reindex(index).fillna(0)['count_acum']
-    category_80 = (((category_80 / monthly_total_users)*100)).fillna(0)
-
-    category_90 = (format_data[(format_data['edits%accum'] >=90)]).groupby('timestamp').head(1)
-    category_90 = category_90.set_index(category_90['timestamp']).reindex(index).fillna(0)['count_acum']
-    category_90 = (((category_90 / monthly_total_users)*100)).fillna(0)
-
-    category_99 = (format_data[(format_data['edits%accum'] >=99)]).groupby('timestamp').head(1)
-    category_99 = category_99.set_index(category_99['timestamp']).reindex(index).fillna(0)['count_acum']
-    category_99 = (((category_99 / monthly_total_users)*100)).fillna(0)
-
-    category_50.name = "50% of edits"
-    category_80.name = "80% of edits"
-    category_90.name = "90% of edits"
-    category_99.name = "99% of edits"
-
-    return[category_50, category_80, category_90, category_99]
-
+    matrix = get_edits_matrix(data)
+    return calculate_contributor_pctg_per_contributions_pctg(matrix.iter_monthly_edits(index), index)
@@ -322,7 +322,8 @@ def start_download_data_server(app, download_pathname):
             upper_bound = datetime.fromtimestamp(upper_bound).strftime("%Y-%m-%d %H:%M:%S")
             lower_bound = datetime.fromtimestamp(lower_bound).strftime("%Y-%m-%d %H:%M:%S")
 
-        network = data_controller.get_network(wikis[0], network_code,
+        # with all the metrics
+        network = data_controller.get_network_with_metrics(wikis[0], network_code,
                 lower_bound, upper_bound)
 
         tmp = TempFS()
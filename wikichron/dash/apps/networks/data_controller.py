@@ -14,7 +14,6 @@ WikiChron code.
 # Built-in imports
 import pandas as pd
 import os
-import numpy as np
 import time
 from datetime import datetime
 from warnings import warn
@@ -22,6 +21,11 @@ import json
 
 # Local imports:
 from .networks import interface
+from . import snapshots
+from . import network_cache
+from wikichron.utils import revision_store
+from wikichron.utils import memory_cache
+from wikichron.utils import cache_keys
 
 # get csv data location (data/ by default)
 global data_dir;
@@ -35,18 +39,15 @@ def set_cache(cache):
 
     # we need to declare as *global* all the cached functions we want to be
     #  available to be used from outside of this file.
-    global read_data
     global get_network
+    global get_network_with_metrics
+    global get_network_nodes
+    global get_network_stats
+    global get_degree_distribution
 
-    @cache.memoize()
-    def read_data(wiki):
-        df = get_dataframe_from_csv(wiki['data'])
-        prepare_data(df)
-        df = clean_up_bot_activity(df, wiki)
-        return df
+    # Networks are kept in the cache split in entries with the format of
+    #  network_cache.py, so that callbacks only fetch the pieces they need.
 
-
-    @cache.memoize(timeout=3600)
     def get_network(wiki, network_code, lower_bound = '', upper_bound = ''):
         """
         Parameters
@@ -54,25 +55,338 @@ def set_cache(cache):
             - network_code: network selected. It is an instance of BaseNetwork.
             - lower_bound: a formated string "%Y-%m-%d %H:%M:%S", to filter the pandas obj
             - upper_bound: a formated string "%Y-%m-%d %H:%M:%S", to filter the pandas obj
-        Return: Data representing the network.
+        Return: Data representing the network, without the metrics calculated
+            on demand (see get_network_with_metrics()).
         """
-        # load data from csvs:
-        time_start_loading_csvs = time.perf_counter()
-        df = read_data(wiki)
-        time_end_loading_csvs = time.perf_counter() - time_start_loading_csvs
-        print(' * [Timing] Loading csvs : {} seconds'.format(time_end_loading_csvs) )
+        (_, network, _) = get_cached_network(wiki, network_code, lower_bound, upper_bound)
+        return network
 
+
+    def get_network_with_metrics(wiki, network_code, lower_bound = '',
+        upper_bound = '', metrics = None, with_layout = False):
+        """
+        Return get_network() along with the given node or graph metrics (see
+        BaseNetwork.METRICS_CALCULATIONS), or all of them if None.
+        If with_layout, it comes with the positions of its nodes too in case
+        it's laid out on the server (see BaseNetwork.has_server_layout()).
+
+        Metrics are only calculated the first time some callback asks for
+        them, and then they're cached along with the rest of the network.
+        """
+        (prefix, network, attrs) = get_cached_network(wiki, network_code,
+                                                    lower_bound, upper_bound)
+        if with_layout and metrics is not None and network.has_server_layout():
+            metrics = metrics + ['layout_x']
+        restore_metrics(prefix, network, attrs, metrics)
+
+        pending = network.get_pending_calculations(metrics)
+        if pending:
+            print(f' * [Info] Calculating {", ".join(pending)}....')
+            time_start_calculations = time.perf_counter()
+            network.calculate_metrics(metrics)
+            time_end_calculations = time.perf_counter() - time_start_calculations
+            print(' * [Timing] Metrics calculations : {} seconds'.format(time_end_calculations) )
+            store_network(prefix, network, attrs)
+
+        return network
+
+
+    def get_network_nodes(wiki, network_code, lower_bound = '', upper_bound = '',
+        node_attrs = []):
+        """
+        Return the network with its graph attrs and its nodes, but without
+        edges, and only with the given node attrs (those which the network
+        has). Node metrics among them are calculated if needed.
+        """
+        prefix = get_network_cache_prefix(wiki, network_code, lower_bound, upper_bound)
         network = interface.factory_network(network_code, wiki['name'])
-        print(' * [Info] Starting calculations....')
-        time_start_calculations = time.perf_counter()
-        network.build_network(df=df, lower_bound = lower_bound, upper_bound = upper_bound)
-        time_end_calculations = time.perf_counter() - time_start_calculations
-        print(' * [Timing] Calculations : {} seconds'.format(time_end_calculations) )
+        attrs = cache.get(network_cache.get_attrs_key(prefix))
+        if attrs is None or network.get_pending_calculations(node_attrs,
+                        get_calculated(attrs)):
+            return get_network_with_metrics(wiki, network_code, lower_bound,
+                                            upper_bound, node_attrs)
+
+        names = [attr for attr in attrs['vertex_attrs'] if attr in node_attrs]
+        columns = cache.get_many(*[network_cache.get_node_key(prefix, attr) for attr in names])
+        columns = [network_cache.unpack_column(data) if data is not None else None
+                    for data in columns]
+        if any(values is None for values in columns):
+            return get_network_with_metrics(wiki, network_code, lower_bound,
+                                            upper_bound, node_attrs)
+
+        set_network_graph(network, attrs['n_vertices'], [], dict(zip(names, columns)),
+                            {}, attrs['graph_attrs'])
         return network
 
 
+    def get_network_stats(wiki, network_code, lower_bound = '', upper_bound = '',
+        stats = None):
+        """
+        Return a dict with the graph attrs of the network, with the given
+        graph metrics (or all of them if None) calculated.
+        """
+        prefix = get_network_cache_prefix(wiki, network_code, lower_bound, upper_bound)
+        network = interface.factory_network(network_code, wiki['name'])
+        attrs = cache.get(network_cache.get_attrs_key(prefix))
+        if attrs is None or network.get_pending_calculations(stats,
+                        get_calculated(attrs)):
+            network = get_network_with_metrics(wiki, network_code, lower_bound,
+                                                upper_bound, stats)
+            return {attr: network.graph[attr] for attr in network.graph.attributes()}
+
+        return attrs['graph_attrs']
+
+
+    def get_calculated(attrs):
+        """ Names of the attrs and calculations of a <prefix>/attrs entry """
+        return set(attrs['vertex_attrs']) | set(attrs['graph_attrs']) | \
+            set(attrs['calculations'])
+
+
+    def get_degree_distribution(wiki, network_code, lower_bound = '', upper_bound = ''):
+        """ Return the degree distribution (k, p_k) of the network """
+        prefix = get_network_cache_prefix(wiki, network_code, lower_bound, upper_bound)
+        key = network_cache.get_degree_key(prefix)
+        distribution = cache.get(key)
+        if distribution is None:
+            network = get_network(wiki, network_code, lower_bound, upper_bound)
+            distribution = network.get_degree_distribution()
+            cache.set(key, distribution, timeout=3600)
+        return distribution
+
+
+    def get_cached_network(wiki, network_code, lower_bound, upper_bound):
+        """
+        Return a tuple (prefix, network, attrs) with the network taken from
+        the cache, or else from the precooked snapshots or built from the
+        data and then cached, the prefix of its cache entries and its
+        <prefix>/attrs entry (see network_cache.py).
+        """
+        prefix = get_network_cache_prefix(wiki, network_code, lower_bound, upper_bound)
+        network = interface.factory_network(network_code, wiki['name'])
+        (graph, attrs) = cache.get_many(network_cache.get_graph_key(prefix),
+                                        network_cache.get_attrs_key(prefix))
+        graph = network_cache.unpack_graph(graph) if graph is not None else None
+        if graph is not None and attrs is not None:
+            (n_vertices, edges, edge_attrs) = graph
+            # the attrs of the network as built, the metrics are restored later
+            metric_attrs = set(network.get_metric_attrs())
+            names = [attr for attr in attrs['vertex_attrs'] if attr not in metric_attrs]
+            columns = cache.get_many(*[network_cache.get_node_key(prefix, attr) for attr in names])
+            columns = [network_cache.unpack_column(data) if data is not None else None
+                        for data in columns]
+            if all(values is not None for values in columns):
+                set_network_graph(network, n_vertices, edges, dict(zip(names, columns)),
+                                    edge_attrs, attrs['graph_attrs'])
+                network.calculations = set(attrs['calculations'])
+                return (prefix, network, attrs)
+
+        # serve it from the precooked snapshots if there is one for these bounds
+        network = get_precooked_network(wiki, network_code, lower_bound, upper_bound)
+        if network is not None:
+            print(' * [Info] Network taken from the precooked snapshots')
+        else:
+            network = build_network(wiki, network_code, lower_bound, upper_bound)
+        attrs = store_network(prefix, network)
+        return (prefix, network, attrs)
+
+
+    def restore_metrics(prefix, network, attrs, metrics):
+        """
+        Set the node metrics stored in the cache which are needed for the
+        given metrics (or all of them if None). Metrics missing in the cache
+        are removed from the network and attrs, so that they're calculated
+        and stored again.
+        """
+        required = network.get_required_metrics(metrics)
+        names = [attr for attr in attrs['vertex_attrs']
+                    if attr not in network.graph.vs.attributes()
+                    and (required is None or attr in required)]
+        if not names:
+            return
+
+        columns = cache.get_many(*[network_cache.get_node_key(prefix, attr) for attr in names])
+        for (attr, data) in zip(names, columns):
+            values = network_cache.unpack_column(data) if data is not None else None
+            if values is not None:
+                network.graph.vs[attr] = values
+                continue
+
+            # calculate it again, along with the rest of attrs of its method
+            for (method, outputs, _) in network.METRICS_CALCULATIONS:
+                if attr not in outputs:
+                    continue
+                network.calculations.discard(method)
+                attrs['calculations'] = [calculation for calculation in attrs['calculations']
+                                            if calculation != method]
+                attrs['vertex_attrs'] = [name for name in attrs['vertex_attrs']
+                                            if name not in outputs]
+                for output in outputs:
+                    attrs['graph_attrs'].pop(output, None)
+                    if output in network.graph.attributes():
+                        del network.graph[output]
+                    if output in network.graph.vs.attributes():
+                        del network.graph.vs[output]
+
+
+    def store_network(prefix, network, attrs = None):
+        """
+        Put the network in the cache and return its <prefix>/attrs entry.
+        If attrs is given, the network is already in the cache with those
+        attrs, so only its new node attrs are stored.
+        """
+        graph = network.graph
+        entries = {}
+        if attrs is None:
+            entries[network_cache.get_graph_key(prefix)] = network_cache.pack_graph(graph)
+            stored = []
+            calculations = network.calculations
+        else:
+            stored = attrs['vertex_attrs']
+            calculations = network.calculations.union(attrs['calculations'])
+
+        new_attrs = [attr for attr in graph.vs.attributes() if attr not in stored]
+        for attr in new_attrs:
+            entries[network_cache.get_node_key(prefix, attr)] = \
+                network_cache.pack_column(graph.vs[attr])
+
+        attrs = {
+            'n_vertices': graph.vcount(),
+            'vertex_attrs': stored + new_attrs,
+            'graph_attrs': {attr: graph[attr] for attr in graph.attributes()},
+            'calculations': sorted(calculations)
+        }
+        entries[network_cache.get_attrs_key(prefix)] = attrs
+        cache.set_many(entries, timeout=3600)
+        return attrs
+
+
 ### OTHER DATA-RELATED FUNCTIONS ###
 
+def build_network(wiki, network_code, lower_bound = '', upper_bound = ''):
+    """
+       Build the network between the bounds from the data of the wiki,
+       with the same parameters as get_network().
+    """
+    # load data from csvs, only if the edits between the bounds can't be
+    #  taken from the edits aggregated by month:
+    time_start_loading_csvs = time.perf_counter()
+    first_edits = get_first_edits(wiki)
+    edits = interface.get_window(get_aggregated_edits(wiki), lower_bound, upper_bound)
+    if edits is None:
+        df = read_data(wiki)
+    time_end_loading_csvs = time.perf_counter() - time_start_loading_csvs
+    print(' * [Timing] Loading csvs : {} seconds'.format(time_end_loading_csvs) )
+
+    network = interface.factory_network(network_code, wiki['name'])
+    print(' * [Info] Starting calculations....')
+    time_start_calculations = time.perf_counter()
+    if edits is not None:
+        network.build_network_from_edits(edits, first_edits)
+    else:
+        network.build_network(df=df, lower_bound = lower_bound, upper_bound = upper_bound,
+                            first_edits = first_edits)
+    time_end_calculations = time.perf_counter() - time_start_calculations
+    print(' * [Timing] Calculations : {} seconds'.format(time_end_calculations) )
+    return network
+
+
+def get_precooked_network(wiki, network_code, lower_bound = '', upper_bound = ''):
+    """
+       Return the network between the bounds from the snapshots precooked by
+       precook_data.py, or None if there is no up to date snapshot for it.
+    """
+    path = snapshots.get_snapshots_path(precooked_net_dir, wiki['data'], network_code)
+    snapshot = snapshots.load_snapshot(path, get_snapshots_source(wiki),
+                                        lower_bound, upper_bound)
+    if snapshot is None:
+        return None
+
+    (n_vertices, edges, vertex_attrs, edge_attrs, graph_attrs) = snapshot
+    network = interface.factory_network(network_code, wiki['name'])
+    set_network_graph(network, n_vertices, edges, vertex_attrs, edge_attrs, graph_attrs)
+    return network
+
+
+def set_network_graph(network, n_vertices, edges, vertex_attrs, edge_attrs, graph_attrs):
+    """ Replace the graph of a network with a new one with the given attrs """
+    network.set_graph(n_vertices, edges, vertex_attrs, edge_attrs)
+    # set_graph() leaves out the attributes of an empty graph, but the
+    #  network built from the data has them.
+    if not n_vertices:
+        for (attr, values) in vertex_attrs.items():
+            network.graph.vs[attr] = values
+    if not edges:
+        for (attr, values) in edge_attrs.items():
+            network.graph.es[attr] = values
+    for (attr, value) in graph_attrs.items():
+        network.graph[attr] = value
+
+
+def get_network_cache_prefix(wiki, network_code, lower_bound, upper_bound):
+    """ Prefix of the cache entries of a network, see network_cache.py """
+    return network_cache.get_prefix((cache_keys.get_dataframe_cache_key(wiki), network_code,
+                                    lower_bound, upper_bound))
+
+
+def get_snapshots_source(wiki):
+    """ Version of the data of a wiki, as stored along with its snapshots """
+    (csv, size, mtime_ns, bots) = cache_keys.get_dataframe_cache_key(wiki)
+    return [csv, size, mtime_ns, list(bots)]
+
+
+def get_precook_bounds(wiki):
+    """
+       Bounds of the networks precooked for a wiki, as the time slider gives
+       them: from its first month to the end of every month, and the whole wiki.
+    """
+    (time_index_beginning, time_index_end) = calculate_indices_all_months(wiki)
+    lower_bound = str(time_index_beginning.date[0])
+    return [('', '')] + [(lower_bound, str(upper_bound))
+                            for upper_bound in time_index_end.date]
+
+
+def read_data(wiki):
+    """
+       Return the revisions of a wiki ready for further calculations.
+
+       Dataframes are kept in an in-process LRU cache bounded by size instead
+       of in the flask cache, which would pickle them into redis on every
+       call. The dataframe is shared by every caller, so it must not be
+       modified.
+    """
+    key = cache_keys.get_dataframe_cache_key(wiki)
+    df = memory_cache.dataframes_cache.get(key)
+    if df is None:
+        df = get_dataframe_from_csv(wiki['data'], get_bots_ids(wiki))
+        memory_cache.dataframes_cache.set(key, df)
+    return df
+
+
+def get_derived_data(wiki, name, compute):
+    """
+       Return compute(read_data(wiki)), which is kept in memory along with
+       the wiki data, so that it's computed only once per version of that data.
+       The returned value is shared, so it must not be modified.
+    """
+    key = (name,) + cache_keys.get_dataframe_cache_key(wiki)
+    value = memory_cache.dataframes_cache.get(key)
+    if value is None:
+        value = compute(read_data(wiki))
+        memory_cache.dataframes_cache.set(key, value)
+    return value
+
+
+def get_first_edits(wiki):
+    """ First edit of every contributor of a wiki """
+    return get_derived_data(wiki, 'first_edits', interface.get_first_edits)
+
+
+def get_aggregated_edits(wiki):
+    """ Edits of a wiki aggregated by month, to build its networks """
+    return get_derived_data(wiki, 'aggregated_edits', interface.aggregate_edits)
+
+
 def get_available_wikis():
     wikis_json_file = open(os.path.join(data_dir, 'wikis.json'))
     wikis = json.load(wikis_json_file)
@@ -87,40 +401,17 @@ def get_last_entry(wiki):
     return wiki['last_edit']['date']
 
 
-def remove_bots_activity(df, bots_ids):
-    """
-       Filter out bots activity from pandas dataframe.
-
-       df -- data to be filtered. It'll be modified in place
-       bots_ids -- numpy array with the userid for every bot
-       Return a dataframe derived from the original but with all the
-          editions made by bot users removed
-    """
-    bots = np.array(bots_ids)
-    return df[~df['contributor_id'].isin(bots)]
-
-
-def prepare_data(df):
+def get_dataframe_from_csv(csv, bots_ids = ()):
     """
-       Prepare data in the correct input format for the metric
-       calculation functions.
-
-       df -- data to be prepared.
-       Modifies inplace the input data as well as returns that data
-       in the appropiate format for further calling of metric functions.
+       Return the pandas dataframe corresponding to a csv of the data dir,
+       sorted by timestamp and without the editions made by bots_ids.
+       The csv is only parsed the first time (or when it changes), then it's
+       read from the memory-mapped revision store shared by all workers.
     """
-    return df.sort_values(by='timestamp', inplace=True)
-
-
-def get_dataframe_from_csv(csv):
-    """ Read and parse a csv and return the corresponding pandas dataframe"""
 
     print('Loading csv for ' + csv)
     time_start_loading_one_csv = time.perf_counter()
-    df = pd.read_csv(os.path.join(data_dir, csv),
-                    delimiter=',', quotechar='|',
-                    index_col=False)
-    df['timestamp']=pd.to_datetime(df['timestamp'],format='%Y-%m-%dT%H:%M:%SZ')
+    df = revision_store.load_dataframe(csv, bots_ids)
     print('!!Loaded csv for ' + csv)
     time_end_loading_one_csv = time.perf_counter() - time_start_loading_one_csv
     print(' * [Timing] Loading {} : {} seconds'
@@ -129,13 +420,12 @@ def get_dataframe_from_csv(csv):
     return df
 
 
-def clean_up_bot_activity(df, wiki):
+def get_bots_ids(wiki):
     if 'bots' in wiki:
-        botsids = [bot['id'] for bot in wiki['bots']]
-        return remove_bots_activity(df, botsids)
+        return [bot['id'] for bot in wiki['bots']]
     else:
         warn("Warning: Missing information of bots ids. Note that graphs can be polluted of non-human activity.")
-    return df
+    return []
 
 
 def get_bot_names(wiki: dict) -> set:
@@ -15,6 +15,7 @@ import time
 import json
 from datetime import datetime
 import pandas as pd
+import numpy as np
 
 from flask import current_app
 import dash
@@ -33,7 +34,7 @@ from .networks.CytoscapeStylesheet import CytoscapeStylesheet
 from .networks.models.BaseNetwork import BaseNetwork
 from .main_view import RANKING_EMPTY_DATA, RANKING_EMPTY_HEADER, PAGE_SIZE, \
     inflate_switch_network_dialog, inflate_share_dialog, NO_DATA_NODE_STATS_HEADER, \
-    NO_DATA_NODE_STATS_BODY, DEFAULT_LEGEND_TEXT
+    NO_DATA_NODE_STATS_BODY, DEFAULT_LEGEND_TEXT, COSE_LAYOUT, PRESET_LAYOUT
 
 
 selection_params = {'wikis', 'network', 'lower_bound', 'upper_bound'}
@@ -56,6 +57,41 @@ def update_query_by_time(query_string, up_val, low_val):
     return urlencode(selection,  doseq=True)
 
 
+def get_plotted_metrics(network_code, dd_color, dd_size, clus_switch) -> list:
+    """ Node attrs needed to draw the network with the given controls """
+    metrics = []
+    node_metrics = net_factory.get_node_metrics(network_code)
+    for dd_metric in (dd_color, dd_size):
+        if dd_metric:
+            metrics.append(node_metrics[dd_metric]['key'])
+    if clus_switch:
+        metrics.append('cluster_color')
+    return metrics
+
+
+def is_same_network(cy_network, cy_metrics) -> bool:
+    """
+    Whether the metrics of update_network_metrics() belong to the nodes of
+    the network of update_network()
+    """
+    return bool(cy_metrics) and cy_metrics['bounds'] == cy_network.get('bounds')\
+        and cy_metrics['nodes'].get('id') == cy_network['network']['nodes'].get('id')
+
+
+def merge_network_metrics(cy_network, cy_metrics):
+    """
+    Return cy_network with the node metrics of update_network_metrics(), if
+    they belong to its nodes
+    """
+    if not is_same_network(cy_network, cy_metrics):
+        return cy_network
+
+    nodes = dict(cy_network['network']['nodes'], **cy_metrics['nodes'])
+    cy_network = dict(cy_network, **cy_metrics['ranges'])
+    cy_network['network'] = dict(cy_network['network'], nodes=nodes)
+    return cy_network
+
+
 def bind_callbacks(app):
 
     @app.callback(
@@ -79,11 +115,15 @@ def bind_callbacks(app):
     @app.callback(
         Output('network-ready', 'value'),
         [Input('dates-slider', 'value')],
-        [State('initial-selection', 'children'),
+        [State('dd-color-metric', 'value'),
+        State('dd-size-metric', 'value'),
+        State('tg-show-clusters', 'on'),
+        State('initial-selection', 'children'),
         State('dates-index', 'children'),
         State('dates-index-end', 'children')]
     )
-    def update_network(slider, selection_json, time_index_beg, time_index_end):
+    def update_network(slider, dd_color, dd_size, clus_switch, selection_json,
+        time_index_beg, time_index_end):
         if not slider:
             raise PreventUpdate()
 
@@ -107,13 +147,76 @@ def bind_callbacks(app):
         lower_bound = time_index_beg[slider[0]]
         upper_bound = time_index_end[slider[1]]
 
-        network = data_controller.get_network(wiki, network_code,
-                                            lower_bound, upper_bound)
+        # only the metrics needed to draw the network, the rest are
+        #  calculated when some other callback asks for them
+        metrics = get_plotted_metrics(network_code, dd_color, dd_size, clus_switch)
+        network = data_controller.get_network_with_metrics(wiki, network_code,
+                                            lower_bound, upper_bound, metrics,
+                                            with_layout = True)
 
         time_end_calculations = time.perf_counter() - time_start_calculations
         print(f' * [Timing] Network ready in {time_end_calculations} seconds')
 
-        return network.to_cytoscape_dict()
+        cy_network = network.to_cytoscape_dict()
+        cy_network['bounds'] = [lower_bound, upper_bound]
+        return cy_network
+
+
+    @app.callback(
+        Output('network-metrics', 'value'),
+        [Input('dd-color-metric', 'value'),
+        Input('dd-size-metric', 'value'),
+        Input('tg-show-clusters', 'on')],
+        [State('dates-slider', 'value'),
+        State('initial-selection', 'children'),
+        State('dates-index', 'children'),
+        State('dates-index-end', 'children')]
+    )
+    def update_network_metrics(dd_color, dd_size, clus_switch, slider,
+        selection_json, time_index_beg, time_index_end):
+        """
+        Load the node metrics picked in the controls, so that they're added
+        to the nodes already drawn instead of drawing the network again
+        """
+        if not slider:
+            raise PreventUpdate()
+
+        trigger = dash.callback_context
+        trigger = trigger.triggered[0]['prop_id'].split('.')[0]
+
+        time_index_beg = json.loads(time_index_beg)
+        time_index_end = json.loads(time_index_end)
+
+        selection = json.loads(selection_json)
+        wiki = selection['wikis'][0]
+        network_code = selection['network']
+
+        lower_bound = time_index_beg[slider[0]]
+        upper_bound = time_index_end[slider[1]]
+
+        metrics = get_plotted_metrics(network_code, dd_color, dd_size, clus_switch)
+        if not metrics:
+            raise PreventUpdate()
+
+        network = data_controller.get_network_nodes(wiki, network_code,
+                                    lower_bound, upper_bound, ['id'] + metrics)
+        cy_nodes = network.to_cytoscape_dict()
+
+        node_metrics = net_factory.get_node_metrics(network_code)
+        ranges = {}
+        for dd_metric in (dd_color, dd_size):
+            if dd_metric:
+                metric = node_metrics[dd_metric]
+                ranges[metric['max']] = cy_nodes[metric['max']]
+                ranges[metric['min']] = cy_nodes[metric['min']]
+
+        return {
+            'bounds': [lower_bound, upper_bound],
+            # tells update_stylesheet() which control asked for these metrics
+            'trigger': trigger,
+            'nodes': cy_nodes['network']['nodes'],
+            'ranges': ranges
+        }
 
 
     @app.callback(
@@ -126,16 +229,23 @@ def bind_callbacks(app):
         Input('dd-size-metric', 'value'),
         Input('cytoscape', 'tapEdgeData')],
         [State('network-ready', 'value'),
+        State('network-metrics', 'value'),
         State('initial-selection', 'children')]
     )
     def update_stylesheet(_, lb_switch, nodes_selc, clus_switch, dd_color,
-        dd_size, edge, cy_network, selection_json):
+        dd_size, edge, cy_network, cy_metrics, selection_json):
 
         if not cy_network:
             raise PreventUpdate()
 
         trigger = dash.callback_context
-        trigger = trigger.triggered[0]['prop_id'].split('.')[0]
+        prop_id = trigger.triggered[0]['prop_id']
+        trigger = prop_id.split('.')[0]
+        # new elements with the metrics asked by a control, see
+        #  update_network_metrics()
+        if prop_id == 'cytoscape.elements' and is_same_network(cy_network, cy_metrics):
+            trigger = cy_metrics['trigger']
+        cy_network = merge_network_metrics(cy_network, cy_metrics)
 
         selection = json.loads(selection_json)
         network_code = selection['network']
@@ -184,18 +294,36 @@ def bind_callbacks(app):
 
     @app.callback(
         [Output('cytoscape', 'zoom'),
-        Output('cytoscape', 'elements')],
+        Output('cytoscape', 'elements'),
+        Output('cytoscape', 'layout')],
         [Input('network-ready', 'value'),
         Input('reset_cyto', 'n_clicks'),
-        Input('dd-size-metric', 'value')]
+        Input('network-metrics', 'value')],
+        [State('cytoscape', 'zoom'),
+        State('cytoscape', 'layout')]
     )
-    def add_network_elements(cy_network, _1, _2):
+    def add_network_elements(cy_network, _1, cy_metrics, zoom, layout):
         if not cy_network:
             raise PreventUpdate()
         if 'network' not in cy_network:
             raise PreventUpdate()
 
-        return [1, cy_network['network']]
+        trigger = dash.callback_context
+        trigger = trigger.triggered[0]['prop_id'].split('.')[0]
+
+        if trigger == 'network-metrics':
+            if not is_same_network(cy_network, cy_metrics):
+                raise PreventUpdate()
+            # same elements with new data, the same zoom and the same layout
+            #  don't make cytoscape lay out the network again
+        else:
+            zoom = 1
+            # big networks come with the positions of their nodes already
+            layout = PRESET_LAYOUT if cy_network['network'].get('positions') else COSE_LAYOUT
+
+        cy_network = merge_network_metrics(cy_network, cy_metrics)
+        # (expanded here, see BaseNetwork.cytoscape_elements())
+        return [zoom, BaseNetwork.cytoscape_elements(cy_network), layout]
 
 
     @app.callback(
@@ -397,9 +525,8 @@ def bind_callbacks(app):
         lower_bound = time_index_beg[slider[0]]
         upper_bound = time_index_end[slider[1]]
 
-        network = data_controller.get_network(wiki, network_code, lower_bound, upper_bound)
-
-        (k, p_k) = network.get_degree_distribution()
+        (k, p_k) = data_controller.get_degree_distribution(wiki, network_code,
+                                                        lower_bound, upper_bound)
 
         x_scale = 'linear'
         y_scale = 'linear'
@@ -432,26 +559,39 @@ def bind_callbacks(app):
     @app.callback(
         Output('net-stats', 'children'),
         [Input('network-ready', 'value')],
-        [State('initial-selection', 'children')]
+        [State('dates-slider', 'value'),
+        State('initial-selection', 'children'),
+        State('dates-index', 'children'),
+        State('dates-index-end', 'children')]
     )
-    def update_network_stats(cy_network, selection_json):
-        if not cy_network:
+    def update_network_stats(cy_network, slider, selection_json, time_index_beg,
+        time_index_end):
+        if not cy_network or not slider:
             raise PreventUpdate()
 
         selection = json.loads(selection_json)
+        wiki = selection['wikis'][0]
         network_code = selection['network']
 
+        time_index_beg = json.loads(time_index_beg)
+        time_index_end = json.loads(time_index_end)
+        lower_bound = time_index_beg[slider[0]]
+        upper_bound = time_index_end[slider[1]]
+
         stats = net_factory.get_network_stats(network_code)
+        graph_attrs = data_controller.get_network_stats(wiki, network_code,
+                            lower_bound, upper_bound, list(stats.values()))
+
         child = []
         i = 0
         group = []
         for k, val in stats.items():
-            if val not in cy_network:
+            if val not in graph_attrs:
                 continue
 
             group.append(html.Div(children=[
                 html.P(f'{k}:'),
-                html.P(cy_network[val])
+                html.P(graph_attrs[val])
             ]))
 
             i += 1
@@ -494,8 +634,9 @@ def bind_callbacks(app):
             lower_bound = time_index_beg[slider[0]]
             upper_bound = time_index_end[slider[1]]
 
-            network = data_controller.get_network(wiki, network_code,
-                                                  lower_bound, upper_bound)
+            metrics = net_factory.get_metrics_to_plot(network_code)
+            network = data_controller.get_network_nodes(wiki, network_code,
+                                    lower_bound, upper_bound, ['label', metrics[metric]])
 
             df = network.get_metric_dataframe(metric)
 
@@ -565,9 +706,12 @@ def bind_callbacks(app):
         Input('dates-slider', 'value')],
         [State('initial-selection', 'children'),
         State('cytoscape', 'tapNode'),
-        State('old-state-node', 'value')]
+        State('old-state-node', 'value'),
+        State('dates-index', 'children'),
+        State('dates-index-end', 'children')]
     )
-    def update_node_info(user_info, _, selection_json, node, old_click):
+    def update_node_info(user_info, slider, selection_json, node, old_click,
+        time_index_beg, time_index_end):
         if not user_info:
             raise PreventUpdate()
 
@@ -575,11 +719,26 @@ def bind_callbacks(app):
             return NO_DATA_NODE_STATS_HEADER, NO_DATA_NODE_STATS_BODY, old_click
 
         selection = json.loads(selection_json)
+        wiki = selection['wikis'][0]
         network_code = selection['network']
         dict_header = net_factory.get_node_name(network_code)
         dic_info = net_factory.get_user_info(network_code)
         dic_metrics = net_factory.get_metrics_to_show(network_code)
 
+        # the elements of the network only have the metrics drawn, so get
+        #  the rest of the metrics of this node
+        time_index_beg = json.loads(time_index_beg)
+        time_index_end = json.loads(time_index_end)
+        lower_bound = time_index_beg[slider[0]]
+        upper_bound = time_index_end[slider[1]]
+        network = data_controller.get_network_nodes(wiki, network_code,
+                        lower_bound, upper_bound,
+                        ['id'] + list(dic_info.values()) + list(dic_metrics.values()))
+        ids = np.asarray(network.graph.vs['id']).astype(str)
+        matches = np.flatnonzero(ids == str(user_info['id']))
+        if len(matches):
+            user_info = dict(user_info, **network.graph.vs[int(matches[0])].attributes())
+
         header_key = list(dict_header.keys())[0]
         header = f'{header_key}: {user_info[dict_header[header_key]]}'
 
@@ -44,6 +44,32 @@ DEFAULT_LEGEND_TEXT['max_node_size'] = 'Select a metric to size'
 DEFAULT_LEGEND_TEXT['min_edge_size'] = 'A weak interaction in the wiki'
 DEFAULT_LEGEND_TEXT['max_edge_size'] = 'A strong interaction in the wiki'
 
+# layouts of the networks laid out by the browser and the ones which come
+#  with the positions of their nodes (see BaseNetwork.has_server_layout())
+COSE_LAYOUT = {
+    'name': 'cose',
+    'idealEdgeLength': 100,
+    'nodeOverlap': 20,
+    'refresh': 20,
+    'fit': True,
+    'padding': 30,
+    'randomize': False,
+    'componentSpacing': 100,
+    'nodeRepulsion': 400000,
+    'edgeElasticity': 100,
+    'nestingFactor': 5,
+    'gravity': 80,
+    'numIter': 1000,
+    'initialTemp': 200,
+    'coolingFactor': 0.95,
+    'minTemp': 1.0
+}
+PRESET_LAYOUT = {
+    'name': 'preset',
+    'fit': True,
+    'padding': 30
+}
+
 global debug
 debug = True if os.environ.get('FLASK_ENV') == 'development' else False
 
@@ -271,24 +297,7 @@ def cytoscape_component():
                 elements = [],
                 maxZoom = 1.75,
                 minZoom = 0.35,
-                layout = {
-                    'name': 'cose',
-                    'idealEdgeLength': 100,
-                    'nodeOverlap': 20,
-                    'refresh': 20,
-                    'fit': True,
-                    'padding': 30,
-                    'randomize': False,
-                    'componentSpacing': 100,
-                    'nodeRepulsion': 400000,
-                    'edgeElasticity': 100,
-                    'nestingFactor': 5,
-                    'gravity': 80,
-                    'numIter': 1000,
-                    'initialTemp': 200,
-                    'coolingFactor': 0.95,
-                    'minTemp': 1.0
-                },
+                layout = COSE_LAYOUT,
                 stylesheet = CytoscapeStylesheet.make_basic_stylesheet()
     )
     return html.Div(children=[cytoscape, no_data], className='cyto-dim')
@@ -504,6 +513,7 @@ def generate_main_content(wikis_arg, network_type_arg, query_string):
 
                 # Signal data
                 html.Div(id='network-ready', style={'display': 'none'}),
+                html.Div(id='network-metrics', style={'display': 'none'}),
                 html.Div(id='ready', style={'display': 'none'}),
                 html.Div(id='old-state-node', style={'display': 'none'}),
                 html.Div(id='highlight-node', style={'display': 'none'}),
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   network_cache.py
+
+   Descp: Compact format of the networks kept in the flask cache by
+   data_controller, instead of pickling whole BaseNetwork objects.
+
+   Every network is split into several cache entries under the same prefix,
+   so that every callback fetches just the pieces it needs:
+     - <prefix>/graph: the edges and the edge attrs.
+     - <prefix>/attrs: the number of vertices, the names of the vertex attrs
+       stored so far and the graph attrs (network stats included).
+     - <prefix>/node/<attr>: the values of a vertex attr.
+     - <prefix>/degree: the degree distribution.
+   Arrays are stored as .npy buffers compressed with zlib.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import numpy as np
+import hashlib
+import io
+import json
+import zlib
+
+# Bump this whenever the format changes, so old entries are not read.
+FORMAT_VERSION = 1
+# zlib level, the lowest ones are much faster and compress almost the same
+COMPRESSION_LEVEL = 1
+SOURCES_ARRAY = 'sources'
+TARGETS_ARRAY = 'targets'
+EDGE_PREFIX = 'e.'
+VALUES_ARRAY = 'values'
+
+
+def get_prefix(fingerprint: tuple) -> str:
+    """ Prefix of the entries of the network identified by fingerprint """
+    digest = hashlib.sha1(repr((FORMAT_VERSION,) + fingerprint).encode('utf-8')).hexdigest()
+    return f'network/{digest}'
+
+
+def get_graph_key(prefix: str) -> str:
+    return f'{prefix}/graph'
+
+
+def get_attrs_key(prefix: str) -> str:
+    return f'{prefix}/attrs'
+
+
+def get_node_key(prefix: str, attr: str) -> str:
+    return f'{prefix}/node/{attr}'
+
+
+def get_degree_key(prefix: str) -> str:
+    return f'{prefix}/degree'
+
+
+def pack(arrays: dict, meta: dict) -> bytes:
+    """
+    Pack some numpy arrays and a json-serializable dict of meta information
+    as a compressed stream of .npy buffers, the meta information first
+    """
+    buffer = io.BytesIO()
+    meta = dict(meta, version=FORMAT_VERSION, arrays=list(arrays.keys()))
+    np.save(buffer, np.array(json.dumps(meta)), allow_pickle=False)
+    for values in arrays.values():
+        np.save(buffer, values, allow_pickle=False)
+    return zlib.compress(buffer.getvalue(), COMPRESSION_LEVEL)
+
+
+def unpack(data: bytes) -> (dict, dict):
+    """
+    Return the arrays and meta information packed by pack(), or None if
+    they're packed in another format
+    """
+    buffer = io.BytesIO(zlib.decompress(data))
+    meta = json.loads(str(np.load(buffer, allow_pickle=False)))
+    if meta.get('version') != FORMAT_VERSION:
+        return None
+    arrays = {name: np.load(buffer, allow_pickle=False) for name in meta['arrays']}
+    return (arrays, meta)
+
+
+def pack_graph(graph) -> bytes:
+    """ Pack the edges and edge attrs of an igraph graph """
+    edges = np.array(graph.get_edgelist(), dtype=np.int32).reshape(-1, 2)
+    arrays = {SOURCES_ARRAY: edges[:, 0], TARGETS_ARRAY: edges[:, 1]}
+    for attr in graph.es.attributes():
+        arrays[EDGE_PREFIX + attr] = np.asarray(graph.es[attr])
+    meta = {
+        'n_vertices': graph.vcount(),
+        'edge_attrs': graph.es.attributes()
+    }
+    return pack(arrays, meta)
+
+
+def unpack_graph(data: bytes) -> (int, list, dict):
+    """
+       Return a tuple (n_vertices, edges, edge_attrs) with the graph packed
+       by pack_graph(), or None if it's packed in another format.
+    """
+    unpacked = unpack(data)
+    if unpacked is None:
+        return None
+    (arrays, meta) = unpacked
+    # (much faster than tolist() on an array of pairs)
+    edges = list(zip(arrays[SOURCES_ARRAY].tolist(), arrays[TARGETS_ARRAY].tolist()))
+    edge_attrs = {attr: arrays[EDGE_PREFIX + attr].tolist() for attr in meta['edge_attrs']}
+    return (meta['n_vertices'], edges, edge_attrs)
+
+
+def pack_column(values: list) -> bytes:
+    """ Pack the values of a vertex attr """
+    return pack({VALUES_ARRAY: np.asarray(values)}, {})
+
+
+def unpack_column(data: bytes) -> list:
+    """ Return the values packed by pack_column(), or None """
+    unpacked = unpack(data)
+    if unpacked is None:
+        return None
+    return unpacked[0][VALUES_ARRAY].tolist()
@@ -12,6 +12,8 @@
 
 from .models import available_networks as _available_networks
 from .models.networks_generator import factory_network as _factory_network
+from .models.BaseNetwork import BaseNetwork as _BaseNetwork
+from . import window as _window
 
 
 def get_available_networks():
@@ -21,3 +23,21 @@ def get_available_networks():
 
 def factory_network(selected_network_code, wiki):
     return _factory_network(selected_network_code, wiki)
+
+
+def get_first_edits(df):
+    """ First edit of every contributor of a wiki, used to build any network """
+    return _BaseNetwork.get_first_edits(df)
+
+
+def aggregate_edits(df):
+    """ Edits of a wiki aggregated by month, see window.py """
+    return _window.aggregate_edits(df)
+
+
+def get_window(edits, lower_bound, upper_bound):
+    """
+    Aggregated edits between the bounds, or None if the bounds are not
+    whole months.
+    """
+    return _window.get_window(edits, lower_bound, upper_bound)
@@ -5,16 +5,26 @@
 """
 
 import abc
-from datetime import datetime
+import os
 import pandas as pd
 from igraph import Graph, ClusterColoringPalette, VertexClustering,\
     WEAK
 from colormap.colors import rgb2hex
-from math import log1p as log
 import inequality_coefficients as ineq
 import numpy as np
 
 from .fix_dendrogram import fix_dendrogram
+from .approximations import pivot_betweenness, pivot_closeness
+
+# networks with more nodes or edges than these get estimates of the metrics
+#  which are too slow to compute exactly on big graphs
+LARGE_NETWORK_NODES = int(os.getenv('WIKICHRON_LARGE_NETWORK_NODES', 5000))
+LARGE_NETWORK_EDGES = int(os.getenv('WIKICHRON_LARGE_NETWORK_EDGES', 200000))
+# nodes sampled to estimate the betweenness and closeness of those networks
+ESTIMATE_PIVOTS = int(os.getenv('WIKICHRON_ESTIMATE_PIVOTS', 100))
+# networks with at least these nodes are laid out on the server instead of
+#  in the browser, 0 to always let the browser lay them out
+SERVER_LAYOUT_NODES = int(os.getenv('WIKICHRON_SERVER_LAYOUT_NODES', 1000))
 
 
 class BaseNetwork(metaclass=abc.ABCMeta):
@@ -81,9 +91,40 @@ class BaseNetwork(metaclass=abc.ABCMeta):
         'Gini of close.': 'gini_closeness',
         'Gini of deg.': 'gini_degree',
         'Gini of in-deg.': 'gini_indegree',
-        'Gini of out-deg.': 'gini_outdegree'
+        'Gini of out-deg.': 'gini_outdegree',
+        'Estimated': 'estimates'
     }
 
+    # significant digits of the floats sent to cytoscape
+    FLOAT_DIGITS = 6
+
+    # room of every node in the layouts calculated on the server, in pixels
+    LAYOUT_NODE_SPACING = 60
+
+    # max number of user pairs generated at once by count_co_editions()
+    PAIRS_PER_BATCH = 5000000
+
+    # methods which calculate the metrics, in the order they must be called,
+    #  with the node or graph attrs they set and the metrics they need
+    METRICS_CALCULATIONS = [
+        ('calculate_page_rank', ['page_rank'], []),
+        ('calculate_betweenness', ['betweenness'], []),
+        ('calculate_gini_betweenness', ['gini_betweenness'], ['betweenness']),
+        ('calculate_degree', ['degree', 'indegree', 'outdegree'], []),
+        ('calculate_gini_degree', ['gini_degree', 'gini_indegree', 'gini_outdegree'],
+            ['degree']),
+        ('calculate_assortativity_degree', ['assortativity_degree'], []),
+        ('calculate_communities', ['cluster', 'cluster_color', 'n_communities'], []),
+        ('calculate_density', ['density'], []),
+        ('calculate_components', ['components'], []),
+        ('calculate_closeness', ['closeness'], []),
+        ('calculate_gini_closeness', ['gini_closeness'], ['closeness']),
+        ('calculate_gini_article_edits', ['gini_article_edits'], []),
+        ('calculate_gini_talk_edits', ['gini_talk_edits'], []),
+        ('calculate_gini_user_talk_edits', ['gini_user_talks'], []),
+        ('calculate_layout', ['layout_x', 'layout_y'], [])
+    ]
+
 
     def __init__(self, is_directed = False, graph = {}, alias = ''):
         if not graph:
@@ -92,6 +133,9 @@ class BaseNetwork(metaclass=abc.ABCMeta):
             self.graph = graph
 
         self.alias = alias
+        # methods of METRICS_CALCULATIONS already called, some of them don't
+        #  set their attrs on some networks (e.g. closeness without weights)
+        self.calculations = set()
 
 
     @abc.abstractmethod
@@ -185,6 +229,152 @@ class BaseNetwork(metaclass=abc.ABCMeta):
             del metrics['Out-degree']
 
 
+    @staticmethod
+    def count_revisions(df: pd.DataFrame) -> np.ndarray:
+        """
+        Returns the number of revisions of every row of df, which is 1 unless
+        df holds aggregated edits (see window.py)
+        """
+        if 'revisions' in df.columns:
+            return df['revisions'].values
+        return np.ones(len(df.index), dtype=np.int64)
+
+
+    @staticmethod
+    def get_int_ids(values) -> np.ndarray:
+        """
+        Returns some ids (e.g. the contributor_id column) as int64, whether
+        they're a numpy array or a categorical of text, as the revision store
+        gives them
+        """
+        if isinstance(values, pd.Categorical):
+            (used, codes) = np.unique(values.codes, return_inverse=True)
+            return values.categories.values[used].astype(np.int64)[codes]
+        return values.astype(np.int64)
+
+
+    def set_graph(self, n_vertices: int, edges: list, vertex_attrs: dict,
+        edge_attrs: dict):
+        """
+        Replace the graph with a new one created in a single call
+
+        Parameters:
+            - n_vertices: number of vertices
+            - edges: list of (source, target) tuples of vertex indices
+            - vertex_attrs: dict with a list of values for every vertex attr
+            - edge_attrs: dict with a list of values for every edge attr
+        """
+        self.graph = Graph(n=n_vertices, edges=edges,
+            directed=self.graph.is_directed(),
+            vertex_attrs=vertex_attrs if n_vertices else {},
+            edge_attrs=edge_attrs if len(edges) else {})
+
+
+    def count_co_editions(self, page_codes: np.ndarray, user_codes: np.ndarray,
+        n_users: int) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        Count, for every pair of users, the number of different pages edited
+        by both of them
+
+        Parameters:
+            - page_codes: page code of every edit
+            - user_codes: user code of every edit, from 0 to n_users-1
+        Return:
+            Three arrays with the codes of the two users of every pair (the
+            lowest one first, sorted) and the number of pages they share.
+        """
+        # distinct (page, user), sorted by page and then by user
+        page_user = np.unique(page_codes.astype(np.int64) * n_users + user_codes)
+        pages = page_user // max(n_users, 1)
+        users = page_user % max(n_users, 1)
+
+        # every user is paired with the users after it in the same page
+        page_starts = np.flatnonzero(np.r_[True, pages[1:] != pages[:-1]]) \
+                        if len(pages) else np.empty(0, dtype=np.int64)
+        page_sizes = np.diff(np.r_[page_starts, len(pages)])
+        position = np.arange(len(pages)) - np.repeat(page_starts, page_sizes)
+        n_after = np.repeat(page_sizes, page_sizes) - position - 1
+        pairs_until = np.cumsum(n_after)
+
+        keys = []
+        weights = []
+        start = 0
+        while start < len(users):
+            pairs_before = pairs_until[start - 1] if start else 0
+            end = np.searchsorted(pairs_until, pairs_before + self.PAIRS_PER_BATCH,
+                                    side='right')
+            end = max(end, start + 1)
+
+            n_pairs = n_after[start:end]
+            left = np.repeat(np.arange(start, end), n_pairs)
+            right = left + 1 + np.arange(len(left)) \
+                        - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+            (batch_keys, batch_weights) = np.unique(
+                users[left] * n_users + users[right], return_counts=True)
+            keys.append(batch_keys)
+            weights.append(batch_weights)
+            start = end
+
+        if len(keys) > 1:
+            (keys, inverse) = np.unique(np.concatenate(keys), return_inverse=True)
+            weights = np.bincount(inverse, weights=np.concatenate(weights)).astype(np.int64)
+        elif keys:
+            (keys, weights) = (keys[0], weights[0])
+        else:
+            (keys, weights) = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+        return (keys // max(n_users, 1), keys % max(n_users, 1), weights)
+
+
+    def generate_co_edition_graph(self, df: pd.DataFrame, edits_key: str,
+        pages_key: str) -> int:
+        """
+        Generate an undirected graph where nodes are the editors of df and
+        an edge links two editors weighted by the number of different pages
+        both have edited. Nodes are sorted by their first edit.
+
+        Parameters:
+            - df: edits to build the network from
+            - edits_key: vertex attr with the number of edits of every user
+            - pages_key: vertex attr with the number of pages of every user
+        Return: the number of different pages in df
+        """
+        user_codes, user_ids = pd.factorize(self.get_int_ids(df['contributor_id'].values))
+        page_codes, page_ids = pd.factorize(df['page_id'].values)
+        n_users = len(user_ids)
+        user_ids = user_ids.astype(np.int64)
+
+        # Nodes
+        _, first_edits = np.unique(user_codes, return_index=True)
+        edits = np.bincount(user_codes, weights=self.count_revisions(df),
+                            minlength=n_users).astype(np.int64)
+        user_pages = np.unique(page_codes.astype(np.int64) * n_users + user_codes)
+        pages = np.bincount(user_pages % max(n_users, 1), minlength=n_users)
+
+        # Edges
+        (sources, targets, weights) = self.count_co_editions(page_codes, user_codes, n_users)
+        source_ids = user_ids[sources]
+        target_ids = user_ids[targets]
+
+        self.set_graph(n_users,
+            edges = list(zip(sources.tolist(), targets.tolist())),
+            vertex_attrs = {
+                'name': list(range(n_users)),
+                'id': user_ids.tolist(),
+                'label': df['contributor_name'].values[first_edits].tolist(),
+                edits_key: edits.tolist(),
+                pages_key: pages.tolist()
+            },
+            edge_attrs = {
+                'weight': weights.tolist(),
+                'id': ((source_ids << 32) + target_ids).tolist(),
+                'source': source_ids.tolist(),
+                'target': target_ids.tolist()
+            })
+
+        return len(page_ids)
+
+
     def add_graph_attrs(self):
         """
         Calculates and adds the graph attrs
@@ -195,70 +385,122 @@ class BaseNetwork(metaclass=abc.ABCMeta):
 
     def to_cytoscape_dict(self) -> dict:
         """
-        Transform a network to cytoscape dict
+        Transform a network to a compact cytoscape dict, with the elements
+        in columns instead of one dict per element (see cytoscape_elements())
 
         Return:
-            A dict with the cytoscape structure, graph attrs are keys, 
-            and the cyto. elements are in the key 'network'
+            A dict with the cytoscape structure, graph attrs are keys,
+            and the cyto. elements are in the key 'network', as a dict
+            with a list of values of every attr of the nodes (key 'nodes')
+            and of the edges (key 'edges'), plus the lists of 'x' and 'y'
+            of the nodes (key 'positions') if the network is laid out on
+            the server, empty otherwise
         """
         di_net = {}
-        network = []
         metrics_to_plot = [val for key, val in self.NODE_METRICS_TO_PLOT.items()]
         metrics_to_plot = metrics_to_plot + [val for key, val in self.EDGE_METRICS_TO_PLOT.items()]
         log_keys = {metric['key'] for metric in metrics_to_plot if 'log' in metric.keys()}
 
-        # node attrs
-        for node in self.graph.vs:
-            data = {'data': {}}
-            for attr in self.graph.vs.attributes():
-                val = node[attr]
-                if attr in log_keys:
-                    data['data'][f'{attr}_log'] = int(log(val)*100)
-
-                data['data'][attr] = val
-
-            network.append(data)
-
-        # edge attrs
-        for edge in self.graph.es:
-            data = {'data': {}}
-            for attr in self.graph.es.attributes():
-                val = edge[attr]
-                if attr == 'id':
-                    continue
-                if attr in log_keys:
-                    data['data'][f'{attr}_log'] = int(log(val)*100)
-
-                data['data'][attr] = val
-            network.append(data)
+        # node and edge attrs, edges keep the default ids of cytoscape
+        positions = {}
+        if self.has_server_layout() and 'layout_x' in self.graph.vs.attributes():
+            positions = {'x': self.graph.vs['layout_x'], 'y': self.graph.vs['layout_y']}
+        nodes = self.get_attr_columns(self.graph.vs, log_keys,
+                                        exclude={'layout_x', 'layout_y'})
+        edges = self.get_attr_columns(self.graph.es, log_keys, exclude={'id'})
 
         # graph attrs
         for attr in self.graph.attributes():
             di_net[attr] = self.graph[attr]
 
-        # add max min metrics to plot
-        _max = 0
-        _min = 0
+        # add max min metrics to plot, 0 for the metrics not calculated
         for metric in metrics_to_plot:
-            if metric['key'] in self.graph.vs.attributes() and len(self.graph.vs[metric['key']]):
-                _max = max(self.graph.vs[metric['key']])
-                _min = min(self.graph.vs[metric['key']])
-            elif metric['key'] in self.graph.es.attributes() and len(self.graph.es[metric['key']]):
-                _max = max(self.graph.es[metric['key']])
-                _min = min(self.graph.es[metric['key']])
-
-            if 'log' in metric.keys():
-                _max = int(log(_max)*100)
-                _min = int(log(_min)*100)
+            _max = 0
+            _min = 0
+            key = metric['log'] if 'log' in metric else metric['key']
+            for columns in (nodes, edges):
+                if key in columns and len(columns[key]):
+                    values = columns[key]
+                    _max = np.nanmax(values).item()
+                    _min = np.nanmin(values).item()
+                    break
 
             di_net[metric['max']] = _max
             di_net[metric['min']] = _min
 
-
-        di_net['network'] = network
+        di_net['network'] = {
+            'nodes': {attr: list(values) if isinstance(values, list) else values.tolist()
+                        for attr, values in nodes.items()},
+            'edges': {attr: list(values) if isinstance(values, list) else values.tolist()
+                        for attr, values in edges.items()},
+            'positions': positions
+        }
         return di_net
 
 
+    def get_attr_columns(self, sequence, log_keys: set, exclude = ()) -> dict:
+        """
+        Return a dict with the values of every attr of a vertex or edge
+        sequence, as numpy arrays for the numeric attrs, plus an '<attr>_log'
+        array for the attrs in log_keys. Floats are rounded to FLOAT_DIGITS
+        significant digits, which is all that the plots need.
+        """
+        columns = {}
+        if not len(sequence):
+            return columns
+
+        for attr in sequence.attributes():
+            if attr in exclude:
+                continue
+            values = sequence[attr]
+            if np.asarray(values).dtype.kind not in 'biuf':
+                columns[attr] = values
+                continue
+            values = np.asarray(values)
+            if attr in log_keys:
+                with np.errstate(invalid='ignore'):
+                    logs = np.log1p(values.astype(np.float64)) * 100
+                columns[f'{attr}_log'] = np.trunc(np.nan_to_num(logs)).astype(np.int64)
+            if values.dtype.kind == 'f':
+                values = self.round_significant(values, self.FLOAT_DIGITS)
+            columns[attr] = values
+
+        return columns
+
+
+    @staticmethod
+    def round_significant(values: np.ndarray, digits: int) -> np.ndarray:
+        """ Round every value to a number of significant digits """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            magnitudes = np.floor(np.log10(np.abs(values)))
+        magnitudes[~np.isfinite(magnitudes)] = 0
+        scales = np.power(10.0, digits - 1 - magnitudes)
+        return np.round(values * scales) / scales
+
+
+    @staticmethod
+    def cytoscape_elements(cy_network: dict) -> list:
+        """
+        Expand the elements of a dict returned by to_cytoscape_dict() to
+        the list of elements expected by cytoscape.
+
+        Dash 0.39 has no clientside callbacks, so this runs on the server and
+        the elements are still sent to the browser one dict per element; only
+        the network-ready payload (and its callback states) is compact.
+        """
+        elements = []
+        for columns in (cy_network['network']['nodes'], cy_network['network']['edges']):
+            keys = list(columns.keys())
+            elements.extend({'data': dict(zip(keys, row))}
+                                for row in zip(*columns.values()))
+
+        positions = cy_network['network'].get('positions')
+        if positions:
+            for (node, x, y) in zip(elements, positions['x'], positions['y']):
+                node['position'] = {'x': x, 'y': y}
+        return elements
+
+
     def write_gml(self, file: str):
         """
         Writes a gml file
@@ -268,6 +510,33 @@ class BaseNetwork(metaclass=abc.ABCMeta):
         self.graph.write(f=file, format='gml')
 
 
+    def is_large(self) -> bool:
+        """
+        Whether some metrics of this network are estimated instead of
+        computed exactly, see LARGE_NETWORK_NODES and LARGE_NETWORK_EDGES
+        """
+        return self.graph.vcount() > LARGE_NETWORK_NODES or\
+            self.graph.ecount() > LARGE_NETWORK_EDGES
+
+
+    def has_server_layout(self) -> bool:
+        """
+        Whether this network is drawn with the positions of calculate_layout()
+        instead of being laid out by the browser, see SERVER_LAYOUT_NODES
+        """
+        return SERVER_LAYOUT_NODES > 0 and self.graph.vcount() >= SERVER_LAYOUT_NODES
+
+
+    def add_estimate(self, description: str):
+        """
+        Adds to the graph attr 'estimates' a description of an estimated metric,
+        so that the UI tells which metrics are not exact
+        """
+        if 'estimates' in self.graph.attributes():
+            description = f"{self.graph['estimates']}, {description}"
+        self.graph['estimates'] = description
+
+
     def calculate_page_rank(self):
         """
         Calculates the network pageRank
@@ -286,8 +555,12 @@ class BaseNetwork(metaclass=abc.ABCMeta):
         """
         if not 'betweenness' in self.graph.vs.attributes():
             weight = 'weight' if 'weight' in self.graph.es.attributes() else None
-            bet = self.graph.betweenness(directed=self.graph.is_directed(), 
-                weights = weight)
+            if self.is_large():
+                bet = pivot_betweenness(self.graph, ESTIMATE_PIVOTS, weights = weight)
+                self.add_estimate(f'betweenness ({ESTIMATE_PIVOTS} pivots)')
+            else:
+                bet = self.graph.betweenness(directed=self.graph.is_directed(), 
+                    weights = weight)
 
             self.graph.vs['betweenness'] = list(map(lambda x: float(f"{x:.4f}"), bet))
 
@@ -340,13 +613,23 @@ class BaseNetwork(metaclass=abc.ABCMeta):
         """
         if not 'n_communities' in self.graph.attributes():
             weight = 'weight' if 'weight' in self.graph.es.attributes() else None
-            # igraph bug: https://github.com/igraph/python-igraph/issues/17
-            try:
-                v_d = self.graph.community_walktrap(weights=weight, steps=6)
-                mod = v_d.as_clustering()
-            except:
-                fix_dendrogram(self.graph, v_d)
-                mod = v_d.as_clustering()
+            if self.is_large():
+                # walktrap takes too long, multilevel (Louvain) is much faster.
+                #  It only works on undirected graphs, but walktrap ignores
+                #  the direction of the edges too.
+                graph = self.graph
+                if graph.is_directed():
+                    graph = graph.as_undirected(combine_edges='sum')
+                mod = graph.community_multilevel(weights=weight)
+                self.add_estimate('clusters (multilevel)')
+            else:
+                # igraph bug: https://github.com/igraph/python-igraph/issues/17
+                try:
+                    v_d = self.graph.community_walktrap(weights=weight, steps=6)
+                    mod = v_d.as_clustering()
+                except:
+                    fix_dendrogram(self.graph, v_d)
+                    mod = v_d.as_clustering()
 
             self.graph.vs['cluster'] = mod.membership
             self.graph['n_communities'] = len(mod)
@@ -387,7 +670,11 @@ class BaseNetwork(metaclass=abc.ABCMeta):
             in self.graph.es.attributes():
 
             rounder = lambda x: float(f"{x:.4f}")
-            closeness = self.graph.closeness(weights='weight')
+            if self.is_large():
+                closeness = pivot_closeness(self.graph, ESTIMATE_PIVOTS, weights='weight')
+                self.add_estimate(f'closeness ({ESTIMATE_PIVOTS} pivots)')
+            else:
+                closeness = self.graph.closeness(weights='weight')
             closeness = list(map(rounder, closeness))
             self.graph.vs['closeness'] = closeness
 
@@ -436,24 +723,94 @@ class BaseNetwork(metaclass=abc.ABCMeta):
             self.graph['gini_user_talks'] = 'nan'
 
 
-    def calculate_metrics(self):
+    def calculate_layout(self):
         """
-        A method which calculate the available metrics 
+        Calculates the positions of the nodes with the grid variant of the
+        Fruchterman-Reingold layout, which takes a few seconds even for tens
+        of thousands of nodes, scaled so that every node has about
+        LAYOUT_NODE_SPACING pixels around it
         """
-        self.calculate_page_rank()
-        self.calculate_betweenness()
-        self.calculate_gini_betweenness()
-        self.calculate_degree()
-        self.calculate_gini_degree()
-        self.calculate_assortativity_degree()
-        self.calculate_communities()
-        self.calculate_density()
-        self.calculate_components()
-        self.calculate_closeness()
-        self.calculate_gini_closeness()
-        self.calculate_gini_article_edits()
-        self.calculate_gini_talk_edits()
-        self.calculate_gini_user_talk_edits()
+        if 'layout_x' not in self.graph.vs.attributes():
+            weight = 'weight' if 'weight' in self.graph.es.attributes() else None
+            coords = np.zeros((self.graph.vcount(), 2))
+            if self.graph.vcount() > 1:
+                # start from the same positions instead of the random ones of
+                #  igraph, so that the same network is drawn about the same way
+                #  every time (igraph still jitters the nodes a little, and
+                #  seeding its global RNG would race with other threads)
+                seed = np.random.RandomState(0).uniform(
+                            high = np.sqrt(self.graph.vcount()),
+                            size = (self.graph.vcount(), 2))
+                layout = self.graph.layout_fruchterman_reingold(weights = weight,
+                            grid = True, seed = seed.tolist())
+                coords = np.array(layout.coords, dtype=np.float64).reshape(-1, 2)
+                coords -= coords.min(axis=0)
+                side = coords.max()
+                if side > 0:
+                    coords *= np.sqrt(self.graph.vcount()) * self.LAYOUT_NODE_SPACING / side
+
+            self.graph.vs['layout_x'] = np.round(coords[:, 0]).astype(int).tolist()
+            self.graph.vs['layout_y'] = np.round(coords[:, 1]).astype(int).tolist()
+
+
+    @classmethod
+    def get_metric_attrs(cls) -> list:
+        """
+        Returns the node and graph attrs set by the methods in
+        METRICS_CALCULATIONS
+        """
+        return [attr for (_, outputs, _) in cls.METRICS_CALCULATIONS
+                    for attr in outputs] + ['estimates']
+
+
+    @classmethod
+    def get_required_metrics(cls, metrics: list = None) -> set:
+        """
+        Returns the given metrics plus the ones they need, or None for all
+        """
+        if metrics is None:
+            return None
+        required = set(metrics)
+        for (_, outputs, requires) in reversed(cls.METRICS_CALCULATIONS):
+            if required.intersection(outputs):
+                required.update(requires)
+        return required
+
+
+    def get_pending_calculations(self, metrics: list = None,
+        calculated: set = None) -> list:
+        """
+        Returns the names of the methods in METRICS_CALCULATIONS which have
+        to be called to get the given metrics and the ones they need, or all
+        the metrics if None. Methods already called or whose attrs are
+        already set are not called again, and the layout is only calculated
+        for the networks laid out on the server (see has_server_layout()).
+
+        Parameters:
+            - calculated: names of the attrs set and methods called so far,
+                those of this network if None
+        """
+        required = self.get_required_metrics(metrics)
+        if calculated is None:
+            calculated = set(self.graph.vs.attributes()) | \
+                set(self.graph.attributes()) | self.calculations
+
+        if not self.has_server_layout():
+            calculated = calculated | {'calculate_layout'}
+
+        return [method for (method, outputs, _) in self.METRICS_CALCULATIONS
+                    if (required is None or required.intersection(outputs))
+                    and method not in calculated and calculated.isdisjoint(outputs)]
+
+
+    def calculate_metrics(self, metrics: list = None):
+        """
+        Calculates the given metrics (node or graph attrs set by the methods
+        in METRICS_CALCULATIONS), or all the available metrics if None
+        """
+        for method in self.get_pending_calculations(metrics):
+            getattr(self, method)()
+            self.calculations.add(method)
 
 
     def get_degree_distribution(self) -> (list, list):
@@ -484,15 +841,34 @@ class BaseNetwork(metaclass=abc.ABCMeta):
         pass
 
 
-    def build_network(self, df: pd.DataFrame, lower_bound: str, upper_bound: str):
+    def build_network(self, df: pd.DataFrame, lower_bound: str, upper_bound: str,
+        first_edits: pd.DataFrame = None):
         """
-        This method is used to generate the network and its metrics and attrs
+        This method is used to generate the network and its attrs. The metrics
+        are calculated later, on demand, with calculate_metrics()
+
+        Parameters:
+            - first_edits: the result of get_first_edits(df), if already
+                computed for this df
         """
         dff = self.filter_by_time(df, lower_bound, upper_bound)
         dff = self.filter_anonymous(dff)
+        if first_edits is None:
+            first_edits = self.get_first_edits(df)
+        self.build_network_from_edits(dff, first_edits)
+
+
+    def build_network_from_edits(self, dff: pd.DataFrame, first_edits: pd.DataFrame):
+        """
+        Generate the network and its attrs from the edits already filtered by
+        time, either revisions or aggregated edits (see window.py)
+
+        Parameters:
+            - dff: edits to build the network from, in order of revision
+            - first_edits: the result of get_first_edits() for the whole wiki
+        """
         self.generate_from_pandas(dff)
-        self.calculate_metrics()
-        self.calculate_abs_longevity(df)
+        self.calculate_abs_longevity(first_edits)
         self.add_others(dff)
         self.add_graph_attrs()
 
@@ -576,40 +952,52 @@ class BaseNetwork(metaclass=abc.ABCMeta):
         else:
             raise Exception(f'type: {type_e} is not defined')
 
-        mapper = {self.graph.vs[i]['label']: i for i in range(self.graph.vcount())}
-        edits = [0 for i in range(self.graph.vcount())]
-        pages = [set() for _ in range(self.graph.vcount())]
-        for _, row in dff.iterrows():
-            if row['contributor_name'] in mapper.keys():
-                edits[mapper[row['contributor_name']]] += 1
-                pages[mapper[row['contributor_name']]].add(int(row['page_id']))
+        # edits and distinct pages per contributor, in the order of the vertices
+        dff = dff.assign(revisions=self.count_revisions(dff))
+        by_contributor = dff.groupby('contributor_name', observed=True)\
+                            .agg({'revisions': 'sum', 'page_id': 'nunique'})
+        # (a categorical index can't be reindexed by labels out of its categories)
+        by_contributor.index = by_contributor.index.astype(object)
+        by_contributor = by_contributor.reindex(self.graph.vs['label'], fill_value=0)
+        edits = by_contributor['revisions'].tolist()
+        pages = by_contributor['page_id'].tolist()
 
-        sizer = lambda x: len(x)
-        pages = list(map(sizer, pages))
         self.graph.vs[f"{type_e}s"] = pages
         self.graph.vs[key] = edits
 
 
-    def calculate_abs_longevity(self, df: pd.DataFrame):
+    @staticmethod
+    def get_first_edits(df: pd.DataFrame) -> pd.DataFrame:
         """
-        Calculates the birth of all the vertex without filter_by_time 
+        Returns a dataframe indexed by contributor name with the timestamp
+        of the first edit of every contributor. df must be ordered by timestamp
         """
-        inverter = lambda x: 1/x*1000
-        max_date = 0
-        for node in self.graph.vs:
-            dff = df[node['label'] == df['contributor_name']]
-            if not dff.empty:
-                row = dff.iloc[0]
-                node['birth'] = datetime.strftime(row['timestamp'], "%d/%b/%Y")
-                node['birth_value'] = int(datetime.strptime(
-                    str(row['timestamp']), "%Y-%m-%d %H:%M:%S").strftime('%s'))
+        first = df.drop_duplicates('contributor_name')
+        return pd.DataFrame({'timestamp': first['timestamp'].values},
+                    index=pd.Index(first['contributor_name'].values, name='contributor_name'))
 
-                # this is a weak solution to avoid users with no activity
-                if max_date < node['birth_value']:
-                    max_date = node['birth_value']
-            else:
-                node['birth'] = 'Not available'
-                node['birth_value'] = max_date
-        
-        if 'birth_value' in self.graph.vs.attributes():
-            self.graph.vs['birth_value'] = list(map(inverter, self.graph.vs['birth_value']))
\ No newline at end of file
+
+    def calculate_abs_longevity(self, first_edits: pd.DataFrame):
+        """
+        Calculates the birth of all the vertex without filter_by_time
+
+        Parameters:
+            - first_edits: first edit of every contributor of the whole wiki,
+                as returned by get_first_edits()
+        """
+        if not self.graph.vcount():
+            return
+
+        births = first_edits['timestamp'].reindex(self.graph.vs['label'])
+        available = births.notna().values
+        birth_values = np.where(available,
+            births.values.astype('datetime64[s]').astype(np.int64), 0)
+
+        # this is a weak solution to avoid users with no activity: they take
+        #  the latest birth of the nodes before them
+        birth_values = np.where(available, birth_values,
+                                np.maximum.accumulate(birth_values))
+
+        self.graph.vs['birth'] = births.dt.strftime("%d/%b/%Y")\
+                                    .where(available, 'Not available').tolist()
+        self.graph.vs['birth_value'] = [1/x*1000 if x else 0 for x in birth_values.tolist()]
@@ -9,7 +9,7 @@
 """
 
 import pandas as pd
-import re
+import numpy as np
 
 from .BaseNetwork import BaseNetwork
 from ...data_controller import get_bot_names
@@ -98,89 +98,79 @@ class UserTalkNetwork(BaseNetwork):
 
 
     def generate_from_pandas(self, df):
-        user_per_page = {}
-        mapper_v = {}
-        count_v = 0
-        count_e = 0
-
         bots_name = get_bot_names(self.alias)
         dff = self.remove_non_user_talk_data(df)
-
-        for _, r in dff.iterrows():
-            ################ Filter ################
-            # remove "User Page:"
-            page_t = re.sub('^.+:', '', r['page_title'])
-            # remove everyhing after slash
-            page_t = re.sub('[\/].*', '', page_t)
-            # filter anonymous user talk page for ipv4 or ipv6 (i.e it contains "." or ":")
-            if re.search('\.|\:', page_t):
-                continue
-            # filter bots pages
-            if page_t in bots_name:
-                continue
-            ########################################
-
-            # Nodes
-            if not r['contributor_name'] in mapper_v:
-                self.graph.add_vertex(count_v)
-                mapper_v[r['contributor_name']] = count_v
-                self.graph.vs[count_v]['id'] = int(r['contributor_id'])
-                self.graph.vs[count_v]['label'] = r['contributor_name']
-                self.graph.vs[count_v]['own_u_edits'] = 0
-                self.graph.vs[count_v]['user_talks'] = {int(r['page_id'])}
-                count_v += 1
-
-            # count diferent pages
-            self.graph.vs[mapper_v[r['contributor_name']]]['user_talks'].add(int(r['page_id']))
-
-            if page_t == r['contributor_name']:
-                self.graph.vs[mapper_v[page_t]]['own_u_edits'] += 1
-            else:
-                # A page gets serveral contributors
-                if not page_t in user_per_page:
-                    user_per_page[page_t] = {r['contributor_name']: 1}
-                else:
-                    if r['contributor_name'] in user_per_page[page_t]:
-                        user_per_page[page_t][r['contributor_name']] += 1
-                    else:
-                        user_per_page[page_t][r['contributor_name']] = 1
+        user_talk_edits = int(self.count_revisions(dff).sum())
+
+        ################ Filter ################
+        # remove "User Page:"
+        page_t = dff['page_title'].str.replace('^.+:', '', regex=True)
+        # remove everyhing after slash
+        page_t = page_t.str.replace('[\/].*', '', regex=True)
+        # filter anonymous user talk page for ipv4 or ipv6 (i.e it contains "." or ":")
+        #  and bots pages
+        selected = ~page_t.str.contains('\.|\:', na=True) & ~page_t.isin(bots_name)
+        page_t = page_t.values[selected.values]
+        dff = dff[selected.values]
+        revisions = self.count_revisions(dff)
+        ########################################
+
+        # Nodes, in order of first edit
+        users = dff['contributor_name'].values
+        user_codes, user_names = pd.factorize(users)
+        n_users = len(user_names)
+        _, first_edits = np.unique(user_codes, return_index=True)
+        user_ids = self.get_int_ids(dff['contributor_id'].values[first_edits])
+
+        # count diferent pages
+        user_pages = np.unique(dff['page_id'].values.astype(np.int64) * max(n_users, 1) + user_codes)
+        user_talks = np.bincount(user_pages % max(n_users, 1), minlength=n_users)
+
+        own = page_t == users
+        own_u_edits = np.bincount(user_codes[own], weights=revisions[own],
+                                    minlength=n_users).astype(np.int64)
+
+        # A page gets serveral contributors: count the edits of every
+        #  (page, user), keeping pages and their users in order of first edit
+        page_codes, page_names = pd.factorize(page_t[~own])
+        pair_codes, pairs = pd.factorize(page_codes.astype(np.int64) * max(n_users, 1) + user_codes[~own])
+        weights = np.bincount(pair_codes, weights=revisions[~own],
+                                minlength=len(pairs)).astype(np.int64)
+        order = np.argsort(pairs // max(n_users, 1), kind='mergesort')
+        (pairs, weights) = (pairs[order], weights[order])
+
+        # it could be that an user has no edits but someone edits in its user-talk
+        page_vertices = pd.Index(user_names).get_indexer(page_names)
+        new_vertices = page_vertices < 0
+        n_new = int(new_vertices.sum())
+        page_vertices[new_vertices] = n_users + np.arange(n_new)
+        max_id = user_ids.max() + 1 if n_users else 1
+        ids = np.concatenate([user_ids, max_id + np.arange(n_new, dtype=np.int64)])
 
         # Edges
-        if self.graph.vcount():
-            max_id = max(self.graph.vs['id']) + 1
-        else:
-            max_id = 1
-
-        for page_name, p_dict in user_per_page.items():
-            for user, edits in p_dict.items():
-                # it could be that an user has no edits but someone edits in its user-talk
-                if page_name not in mapper_v:
-                    self.graph.add_vertex(count_v)
-                    mapper_v[page_name] = count_v
-                    self.graph.vs[count_v]['id'] = max_id
-                    max_id += 1
-                    self.graph.vs[count_v]['label'] = page_name
-                    self.graph.vs[count_v]['own_u_edits'] = 0
-                    self.graph.vs[count_v]['user_talks'] = set()
-                    count_v += 1
-
-                self.graph.add_edge(mapper_v[user], mapper_v[page_name])
-                source = self.graph.vs[mapper_v[user]]['id']
-                target = self.graph.vs[mapper_v[page_name]]['id']
-                edge_id = (source << 32) + target
-                self.graph.es[count_e]['id'] = edge_id
-                self.graph.es[count_e]['weight'] = edits
-                self.graph.es[count_e]['source'] = source
-                self.graph.es[count_e]['target'] = target
-                count_e += 1
-
-        # total pages per user
-        if 'user_talks' in self.graph.vs.attributes():
-            user_talks = [len(node['user_talks']) for node in self.graph.vs]
-            self.graph.vs['user_talks'] = user_talks
+        sources = pairs % max(n_users, 1)
+        targets = page_vertices[pairs // max(n_users, 1)]
+        source_ids = ids[sources]
+        target_ids = ids[targets]
+
+        self.set_graph(n_users + n_new,
+            edges = list(zip(sources.tolist(), targets.tolist())),
+            vertex_attrs = {
+                'name': list(range(n_users + n_new)),
+                'id': ids.tolist(),
+                'label': list(user_names) + list(page_names[new_vertices]),
+                'own_u_edits': own_u_edits.tolist() + [0] * n_new,
+                'user_talks': user_talks.tolist() + [0] * n_new
+            },
+            edge_attrs = {
+                'id': ((source_ids << 32) + target_ids).tolist(),
+                'weight': weights.tolist(),
+                'source': source_ids.tolist(),
+                'target': target_ids.tolist()
+            })
 
         # total pages
-        self.graph['wiki_user_talk_edits'] = len(dff.index)
+        self.graph['wiki_user_talk_edits'] = user_talk_edits
 
 
     def get_metric_dataframe(self, metric):
@@ -0,0 +1,147 @@
+"""
+ Estimates of the network metrics which are too expensive to compute
+ exactly on large graphs.
+
+ Author: agent <agent@local>
+ Date: 18/Oct/2026
+ Distributed under the terms of the GPLv3 license.
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+# pivots whose shortest paths are computed at once
+PIVOTS_PER_BATCH = 16
+
+
+def get_adjacency(graph, weights = None, directed = True) -> (np.ndarray,
+    np.ndarray, np.ndarray):
+    """
+    Return the arcs of the graph as (sources, targets, lengths) arrays,
+    with both directions of every edge if the graph is undirected or
+    directed is False
+    """
+    edges = np.array(graph.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+    if weights:
+        lengths = np.array(graph.es[weights], dtype=np.float64)
+    else:
+        lengths = np.ones(len(edges), dtype=np.float64)
+
+    if graph.is_directed() and directed:
+        return (edges[:, 0], edges[:, 1], lengths)
+
+    sources = np.concatenate([edges[:, 0], edges[:, 1]])
+    targets = np.concatenate([edges[:, 1], edges[:, 0]])
+    lengths = np.concatenate([lengths, lengths])
+    # reciprocal edges of a directed graph become parallel arcs, keep the
+    #  shortest one (a sparse matrix would add them up)
+    order = np.lexsort((lengths, targets, sources))
+    (sources, targets, lengths) = (sources[order], targets[order], lengths[order])
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    return (sources[first], targets[first], lengths[first])
+
+
+def sample_pivots(n: int, n_pivots: int, seed: int) -> np.ndarray:
+    return np.random.RandomState(seed).choice(n, min(n_pivots, n), replace=False)
+
+
+def propagate(arcs: csr_matrix, start: np.ndarray) -> np.ndarray:
+    """
+    Return the x such that x = start + arcs * x, where arcs is the matrix of
+    a DAG, by propagating start along the arcs until nothing changes
+    """
+    x = start
+    for _ in range(arcs.shape[0] + 1):
+        new_x = start + arcs.dot(x)
+        if np.array_equal(new_x, x):
+            break
+        x = new_x
+    return x
+
+
+def pivot_betweenness(graph, n_pivots: int, weights = None, seed = 0) -> np.ndarray:
+    """
+    Estimate the betweenness of every vertex from the shortest paths that
+    start in a random sample of n_pivots vertices (Brandes & Pich, 2007),
+    in the same scale as Graph.betweenness(). With as many pivots as
+    vertices, it's the exact betweenness.
+
+    For every pivot s, the arcs on shortest paths from s form a DAG, so the
+    number of shortest paths sigma and the dependencies delta of Brandes
+    algorithm are the solutions of:
+        sigma = e_s + DAG^T * sigma
+        z = 1/sigma + DAG * z,   delta = sigma * z - 1
+    which are found by propagating along the DAG with sparse products.
+
+    Parameters:
+        - n_pivots: number of pivots, the more the more accurate.
+        - weights: name of the edge attr with the length of the edges.
+        - seed: seed of the sample, so the same graph always gets the same
+            estimate.
+    """
+    n = graph.vcount()
+    betweenness = np.zeros(n, dtype=np.float64)
+    if not n:
+        return betweenness
+
+    (sources, targets, lengths) = get_adjacency(graph, weights)
+    adjacency = csr_matrix((lengths, (sources, targets)), shape=(n, n))
+    pivots = sample_pivots(n, n_pivots, seed)
+
+    for batch in range(0, len(pivots), PIVOTS_PER_BATCH):
+        batch_pivots = pivots[batch:batch+PIVOTS_PER_BATCH]
+        all_distances = dijkstra(adjacency, directed=True, indices=batch_pivots)
+
+        for (pivot, distances) in zip(batch_pivots, all_distances):
+            reachable = np.isfinite(distances)
+            on_paths = reachable[sources] & np.isclose(distances[sources] + lengths,
+                                                    distances[targets], rtol=1e-9, atol=0)
+            dag = csr_matrix((np.ones(np.count_nonzero(on_paths)),
+                            (sources[on_paths], targets[on_paths])), shape=(n, n))
+
+            pivot_vector = np.zeros(n)
+            pivot_vector[pivot] = 1
+            sigma = propagate(dag.T.tocsr(), pivot_vector)
+            inverse_sigma = np.zeros(n)
+            inverse_sigma[reachable] = 1 / sigma[reachable]
+            delta = sigma * propagate(dag, inverse_sigma) - 1
+            delta[~reachable] = 0
+            delta[pivot] = 0
+            betweenness += delta
+
+    betweenness *= n / len(pivots)
+    if not graph.is_directed():
+        betweenness /= 2
+    return betweenness
+
+
+def pivot_closeness(graph, n_pivots: int, weights = None, seed = 0) -> np.ndarray:
+    """
+    Estimate the closeness of every vertex from its distances to a random
+    sample of n_pivots vertices (Eppstein & Wang, 2001), as
+    Graph.closeness() does: ignoring the direction of the edges, normalized
+    and with unreachable vertices at a distance of the number of vertices.
+    With as many pivots as vertices, it's the exact closeness.
+
+    Parameters: as in pivot_betweenness()
+    """
+    n = graph.vcount()
+    distances_sum = np.zeros(n, dtype=np.float64)
+    if not n:
+        return distances_sum
+
+    (sources, targets, lengths) = get_adjacency(graph, weights, directed=False)
+    adjacency = csr_matrix((lengths, (sources, targets)), shape=(n, n))
+    pivots = sample_pivots(n, n_pivots, seed)
+
+    for batch in range(0, len(pivots), PIVOTS_PER_BATCH):
+        distances = dijkstra(adjacency, directed=True,
+                            indices=pivots[batch:batch+PIVOTS_PER_BATCH])
+        distances[~np.isfinite(distances)] = n
+        distances_sum += distances.sum(axis=0)
+
+    distances_sum *= n / len(pivots)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (n - 1) / distances_sum
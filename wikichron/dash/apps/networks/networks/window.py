@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   window.py
+
+   Descp: Edits of a wiki aggregated by time segments, so that the network
+   for any position of the time slider is built from the aggregated edits
+   of the selected months, instead of filtering and walking all the
+   revisions of the wiki again.
+
+   The slider selects from the first day of a month to the last day of
+   another month, both at 00:00:00. Hence, every month is split in two
+   segments: up to its last day at 00:00:00 and the rest of that last day.
+   This way, any selection of the slider is a range of consecutive segments
+   and its edits are a contiguous slice of the aggregated edits.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import pandas as pd
+import numpy as np
+
+# edits are aggregated by segment and all these columns
+AGGREGATED_COLUMNS = ['page_id', 'page_title', 'page_ns', 'contributor_id',
+                        'contributor_name']
+
+
+def get_segments(timestamps: np.ndarray) -> np.ndarray:
+    """ Segment of every timestamp, two per month since year 0 """
+    months = timestamps.astype('datetime64[M]')
+    last_days = (months + 1).astype('datetime64[D]') - 1
+    late = timestamps > last_days.astype(timestamps.dtype)
+    return months.astype(np.int64) * 2 + late
+
+
+def aggregate_edits(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate the non anonymous revisions of df by segment, page and
+    contributor.
+
+    Return a dataframe with the columns in AGGREGATED_COLUMNS plus:
+        - segment: see get_segments().
+        - revisions: the number of revisions aggregated in the row.
+        - position: position in df of the first of those revisions.
+    sorted by segment and position.
+    """
+    selected = (df['contributor_name'] != 'Anonymous').values
+    dff = df[selected]
+
+    # group by codes instead of values, so that missing values are kept
+    keys = pd.DataFrame({column: pd.factorize(dff[column].values)[0]
+                            for column in AGGREGATED_COLUMNS})
+    keys['segment'] = get_segments(dff['timestamp'].values)
+    keys['position'] = np.flatnonzero(selected)
+
+    groups = keys.groupby(['segment'] + AGGREGATED_COLUMNS, sort=False)['position']\
+                .agg(['size', 'min'])
+
+    # the first revision of every group has the values of the whole group
+    edits = df.iloc[groups['min'].values][AGGREGATED_COLUMNS].reset_index(drop=True)
+    edits['segment'] = groups.index.get_level_values('segment').values
+    edits['revisions'] = groups['size'].values
+    edits['position'] = groups['min'].values
+
+    edits.sort_values(['segment', 'position'], inplace=True)
+    edits.reset_index(drop=True, inplace=True)
+    return edits
+
+
+def parse_month_bounds(lower_bound: str, upper_bound: str):
+    """
+    Return the range [first, last] of segments selected by the bounds, or
+    None if the bounds don't go from the first day of a month to the last
+    day of a month, as the time slider does.
+    """
+    try:
+        lower = pd.Timestamp(lower_bound)
+        upper = pd.Timestamp(upper_bound)
+    except ValueError:
+        return None
+
+    if lower != lower.normalize() or lower.day != 1 \
+        or upper != upper.normalize() or not upper.is_month_end:
+        return None
+
+    first = get_segments(np.array([lower.to_datetime64()]))[0]
+    last = get_segments(np.array([upper.to_datetime64()]))[0]
+    return (first, last)
+
+
+def get_window(edits: pd.DataFrame, lower_bound = '', upper_bound = ''):
+    """
+    Return the aggregated edits between lower_bound and upper_bound, ordered
+    as the revisions they come from, or None if those bounds can't be
+    served from the aggregated edits.
+
+    Parameters:
+        - edits: aggregated edits of a wiki, see aggregate_edits().
+        - lower_bound, upper_bound: as given to BaseNetwork.build_network().
+    """
+    if not (lower_bound and upper_bound):
+        return edits
+
+    segments = parse_month_bounds(lower_bound, upper_bound)
+    if segments is None:
+        return None
+
+    start = np.searchsorted(edits['segment'].values, segments[0], side='left')
+    end = np.searchsorted(edits['segment'].values, segments[1], side='right')
+    return edits.iloc[start:end].sort_values('position')
@@ -1,14 +1,20 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-   generate_wiki_network.py
+   precook_data.py
 
-   Descp: This script generates a network per wiki csv. It get them from ../data
-    and creates a bin|gml network in precooked_data/networks
+   Descp: This script precooks the networks of every wiki of wikis.json, so
+    that the networks app serves them from disk instead of building them on
+    every request. For every wiki and type of network, it writes a snapshot
+    of the network from the first month of the wiki up to every month, plus
+    the network of the whole wiki (see snapshots.py), in PRECOOKED_NETWORK_DIR
+    (precooked_data/networks by default).
 
-    Parameters:
-        -bin or nothing: to write a bin network
-        -gml: to write a gml network
+    Wikis whose snapshots are already up to date are skipped, unless -f is given.
+
+    Usage: precook_data.py [-f] [csv ...]
+        -f: precook the wikis again even if their snapshots are up to date
+        csv: only precook the wikis with these data files
 
    Created on: 17-dic-2018
 
@@ -17,70 +23,88 @@
    Distributed under the terms of the AGPLv3 license.
 """
 
-
 import os
-from os.path import join
 import sys
-import pandas as pd
-import json
 import time
 
-import lib.interface as lib
-from lib.networks.types.CoEditingNetwork import CoEditingNetwork
-
 if not 'WIKICHRON_DATA_DIR' in os.environ:
-    os.environ['WIKICHRON_DATA_DIR'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data')
-data_dir = os.environ['WIKICHRON_DATA_DIR']
+    os.environ['WIKICHRON_DATA_DIR'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../../data')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../..'))
+# (import the interface before the data controller, which is imported back
+#  by one of the networks)
+import wikichron.dash.apps.networks.networks.interface as interface
+import wikichron.dash.apps.networks.data_controller as data_controller
+from wikichron.dash.apps.networks import snapshots
+
+
+def is_precooked(wiki, network_code, source, bounds) -> bool:
+    path = snapshots.get_snapshots_path(data_controller.precooked_net_dir,
+                                        wiki['data'], network_code)
+    meta = snapshots.read_meta(path)
+    return bool(meta) and meta.get('version') == snapshots.FORMAT_VERSION \
+        and meta['source'] == source \
+        and [snapshot['bounds'] for snapshot in meta['snapshots']] \
+            == [list(bound) for bound in bounds]
+
+
+def get_precook_metrics(network) -> list:
+    """
+    All the metrics of the network, but its layout only if it's laid out on
+    the server (see BaseNetwork.has_server_layout())
+    """
+    metrics = [attr for attr in network.get_metric_attrs()
+                if attr not in ('layout_x', 'layout_y')]
+    if network.has_server_layout():
+        metrics.append('layout_x')
+    return metrics
+
+
+def precook_network(wiki, network_code, source, bounds):
+    path = snapshots.get_snapshots_path(data_controller.precooked_net_dir,
+                                        wiki['data'], network_code)
+    writer = snapshots.SnapshotWriter(path, source)
+    try:
+        for (lower_bound, upper_bound) in bounds:
+            network = data_controller.build_network(wiki, network_code,
+                                                    lower_bound, upper_bound)
+            network.calculate_metrics(get_precook_metrics(network))
+            writer.append(lower_bound, upper_bound, network.graph)
+    except:
+        writer.abort()
+        raise
+    writer.close()
 
-def main(*args):
-    if len(sys.argv) > 2:
-        print('Error: Invalid number of arguments')
-        return 1
 
-    write_bin = True
-    dest_path = os.path.join('precooked_data', 'networks')
-    if len(sys.argv) == 2:
-        if sys.argv[1] == '-gml':
-            write_bin = False
-            dest_path = os.path.join(dest_path, 'gml')
-        elif sys.argv[1] == '-bin':
-            write_bin = True
-            dest_path = os.path.join(dest_path, 'bin')
-        else:
-            print(f'Error: argument {sys.argv[1]} is not allowed')
-            return 1
+def main(*args):
+    force = '-f' in sys.argv[1:]
+    csvs = [arg for arg in sys.argv[1:] if arg != '-f']
 
+    data_dir = data_controller.data_dir
     if not os.path.isdir(data_dir):
-        print('Error: the path "{}" was not found'.format(source_path))
+        print('Error: the path "{}" was not found'.format(data_dir))
         return 1
 
-    if not os.path.isdir(dest_path):
-        print(f'Creating directory for first time: {dest_path}')
-        os.makedirs(dest_path)
-
-    wikis = json.load(open(os.path.join(data_dir, 'wikis.json')))
-
-    for wiki in wikis:
-        df = lib.get_dataframe_from_csv(os.path.join(data_dir, wiki['data']))
-        lib.prepare_data(df)
-        df = lib.clean_up_bot_activity(df, wiki)
-
-        net = CoEditingNetwork()
-        print(f"Generating network data for {wiki['name']}")
-        time_start_generating_network = time.perf_counter()
-
-        net.generate_from_pandas(data = df)
-        time_end_generating_network = time.perf_counter() - time_start_generating_network
-        print(' * [Timing] Generating network for {} : {} seconds'
-                .format(wiki['name'], time_end_generating_network))
-        o_f = wiki['data'][:-3]
-        if write_bin:
-            o_f = '{}{}.bin'.format(o_f, net.code)
-            net.write_pickle(fname = os.path.join(dest_path, o_f))
-        else:
-            o_f = '{}{}.gml'.format(o_f, net.code)
-            net.copy_and_write_gml(os.path.join(dest_path, o_f))
-
+    for wiki in data_controller.get_available_wikis():
+        if csvs and wiki['data'] not in csvs:
+            continue
+        if not os.path.exists(os.path.join(data_dir, wiki['data'])):
+            print(f"Skipping {wiki['data']}: file not found.")
+            continue
+
+        source = data_controller.get_snapshots_source(wiki)
+        bounds = data_controller.get_precook_bounds(wiki)
+        for network in interface.get_available_networks():
+            if not force and is_precooked(wiki, network.CODE, source, bounds):
+                print(f"Skipping {network.CODE} for {wiki['name']}: snapshots are up to date.")
+                continue
+
+            print(f"Precooking {network.CODE} for {wiki['name']} ({len(bounds)} snapshots)")
+            time_start_precooking = time.perf_counter()
+            precook_network(wiki, network.CODE, source, bounds)
+            time_end_precooking = time.perf_counter() - time_start_precooking
+            print(' * [Timing] Precooking {} for {} : {} seconds'
+                    .format(network.CODE, wiki['name'], time_end_precooking))
 
     return 0
 
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   snapshots.py
+
+   Descp: Binary store of precooked networks, written offline by
+   precook_data.py and read by data_controller.get_network().
+
+   For every wiki and type of network, the store keeps one snapshot per
+   month: the network from the first month of the wiki up to the end of that
+   month (the selections of the time slider which start at its beginning),
+   plus the network of the whole wiki. All the snapshots live in a directory
+   with one .npy file per vertex or edge attribute, where the values of all
+   the snapshots are concatenated and delimited by offsets, so a snapshot is
+   read back with a couple of slices of memory-mapped arrays.
+
+   The snapshots of a wiki are ignored as soon as its csv or its list of
+   bots changes.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import numpy as np
+import json
+import os
+import shutil
+import tempfile
+
+# Bump this whenever the on-disk layout changes, so old snapshots are ignored.
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+VERTEX_OFFSETS_FILE = 'vertex_offsets.npy'
+EDGE_OFFSETS_FILE = 'edge_offsets.npy'
+EDGES_FILE = 'edges.npy'
+VERTEX_PREFIX = 'v.'
+EDGE_PREFIX = 'e.'
+
+
+def get_snapshots_path(store_dir: str, csv: str, network_code: str) -> str:
+    return os.path.join(store_dir, os.path.basename(csv), network_code)
+
+
+def read_meta(snapshots_path: str):
+    try:
+        with open(os.path.join(snapshots_path, META_FILE)) as meta_file:
+            return json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+
+
+class SnapshotWriter:
+    """
+       Write the snapshots of a wiki and type of network, one at a time so
+       that only the compact arrays of the snapshots already written are kept
+       in memory. Nothing is visible in the store until close() is called.
+    """
+
+    def __init__(self, snapshots_path: str, source: list):
+        self.snapshots_path = snapshots_path
+        self.source = source
+        self._parent = os.path.dirname(snapshots_path)
+        os.makedirs(self._parent, exist_ok=True)
+        self._tmp_path = tempfile.mkdtemp(dir=self._parent, prefix='.tmp-')
+        self._snapshots = []
+        self._edges = []
+        self._vertex_counts = []
+        self._edge_counts = []
+        self._vertex_attrs = {}
+        self._edge_attrs = {}
+        self._directed = False
+
+
+    def append(self, lower_bound: str, upper_bound: str, graph):
+        """ Add the igraph graph of the network between the bounds """
+        index = len(self._snapshots)
+        # (not every network has all the attributes, e.g. closeness)
+        self._snapshots.append({
+            'bounds': [lower_bound, upper_bound],
+            'graph_attrs': {attr: graph[attr] for attr in graph.attributes()},
+            'vertex_attrs': graph.vs.attribute_names(),
+            'edge_attrs': graph.es.attribute_names()
+        })
+        self._directed = graph.is_directed()
+        self._edges.append(np.array(graph.get_edgelist(), dtype=np.int32).reshape(-1, 2))
+        self._vertex_counts.append(graph.vcount())
+        self._edge_counts.append(graph.ecount())
+        self._add_attrs(self._vertex_attrs, graph.vs, index)
+        self._add_attrs(self._edge_attrs, graph.es, index)
+
+
+    def _add_attrs(self, attrs: dict, sequence, index: int):
+        # snapshots without values for an attribute (e.g. empty graphs, or
+        #  without that attribute) are filled in later, so that they don't
+        #  change its type and all the arrays keep the same offsets.
+        for attr in sequence.attribute_names():
+            values = np.asarray(sequence[attr]) if len(sequence) else None
+            attrs.setdefault(attr, [None] * index).append(values)
+        for values in attrs.values():
+            if len(values) == index:
+                values.append(None)
+
+
+    def _concatenate(self, arrays: list, counts: list):
+        present = [values for values in arrays if values is not None]
+        dtype = np.result_type(*present) if present else np.float64
+        arrays = [values if values is not None else np.zeros(count, dtype=dtype)
+                    for (values, count) in zip(arrays, counts)]
+        return np.concatenate(arrays).astype(dtype, copy=False)
+
+
+    def close(self) -> dict:
+        """ Finish the snapshots and return their meta information """
+        try:
+            np.save(os.path.join(self._tmp_path, VERTEX_OFFSETS_FILE),
+                    np.cumsum([0] + self._vertex_counts, dtype=np.int64))
+            np.save(os.path.join(self._tmp_path, EDGE_OFFSETS_FILE),
+                    np.cumsum([0] + self._edge_counts, dtype=np.int64))
+            edges = np.concatenate(self._edges) if self._edges \
+                    else np.zeros((0, 2), dtype=np.int32)
+            np.save(os.path.join(self._tmp_path, EDGES_FILE), edges)
+            for (attr, arrays) in self._vertex_attrs.items():
+                np.save(os.path.join(self._tmp_path, VERTEX_PREFIX + attr + '.npy'),
+                        self._concatenate(arrays, self._vertex_counts))
+            for (attr, arrays) in self._edge_attrs.items():
+                np.save(os.path.join(self._tmp_path, EDGE_PREFIX + attr + '.npy'),
+                        self._concatenate(arrays, self._edge_counts))
+
+            meta = {
+                'version': FORMAT_VERSION,
+                'source': self.source,
+                'directed': self._directed,
+                'snapshots': self._snapshots
+            }
+            with open(os.path.join(self._tmp_path, META_FILE), 'w') as meta_file:
+                json.dump(meta, meta_file)
+        except:
+            self.abort()
+            raise
+
+        # replace the old snapshots (if any) with the new ones
+        if os.path.exists(self.snapshots_path):
+            old_path = tempfile.mkdtemp(dir=self._parent, prefix='.old-')
+            os.rename(self.snapshots_path, os.path.join(old_path, 'snapshots'))
+            shutil.rmtree(old_path, ignore_errors=True)
+        os.rename(self._tmp_path, self.snapshots_path)
+        return meta
+
+
+    def abort(self):
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+
+def load_snapshot(snapshots_path: str, source: list, lower_bound: str,
+    upper_bound: str):
+    """
+       Return a tuple (n_vertices, edges, vertex_attrs, edge_attrs,
+       graph_attrs) with the snapshot between the bounds, or None if there is
+       no such snapshot or it's not up to date with source.
+    """
+    meta = read_meta(snapshots_path)
+    if not meta or meta.get('version') != FORMAT_VERSION \
+        or meta['source'] != source:
+        return None
+    bounds = [snapshot['bounds'] for snapshot in meta['snapshots']]
+    try:
+        index = bounds.index([lower_bound, upper_bound])
+    except ValueError:
+        return None
+    snapshot = meta['snapshots'][index]
+
+    def load(file_name):
+        return np.load(os.path.join(snapshots_path, file_name), mmap_mode='r')
+
+    (v_start, v_end) = load(VERTEX_OFFSETS_FILE)[index:index+2]
+    (e_start, e_end) = load(EDGE_OFFSETS_FILE)[index:index+2]
+    edges = load(EDGES_FILE)[e_start:e_end].tolist()
+    vertex_attrs = {attr: load(VERTEX_PREFIX + attr + '.npy')[v_start:v_end].tolist()
+                        for attr in snapshot['vertex_attrs']}
+    edge_attrs = {attr: load(EDGE_PREFIX + attr + '.npy')[e_start:e_end].tolist()
+                        for attr in snapshot['edge_attrs']}
+    return (int(v_end - v_start), edges, vertex_attrs, edge_attrs,
+            snapshot['graph_attrs'])
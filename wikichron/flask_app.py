@@ -23,6 +23,7 @@ import base64
 # local imports
 import wikichron.utils.data_manager as data_manager
 import wikichron.utils.utils as utils
+import wikichron.precompute as precompute
 
 # Imports from dash apps
 # classic
@@ -250,10 +251,10 @@ def upload_post():
         # store file in FS
         file.save(os.path.join(data_dir, filename))
 
-        # process csv, check for errors generate wikis.json metadata
+        # process csv, check for errors generate wikis.json metadata.
+        #  The csv gets converted to the columnar cache at the same time.
         try:
-            wiki_df = data_manager.load_dataframe_from_csv(filename)
-            wiki_stats = data_manager.get_stats(wiki_df)
+            wiki_stats = data_manager.ingest_csv(filename)
         except:
             os.remove(os.path.join(config['UPLOAD_FOLDER'], filename))
             return upload_error('The provided csv file has an invalid format. Please, use our parser to parse the xml dump file.')
@@ -307,6 +308,10 @@ def upload_post():
         if not data_manager.update_wikis_metadata(wikis):
             return upload_error('Error updating wikis metadata. Please, try again.')
 
+        # warm up the caches for the new data in background
+        stored_wiki = new_wiki if not overwriting_existing else wikis[existing_wiki_index]
+        job_id = precompute.submit(current_app._get_current_object(), stored_wiki)
+
 
     else:
         msg = 'HTTP method not expected'
@@ -319,9 +324,18 @@ def upload_post():
                                 development = config["DEBUG"],
                                 overwritten = overwriting_existing,
                                 wiki = new_wiki,
+                                job = precompute.get_status(job_id),
                                 title = 'WikiChron - Successful upload!')
 
 
+@server_bp.route('/csv-upload/status/<job_id>')
+def upload_job_status(job_id):
+    status = precompute.get_status(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(status)
+
+
 @server_bp.route('/data')
 @server_bp.route('/list_data')
 def list_data():
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    precompute.py
+
+    Descp: Background jobs which warm up the caches for a newly uploaded wiki,
+        so that its first visitor doesn't have to wait for the csv to be
+        parsed and all the metrics to be computed.
+
+    A job goes through the following steps:
+        - convert the csv to the binary columnar cache.
+        - compute all the classic metrics.
+        - compute all the monowiki metrics.
+        - build the default view of every network.
+
+    Jobs run in a single background thread of the process which received the
+    upload, and their status is stored in a small json file in the data dir,
+    so that any worker can report it.
+
+    Created on: 18-oct-2026
+
+    Copyright 2026 agent <agent@local>
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import datetime
+import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# local imports
+from wikichron.utils import revision_store
+
+# Imports from dash apps
+import wikichron.dash.apps.classic.data_controller as classic_data_controller
+import wikichron.dash.apps.classic.metrics.interface as classic_interface
+import wikichron.dash.apps.monowiki.data_controller as monowiki_data_controller
+import wikichron.dash.apps.monowiki.metrics.interface as monowiki_interface
+import wikichron.dash.apps.networks.networks.interface as networks_interface
+import wikichron.dash.apps.networks.data_controller as networks_data_controller
+
+data_dir = os.getenv('WIKICHRON_DATA_DIR', 'data')
+jobs_dir = os.getenv('WIKICHRON_JOBS_DIR', os.path.join(data_dir, 'jobs'))
+
+STEPS = ['columnar', 'classic', 'monowiki', 'networks']
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_JOB_ID_RE = re.compile('^[0-9a-f]{32}$')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # one job at a time, so precomputing doesn't starve the requests
+            _executor = ThreadPoolExecutor(max_workers=1,
+                                        thread_name_prefix='precompute')
+    return _executor
+
+
+def get_status_path(job_id: str) -> str:
+    return os.path.join(jobs_dir, job_id + '.json')
+
+
+def write_status(job_id: str, status: dict):
+    os.makedirs(jobs_dir, exist_ok=True)
+    status['updated'] = str(datetime.datetime.now().replace(microsecond=0))
+    tmp_path = get_status_path(job_id) + '.tmp'
+    with open(tmp_path, 'w') as status_file:
+        json.dump(status, status_file)
+    os.replace(tmp_path, get_status_path(job_id))
+
+
+def get_status(job_id: str):
+    """ Return the status of a job as a dict, or None if it doesn't exist """
+    if not _JOB_ID_RE.match(job_id):
+        return None
+    try:
+        with open(get_status_path(job_id)) as status_file:
+            return json.load(status_file)
+    except (OSError, ValueError):
+        return None
+
+
+def submit(app, wiki: dict) -> str:
+    """
+       Enqueue a job to warm up the caches for wiki and return its id.
+
+       app -- flask app, needed to use its caches from the job thread.
+       wiki -- metadata of the wiki, exactly as stored in wikis.json.
+    """
+    job_id = uuid.uuid4().hex
+    status = {
+        'id': job_id,
+        'wiki': wiki['domain'],
+        'state': QUEUED,
+        'step': None,
+        'steps': STEPS,
+        'steps_done': 0,
+        'errors': {}
+    }
+    write_status(job_id, status)
+    get_executor().submit(run, app, job_id, wiki, status)
+    return job_id
+
+
+def run(app, job_id: str, wiki: dict, status: dict):
+    print(f' * [Info] Starting precompute job {job_id} for {wiki["domain"]}')
+    time_start_job = time.perf_counter()
+    steps = {
+        'columnar': precompute_columnar,
+        'classic': precompute_classic,
+        'monowiki': precompute_monowiki,
+        'networks': precompute_networks
+    }
+
+    # a failing step (e.g. monowiki metrics on a csv without factoids) doesn't
+    #  prevent the rest of the steps from being precomputed.
+    status['state'] = RUNNING
+    with app.app_context():
+        for step in STEPS:
+            status['step'] = step
+            write_status(job_id, status)
+
+            time_start_step = time.perf_counter()
+            try:
+                steps[step](wiki)
+            except Exception as e:
+                traceback.print_exc()
+                status['errors'][step] = f'{type(e).__name__}: {e}'
+            time_end_step = time.perf_counter() - time_start_step
+            print(f' * [Timing] Precompute {step} for {wiki["domain"]} : {time_end_step} seconds')
+
+            status['steps_done'] += 1
+
+    status['state'] = FAILED if status['errors'] else DONE
+    status['step'] = None
+    write_status(job_id, status)
+    time_end_job = time.perf_counter() - time_start_job
+    print(f' * [Timing] Precompute job {job_id} : {time_end_job} seconds')
+
+
+def precompute_columnar(wiki):
+    revision_store.get_store(wiki['data'])
+
+
+def precompute_classic(wiki):
+    # classic metrics are cached per (wiki, metric), so this serves any
+    #  selection containing this wiki.
+    classic_data_controller.load_and_compute_data([wiki],
+                                    classic_interface.get_available_metrics())
+
+
+def precompute_monowiki(wiki):
+    # monowiki metrics are cached per (wiki, metric) as well, so this serves
+    #  any selection of metrics of this wiki.
+    monowiki_data_controller.load_and_compute_data([wiki],
+                                    monowiki_interface.get_available_metrics())
+
+
+def precompute_networks(wiki):
+    (lower_bound, upper_bound) = get_default_network_bounds(wiki)
+    for network in networks_interface.get_available_networks():
+        networks_data_controller.get_network(wiki, network.CODE,
+                                            lower_bound, upper_bound)
+
+
+def get_default_network_bounds(wiki):
+    """
+       Time bounds initially selected in the slider of the networks app,
+       in the same format the app passes them to get_network().
+    """
+    (time_index_beginning, time_index_end) = \
+        networks_data_controller.calculate_indices_all_months(wiki)
+    upper = min(int(2 + len(time_index_beginning) / 10), len(time_index_end) - 1)
+    return (str(time_index_beginning.date[0]), str(time_index_end.date[upper]))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+   cache_keys.py
+
+   Descp: Keys of the cached data of a wiki, shared by all the dash apps.
+
+   They identify the revisions of a wiki as returned by the read_data() of
+   every app: its csv, the version of that csv (by its size and modification
+   time) and its bots. So the entries of a wiki are invalidated as soon as
+   its csv changes.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import hashlib
+
+from . import revision_store
+
+
+def get_dataframe_cache_key(wiki) -> tuple:
+    source = revision_store.get_store(wiki['data']).source
+    bots = tuple(sorted(str(bot['id']) for bot in wiki.get('bots', [])))
+    return (wiki['data'], source['size'], source['mtime_ns'], bots)
+
+
+def get_data_fingerprint(wiki) -> str:
+    """
+       Short and stable hash which identifies the data of a wiki, i.e. its
+       csv, the version of that csv and its bots.
+    """
+    key = repr(get_dataframe_cache_key(wiki))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def get_metric_cache_key(prefix: str, fingerprint: str, metric) -> str:
+    return '{}/{}/{}'.format(prefix, fingerprint, metric.code)
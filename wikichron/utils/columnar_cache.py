@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+   columnar_cache.py
+
+   Descp: Binary columnar cache for the wiki csv files.
+
+   Parsing a big csv with pandas (and then its timestamps) can take minutes,
+   so every csv of the data dir is converted only once into a directory of
+   typed .npy files. No pickling is involved:
+     - Text columns are dictionary-encoded: integer codes, in the smallest
+       dtype that pandas uses for the codes of a categorical with that many
+       values, plus an array with the unique values.
+     - The rest of columns are stacked by dtype into 2-d blocks, one per
+       dtype, laid out as the blocks of a pandas dataframe.
+   Rows are sorted by timestamp (stable sort). This way, the files can be
+   memory-mapped as the blocks of a dataframe ready for the metrics, without
+   copying anything (see revision_store.py).
+
+   The csv is parsed and written in chunks of rows, so converting a huge
+   file only takes the memory of one chunk plus the text dictionaries and
+   the sort order of the rows.
+
+   The cache of a csv gets invalidated automatically whenever the size or the
+   modification time of the source csv changes. Caches of the same revisions
+   without the edits of some contributors (e.g. bots) are derived from it and
+   kept in its directory, so they are invalidated along with it.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+import hashlib
+import shutil
+import tempfile
+
+data_dir = os.getenv('WIKICHRON_DATA_DIR', 'data')
+columnar_dir = os.getenv('WIKICHRON_COLUMNAR_DIR',
+                        os.path.join(data_dir, 'columnar'))
+
+# Bump this whenever the on-disk layout changes, so old caches are discarded.
+FORMAT_VERSION = 4
+META_FILE = 'meta.json'
+CODES_SUFFIX = '.codes.npy'
+VALUES_SUFFIX = '.values.npy'
+BLOCK_SUFFIX = '.block.npy'
+SORT_COLUMN = 'timestamp'
+
+# rows parsed at once when converting a csv
+CHUNK_SIZE = int(os.getenv('WIKICHRON_CSV_CHUNK_SIZE', 200000))
+
+# columns always read as text, even if a chunk only has numeric values
+#  (e.g. contributor_id holds the ip of anonymous editors) or no values at all
+TEXT_COLUMNS = {'page_title': str, 'contributor_id': str, 'contributor_name': str,
+                'factoids': str, 'edit_content': str}
+
+
+def get_cache_path(csv: str) -> str:
+    return os.path.join(columnar_dir, os.path.basename(csv))
+
+
+def get_source_signature(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def read_meta(cache_path: str):
+    try:
+        with open(os.path.join(cache_path, META_FILE)) as meta_file:
+            return json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(csv: str, meta = None) -> bool:
+    """ Whether the cache for csv exists and matches the current source file """
+    if meta is None:
+        meta = read_meta(get_cache_path(csv))
+    if not meta or meta.get('version') != FORMAT_VERSION:
+        return False
+    return meta['source'] == get_source_signature(os.path.join(data_dir, csv))
+
+
+def iter_csv_chunks(csv_path: str, chunksize: int = CHUNK_SIZE):
+    """ Parse a wiki csv lazily, yielding dataframes of chunksize rows """
+    reader = pd.read_csv(csv_path,
+                    delimiter=',', quotechar='|',
+                    index_col=False,
+                    dtype=TEXT_COLUMNS,
+                    chunksize=chunksize)
+    for chunk in reader:
+        chunk['timestamp']=pd.to_datetime(chunk['timestamp'],format='%Y-%m-%dT%H:%M:%SZ')
+        yield chunk
+
+
+def get_codes_dtype(cardinality: int) -> np.dtype:
+    """ Dtype of the codes of a pandas categorical with cardinality values """
+    for dtype in (np.int8, np.int16, np.int32):
+        if cardinality < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def get_block_path(cache_path: str, block: dict) -> str:
+    return os.path.join(cache_path, block['name'] + BLOCK_SUFFIX)
+
+
+def get_files(meta: dict) -> list:
+    """ Names of the .npy files of a cache """
+    files = [column['name'] + suffix for column in meta['columns']
+                if column['encoding'] == 'dictionary'
+                for suffix in (CODES_SUFFIX, VALUES_SUFFIX)]
+    files += [block['name'] + BLOCK_SUFFIX for block in meta['blocks']]
+    return files
+
+
+def write_npy_from_raw(npy_path: str, raws: list, dtype: np.dtype):
+    """
+       Write a .npy file with the content of some raw binary files written
+       chunk by chunk, one row of the array per raw file. raws is the list of
+       (raw_path, chunks) of every file, where chunks is the list of
+       (dtype, length) of every chunk of the file, which are converted to
+       dtype if needed.
+    """
+    rows = sum(length for (_, length) in raws[0][1])
+    header = {'descr': np.lib.format.dtype_to_descr(dtype),
+                'fortran_order': False,
+                'shape': (len(raws), rows) if len(raws) > 1 else (rows,)}
+
+    with open(npy_path, 'wb') as npy_file:
+        np.lib.format.write_array_header_1_0(npy_file, header)
+        for (raw_path, chunks) in raws:
+            with open(raw_path, 'rb') as raw_file:
+                if all(chunk_dtype == dtype for (chunk_dtype, _) in chunks):
+                    shutil.copyfileobj(raw_file, npy_file)
+                else:
+                    for (chunk_dtype, length) in chunks:
+                        values = np.fromfile(raw_file, dtype=chunk_dtype, count=length)
+                        npy_file.write(values.astype(dtype).tobytes())
+
+
+def take_npy(npy_path: str, out_path: str, positions: np.ndarray, chunksize: int = CHUNK_SIZE):
+    """
+       Write in out_path the rows (along the last axis) at positions of the
+       array stored in npy_path, chunk by chunk.
+    """
+    values = np.load(npy_path, mmap_mode='r')
+    out = np.lib.format.open_memmap(out_path, mode='w+', dtype=values.dtype,
+                                    shape=values.shape[:-1] + (len(positions),))
+    for start in range(0, len(positions), chunksize):
+        chunk_positions = positions[start:start+chunksize]
+        out[..., start:start+len(chunk_positions)] = values[..., chunk_positions]
+    out.flush()
+    del out
+
+
+def get_sort_order(cache_path: str, meta: dict):
+    """
+       Return the positions of the rows of a cache in the order of a stable
+       sort by timestamp, or None if they're sorted already.
+    """
+    column = [column for column in meta['columns'] if column['name'] == SORT_COLUMN]
+    if not column:
+        return None
+    block = [block for block in meta['blocks'] if block['name'] == column[0]['block']][0]
+    values = np.load(get_block_path(cache_path, block), mmap_mode='r')
+    if len(block['columns']) > 1:
+        values = values[block['columns'].index(SORT_COLUMN)]
+    if (values[1:] >= values[:-1]).all():
+        return None
+    return np.argsort(values, kind='mergesort')
+
+
+class ColumnarWriter:
+    """
+       Write the columnar cache of a csv one chunk of rows at a time.
+
+       Column values are appended to raw files on disk as they come, so only
+       the dictionaries of the text columns are kept in memory.
+
+       The files are written in a temporary directory first and then moved
+       at once, so concurrent workers never see a half-written cache.
+    """
+
+    def __init__(self, cache_path: str, source: dict):
+        self.cache_path = cache_path
+        self.source = source
+        self.rows = 0
+        self._columns = None
+
+        self._parent = os.path.dirname(cache_path)
+        os.makedirs(self._parent, exist_ok=True)
+        self._tmp_path = tempfile.mkdtemp(dir=self._parent, prefix='.tmp-')
+
+
+    def _open_columns(self, chunk: pd.DataFrame):
+        self._columns = {}
+        for column in chunk.columns:
+            encoding = 'dictionary' if chunk[column].dtype == object else 'plain'
+            self._columns[column] = {
+                'encoding': encoding,
+                'raw': open(os.path.join(self._tmp_path, column + '.raw'), 'wb'),
+                'chunks': [],
+                # value -> code, for dictionary-encoded columns
+                'dictionary': {}
+            }
+
+
+    def _switch_to_dictionary(self, column: str):
+        """
+           Dictionary-encode a plain column whose first chunks had no values
+           at all (e.g. a text column empty at the beginning of the csv), so
+           its rows written so far become missing values (code -1).
+        """
+        state = self._columns[column]
+        raw_path = os.path.join(self._tmp_path, column + '.raw')
+        state['raw'].close()
+        with open(raw_path, 'rb') as raw_file:
+            for (chunk_dtype, length) in state['chunks']:
+                values = np.fromfile(raw_file, dtype=chunk_dtype, count=length)
+                if chunk_dtype.kind != 'f' or not np.isnan(values).all():
+                    raise ValueError(f'Column {column} mixes numeric and text values')
+
+        rows = sum(length for (_, length) in state['chunks'])
+        state['raw'] = open(raw_path, 'wb')
+        state['raw'].write(np.full(rows, -1, dtype=np.int32).tobytes())
+        state['chunks'] = [(np.dtype(np.int32), rows)]
+        state['encoding'] = 'dictionary'
+
+
+    def append(self, chunk: pd.DataFrame):
+        if self._columns is None:
+            self._open_columns(chunk)
+        if list(chunk.columns) != list(self._columns.keys()):
+            raise ValueError('All the chunks must have the same columns')
+
+        for (column, state) in self._columns.items():
+            values = chunk[column].values
+            if state['encoding'] == 'plain' and values.dtype == object:
+                self._switch_to_dictionary(column)
+            if state['encoding'] == 'dictionary':
+                codes, uniques = pd.factorize(values)
+                dictionary = state['dictionary']
+                chunk_to_global = np.array(
+                    [dictionary.setdefault(str(value), len(dictionary)) for value in uniques],
+                    dtype=np.int32)
+                values = np.full(len(codes), -1, dtype=np.int32)
+                known = codes >= 0
+                values[known] = chunk_to_global[codes[known]]
+
+            state['raw'].write(np.ascontiguousarray(values).tobytes())
+            state['chunks'].append((values.dtype, len(values)))
+
+        self.rows += len(chunk.index)
+
+
+    def close(self) -> dict:
+        """ Finish the cache and return its meta information """
+        columns = []
+        blocks = {}
+        try:
+            for (column, state) in (self._columns or {}).items():
+                state['raw'].close()
+                raw_path = os.path.join(self._tmp_path, column + '.raw')
+                if state['encoding'] == 'dictionary':
+                    codes_dtype = get_codes_dtype(len(state['dictionary']))
+                    write_npy_from_raw(os.path.join(self._tmp_path, column + CODES_SUFFIX),
+                                        [(raw_path, state['chunks'])], codes_dtype)
+                    np.save(os.path.join(self._tmp_path, column + VALUES_SUFFIX),
+                            np.asarray(list(state['dictionary'].keys()), dtype=str))
+                    columns.append({'name': column, 'encoding': 'dictionary',
+                                    'cardinality': len(state['dictionary'])})
+                    os.remove(raw_path)
+                else:
+                    dtype = np.result_type(*[dtype for (dtype, _) in state['chunks']])
+                    block = blocks.setdefault(dtype.str, {
+                                'name': f'block{len(blocks)}',
+                                'dtype': dtype.str,
+                                'columns': [],
+                                'raws': []
+                            })
+                    block['columns'].append(column)
+                    block['raws'].append((raw_path, state['chunks']))
+                    columns.append({'name': column, 'encoding': 'plain', 'block': block['name']})
+
+            # columns of the same dtype, stacked
+            for block in blocks.values():
+                write_npy_from_raw(get_block_path(self._tmp_path, block),
+                                    block['raws'], np.dtype(block['dtype']))
+                for (raw_path, _) in block.pop('raws'):
+                    os.remove(raw_path)
+
+            meta = {
+                'version': FORMAT_VERSION,
+                'source': self.source,
+                'rows': self.rows,
+                'columns': columns,
+                'blocks': list(blocks.values())
+            }
+
+            order = get_sort_order(self._tmp_path, meta)
+            if order is not None:
+                for name in get_files(meta):
+                    if not name.endswith(VALUES_SUFFIX):
+                        npy_path = os.path.join(self._tmp_path, name)
+                        take_npy(npy_path, npy_path + '.sorted', order)
+                        os.replace(npy_path + '.sorted', npy_path)
+                del order
+
+            with open(os.path.join(self._tmp_path, META_FILE), 'w') as meta_file:
+                json.dump(meta, meta_file)
+        except:
+            self.abort()
+            raise
+
+        # replace the old cache (if any) with the new one
+        try:
+            if os.path.exists(self.cache_path):
+                old_path = tempfile.mkdtemp(dir=self._parent, prefix='.old-')
+                os.rename(self.cache_path, os.path.join(old_path, 'cache'))
+                shutil.rmtree(old_path, ignore_errors=True)
+            os.rename(self._tmp_path, self.cache_path)
+        except OSError:
+            # Another worker has probably won the race. Not a problem, since the
+            #  content written is the same for the same source signature.
+            shutil.rmtree(self._tmp_path, ignore_errors=True)
+        return meta
+
+
+    def abort(self):
+        for state in (self._columns or {}).values():
+            if not state['raw'].closed:
+                state['raw'].close()
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+
+def convert_csv(csv: str, on_chunk = None, chunksize: int = CHUNK_SIZE) -> dict:
+    """
+       Parse csv from the data dir in chunks and store it in the columnar
+       cache, with bounded memory. Return the meta information of the cache.
+
+       on_chunk -- optional function called with every parsed chunk, to
+          compute something else in the same pass over the csv.
+    """
+    csv_path = os.path.join(data_dir, csv)
+    source = get_source_signature(csv_path)
+    writer = ColumnarWriter(get_cache_path(csv), source)
+    try:
+        for chunk in iter_csv_chunks(csv_path, chunksize):
+            writer.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+    except:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def get_filtered_cache_path(cache_path: str, column: str, excluded: list) -> str:
+    digest = hashlib.sha1(repr((column, sorted(excluded))).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_path, 'without-' + digest)
+
+
+def convert_filtered(cache_path: str, meta: dict, column: str, excluded: list,
+                    chunksize: int = CHUNK_SIZE) -> (str, dict):
+    """
+       Derive from the cache in cache_path another one without the rows
+       whose value of column (a dictionary-encoded one) is in excluded.
+       Return the path and the meta information of the derived cache, which
+       is only written the first time. If no row is excluded, the cache in
+       cache_path is returned as is.
+    """
+    filtered_path = get_filtered_cache_path(cache_path, column, excluded)
+    filtered_meta = read_meta(filtered_path)
+    if filtered_meta and filtered_meta.get('version') == FORMAT_VERSION \
+        and filtered_meta['source'] == meta['source']:
+        return (filtered_path, filtered_meta)
+
+    values = np.load(os.path.join(cache_path, column + VALUES_SUFFIX), mmap_mode='r')
+    excluded_codes = np.flatnonzero(np.isin(values, np.asarray(excluded, dtype=str)))
+    if not len(excluded_codes):
+        return (cache_path, meta)
+    codes = np.load(os.path.join(cache_path, column + CODES_SUFFIX), mmap_mode='r')
+    positions = np.flatnonzero(~np.isin(codes, excluded_codes))
+    if len(positions) == meta['rows']:
+        return (cache_path, meta)
+
+    tmp_path = tempfile.mkdtemp(dir=cache_path, prefix='.tmp-')
+    try:
+        for name in get_files(meta):
+            if name.endswith(VALUES_SUFFIX):
+                shutil.copyfile(os.path.join(cache_path, name), os.path.join(tmp_path, name))
+            else:
+                take_npy(os.path.join(cache_path, name), os.path.join(tmp_path, name),
+                        positions, chunksize)
+        filtered_meta = dict(meta, rows=len(positions),
+                            excluded={'column': column, 'values': sorted(excluded)})
+        with open(os.path.join(tmp_path, META_FILE), 'w') as meta_file:
+            json.dump(filtered_meta, meta_file)
+    except:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    try:
+        os.rename(tmp_path, filtered_path)
+    except OSError:
+        # Another worker has probably won the race, with the same content.
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return (filtered_path, filtered_meta)
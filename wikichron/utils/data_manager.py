@@ -12,11 +12,14 @@
 """
 
 import pandas as pd
+import numpy as np
 import csv
 import json
 import os
 import zc.lockfile
 
+from . import columnar_cache
+
 data_dir = os.getenv('WIKICHRON_DATA_DIR', 'data')
 
 
@@ -71,18 +74,102 @@ def get_stats(data : pd.DataFrame) -> dict:
     stats['users'] = data['contributor_id'].nunique()
     stats['articles'] = data[data['page_ns'] == 0]['page_id'].nunique()
 
-    data = data.sort_values(by = 'timestamp')
-    first_edit = data.head(1)
+    # first and last edits in the same order as a stable sort by timestamp,
+    #  without sorting the whole data
+    timestamps = data['timestamp'].values
+    first = timestamps.argmin()
+    last = len(timestamps) - 1 - timestamps[::-1].argmax()
     stats['first_edit'] = {
-                    'revision_id': int(first_edit['revision_id'].values[0]),
-                    'date': str(first_edit['timestamp'].values[0])
+                    'revision_id': int(data['revision_id'].values[first]),
+                    'date': str(timestamps[first])
                     }
 
-    last_edit = data.tail(1)
     stats['last_edit'] = {
-                    'revision_id': int(last_edit['revision_id'].values[0]),
-                    'date': str(last_edit['timestamp'].values[0])
+                    'revision_id': int(data['revision_id'].values[last]),
+                    'date': str(timestamps[last])
                     }
 
     return stats
 
+
+class StatsAccumulator:
+    """
+       Compute the same stats as get_stats() one chunk of revisions at a time.
+
+       Revision ids are unique, so edits are counted by rows. The distinct
+       page ids of every chunk are kept and deduplicated only once, at the
+       end, as they take far less memory than the revisions themselves.
+       Distinct users are not counted here: they are given by the cardinality
+       of the dictionary of the contributor_id column of the columnar cache.
+    """
+
+    def __init__(self):
+        self.edits = 0
+        self.pages = []
+        self.articles = []
+        self.first_edit = None
+        self.last_edit = None
+
+
+    def update(self, chunk: pd.DataFrame):
+        if not len(chunk.index):
+            return
+
+        self.edits += len(chunk.index)
+        self.pages.append(np.unique(chunk['page_id'].values))
+        self.articles.append(np.unique(
+                            chunk['page_id'].values[chunk['page_ns'].values == 0]))
+
+        timestamps = chunk['timestamp'].values
+        revisions = chunk['revision_id'].values
+        first = timestamps.argmin()
+        last = len(timestamps) - 1 - timestamps[::-1].argmax()
+        # ties go to the earliest revision in the csv for the first edit and
+        #  to the latest one for the last edit
+        if self.first_edit is None or timestamps[first] < self.first_edit[0]:
+            self.first_edit = (timestamps[first], revisions[first])
+        if self.last_edit is None or timestamps[last] >= self.last_edit[0]:
+            self.last_edit = (timestamps[last], revisions[last])
+
+
+    def get_stats(self, users: int) -> dict:
+        stats = {}
+
+        stats['edits'] = self.edits
+        stats['pages'] = count_distinct(self.pages)
+        stats['users'] = users
+        stats['articles'] = count_distinct(self.articles)
+
+        stats['first_edit'] = {
+                        'revision_id': int(self.first_edit[1]),
+                        'date': str(self.first_edit[0])
+                        }
+
+        stats['last_edit'] = {
+                        'revision_id': int(self.last_edit[1]),
+                        'date': str(self.last_edit[0])
+                        }
+
+        return stats
+
+
+def count_distinct(chunks_uniques: list) -> int:
+    if not chunks_uniques:
+        return 0
+    return len(np.unique(np.concatenate(chunks_uniques)))
+
+
+def ingest_csv(csv: str) -> dict:
+    """
+       Convert a csv of the data dir to the columnar cache and return its
+       stats (see get_stats()), reading the csv only once and in chunks, so
+       that huge uploads don't need to fit in memory.
+    """
+    accumulator = StatsAccumulator()
+    meta = columnar_cache.convert_csv(csv, on_chunk=accumulator.update)
+    if accumulator.first_edit is None:
+        raise ValueError(f'{csv} has no revisions')
+
+    contributor_column = [column for column in meta['columns']
+                            if column['name'] == 'contributor_id'][0]
+    return accumulator.get_stats(users=contributor_column['cardinality'])
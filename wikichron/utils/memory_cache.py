@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+   memory_cache.py
+
+   Descp: In-process LRU cache whose capacity is measured in bytes.
+
+   Used for the revision dataframes of the wikis, which are too big to be
+   pickled into redis on every call. Only small results (metric series,
+   networks) go to the shared flask cache.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import pandas as pd
+import os
+import threading
+from collections import OrderedDict
+
+# max size of the dataframes kept in memory by every process, in MB
+DATAFRAMES_CACHE_SIZE = int(os.getenv('WIKICHRON_DATAFRAMES_CACHE_SIZE', 1024))
+
+
+def dataframe_size(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class ByteSizedLRUCache:
+    """
+       Least recently used cache which evicts entries once the sum of the size
+       of the stored values exceeds max_bytes.
+
+       Values bigger than the whole cache are returned but not stored.
+    """
+
+    def __init__(self, max_bytes: int, sizeof = dataframe_size):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+
+    def set(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+# shared by all the dash apps of the same process
+dataframes_cache = ByteSizedLRUCache(DATAFRAMES_CACHE_SIZE * 1024 * 1024)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+   revision_store.py
+
+   Descp: Read-only store of the revisions of a wiki backed by memory-mapped
+       column arrays.
+
+   The arrays are mapped from the files of the binary columnar cache (see
+   columnar_cache.py) with numpy's mmap_mode='r'. Since every gunicorn worker
+   maps the same files, the OS keeps a single copy of their pages for the
+   whole host instead of one copy per worker.
+
+   The dataframes given to the metrics are built right over the mapped
+   arrays, without copying them: the numeric blocks of the cache are the
+   blocks of the dataframe and text columns (page_title, contributor_name
+   and also contributor_id, which holds the ip of anonymous editors) are
+   categoricals whose codes are the mapped ones. Only the unique values of
+   the text columns live in the memory of every process. These dataframes
+   are read-only: writing to any of their columns raises an error.
+
+   The revisions of the bots of a wiki are excluded by mapping a derived
+   cache without them, so filtering them out doesn't copy anything either.
+
+   Created on: 18-oct-2026
+
+   Copyright 2026 agent <agent@local>
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import threading
+from pandas.core.internals import BlockManager, make_block
+
+from . import columnar_cache
+
+# stores opened by this process, by (csv name, excluded contributors)
+_stores = {}
+_stores_lock = threading.Lock()
+# locks to open the stores of every csv, so that converting a csv doesn't
+#  block the stores of other csvs
+_csv_locks = {}
+
+
+class RevisionStore:
+
+    def __init__(self, csv: str, cache_path: str, meta: dict):
+        self.csv = csv
+        self.source = meta['source']
+        self.rows = meta['rows']
+        self.encodings = {}
+        self._arrays = {}
+        self._values = {}
+        self._blocks = []
+
+        for column in meta['columns']:
+            name = column['name']
+            self.encodings[name] = column['encoding']
+            if column['encoding'] == 'dictionary':
+                self._arrays[name] = load_mapped(
+                    os.path.join(cache_path, name + columnar_cache.CODES_SUFFIX))
+                self._values[name] = load_mapped(
+                    os.path.join(cache_path, name + columnar_cache.VALUES_SUFFIX))
+
+        for block in meta['blocks']:
+            values = load_mapped(columnar_cache.get_block_path(cache_path, block))
+            values = values.reshape(len(block['columns']), self.rows)
+            self._blocks.append((block['columns'], values))
+            for (i, column) in enumerate(block['columns']):
+                self._arrays[column] = values[i]
+
+
+    def __len__(self):
+        return self.rows
+
+
+    @property
+    def columns(self) -> list:
+        return list(self.encodings.keys())
+
+
+    def is_dictionary_encoded(self, column: str) -> bool:
+        return self.encodings[column] == 'dictionary'
+
+
+    def array(self, column: str) -> np.ndarray:
+        """
+           Read-only mapped array for a column.
+           For dictionary-encoded columns, these are the codes.
+        """
+        return self._arrays[column]
+
+
+    def dictionary(self, column: str) -> np.ndarray:
+        """ Unique values of a dictionary-encoded column """
+        return self._values[column]
+
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """ Timestamps as int64 nanoseconds since the epoch """
+        return self._arrays['timestamp'].view(np.int64)
+
+
+    def categorical(self, column: str) -> pd.Categorical:
+        """ Dictionary-encoded column as a categorical over the mapped codes """
+        categories = pd.Index(np.asarray(self._values[column]), dtype=object)
+        return pd.Categorical.from_codes(self._arrays[column], categories)
+
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+           Build a pandas dataframe with the revisions, sorted by timestamp,
+           whose columns are (or use) the mapped arrays.
+        """
+        positions = {column: i for (i, column) in enumerate(self.columns)}
+        blocks = [make_block(values, placement=[positions[column] for column in columns])
+                    for (columns, values) in self._blocks]
+        blocks += [make_block(self.categorical(column), placement=[positions[column]], ndim=2)
+                    for column in self.columns if self.is_dictionary_encoded(column)]
+        manager = BlockManager(blocks, [pd.Index(self.columns), pd.RangeIndex(self.rows)])
+        return pd.DataFrame(manager)
+
+
+def load_mapped(npy_path: str) -> np.ndarray:
+    return np.load(npy_path, mmap_mode='r').view(np.ndarray)
+
+
+def get_store(csv: str, excluded_contributors = ()) -> RevisionStore:
+    """
+       Return the revision store for csv (relative to the data dir), without
+       the revisions of the contributors whose ids are in excluded_contributors.
+
+       The store is opened once per process and reopened only when the source
+       csv changes, in which case its columnar cache is rebuilt first.
+    """
+    excluded = sorted(set(str(contributor) for contributor in excluded_contributors))
+    key = (csv, tuple(excluded))
+    with _stores_lock:
+        csv_lock = _csv_locks.setdefault(csv, threading.Lock())
+
+    with csv_lock:
+        store = _stores.get(key)
+        cache_path = columnar_cache.get_cache_path(csv)
+        meta = columnar_cache.read_meta(cache_path)
+
+        if store and meta and store.source == meta['source'] \
+            and columnar_cache.is_fresh(csv, meta):
+            return store
+
+        if not columnar_cache.is_fresh(csv, meta):
+            columnar_cache.convert_csv(csv)
+            meta = columnar_cache.read_meta(cache_path)
+            if not meta:
+                raise OSError(f'Could not write the columnar cache of {csv} in {cache_path}')
+
+        if excluded:
+            (cache_path, meta) = columnar_cache.convert_filtered(cache_path, meta,
+                                                            'contributor_id', excluded)
+
+        store = RevisionStore(csv, cache_path, meta)
+        with _stores_lock:
+            _stores[key] = store
+        return store
+
+
+def load_dataframe(csv: str, excluded_contributors = ()) -> pd.DataFrame:
+    return get_store(csv, excluded_contributors).to_dataframe()